@@ -0,0 +1,198 @@
+"""
+Sütunlu (columnar) analiz modülü
+
+Rezervasyonlar tipli dizilere çevrilir: seans kodu, gün kodu, koltuk
+sayısı, toplam tutar ve durum. NumPy kuruluysa gruplama ve en iyi K
+vektörel işlemlerle hesaplanır; sonuçlar
+reports modülündeki saf Python fonksiyonlarıyla birebir aynıdır. NumPy
+yoksa reports saf Python yolunu kullanır.
+
+Sütunlar rezervasyon listesine (IndexedList.watch) bağlanır ve yeni
+rezervasyonlarla birlikte büyür; her raporda yeniden oluşturulmaz.
+"""
+
+import threading
+from array import array
+from repository import IndexedList
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # NumPy isteğe bağlıdır
+    np = None
+    HAS_NUMPY = False
+
+
+# Satır durumları
+ACTIVE = 0
+CANCELLED = 1
+REMOVED = 2
+
+
+def _code(codes, labels, value):
+    """Değerin kodunu al (yeni değerler ilk görülme sırasıyla numaralanır)"""
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(labels)
+        labels.append(value)
+    return code
+
+
+class BookingColumns:
+    """Rezervasyonların sütunlu kopyası (satır sırası = liste sırası)
+    
+    Satırlar eşzamanlı satışlardan eklenirken raporlar sütunları kopyalar;
+    ikisi de kilit tutularak yapılır (kopyalanan dizi büyütülemez ve
+    sütunlar aynı uzunlukta kalmalıdır).
+    """
+    
+    def __init__(self, bookings=()):
+        self._lock = threading.Lock()
+        self.clear()
+        for booking in bookings:
+            self.add(booking)
+    
+    def clear(self):
+        with self._lock:
+            self.showtime = array('i')   # Seans kodu
+            self.day = array('i')        # Gün kodu (ilk görülme sırası)
+            self.seats = array('i')      # Koltuk sayısı
+            self.total = array('d')      # Toplam tutar
+            self.status = array('b')     # ACTIVE / CANCELLED / REMOVED
+            self.showtime_ids = []
+            self.day_labels = []
+            self._showtime_codes = {}
+            self._day_codes = {}
+            self._rows = {}              # booking_id -> satır
+            self._pending = None         # update_record sırasında çıkarılan satır
+    
+    def __len__(self):
+        return len(self.status)
+    
+    def _fields(self, booking):
+        label = booking['booking_date'].split()[0]
+        return (_code(self._showtime_codes, self.showtime_ids, booking['showtime_id']),
+                _code(self._day_codes, self.day_labels, label),
+                len(booking['seats']), booking['total'],
+                CANCELLED if booking['status'] == 'cancelled' else ACTIVE)
+    
+    def add(self, booking):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            values = self._fields(booking)
+            
+            # update_record: çıkarılıp hemen geri eklenen kayıt yerinde güncellenir
+            if pending is not None and pending[0] is booking:
+                row = pending[1]
+                for column, value in zip(self._columns(), values):
+                    column[row] = value
+                return
+            
+            self._rows[booking['booking_id']] = len(self.status)
+            for column, value in zip(self._columns(), values):
+                column.append(value)
+    
+    def discard(self, booking):
+        with self._lock:
+            row = self._rows.get(booking['booking_id'])
+            if row is not None:
+                self.status[row] = REMOVED
+                self._pending = (booking, row)
+    
+    def _columns(self):
+        return (self.showtime, self.day, self.seats, self.total, self.status)
+    
+    def arrays(self):
+        """Sütunları NumPy dizisi olarak al
+        
+        Diziler kopyalanır (tampon üzerinden, C hızında); görünüm tutulsaydı
+        sütunlara yeni satır eklenemezdi.
+        """
+        with self._lock:
+            return {
+                'showtime': np.array(self.showtime, dtype=np.intc),
+                'day': np.array(self.day, dtype=np.intc),
+                'seats': np.array(self.seats, dtype=np.intc),
+                'total': np.array(self.total, dtype=np.float64),
+                'status': np.array(self.status, dtype=np.int8)
+            }
+
+
+def booking_columns(bookings):
+    """Rezervasyon listesinin sütunlarını al
+    
+    IndexedList için sütunlar ilk kullanımda bağlanır ve sonra güncel
+    tutulur; düz listeler için her seferinde yeniden oluşturulur.
+    """
+    if isinstance(bookings, IndexedList):
+        return bookings.watcher(BookingColumns)
+    return BookingColumns(bookings)
+
+
+def _first_seen_order(codes):
+    """Kodları ilk görülme sırasına göre al (saf Python sözlük sırasıyla aynı)"""
+    unique, first = np.unique(codes, return_index=True)
+    return unique[np.argsort(first, kind='stable')]
+
+
+def top_movies(columns, showtimes, limit=5):
+    """En çok gelir getiren filmler (reports.top_movies ile aynı sonuç)"""
+    data = columns.arrays()
+    
+    # Seans kodu -> film kodu (listede olmayan seanslar -1)
+    movie_ids = []
+    movie_codes = {}
+    showtime_movies = {showtime['showtime_id']: showtime['movie_id'] for showtime in showtimes}
+    lookup = np.full(len(columns.showtime_ids), -1, dtype=np.intc)
+    for code, showtime_id in enumerate(columns.showtime_ids):
+        movie_id = showtime_movies.get(showtime_id)
+        if movie_id:
+            lookup[code] = _code(movie_codes, movie_ids, movie_id)
+    
+    movies = lookup[data['showtime']]
+    valid = (data['status'] == ACTIVE) & (movies >= 0)
+    movies = movies[valid]
+    if not len(movies):
+        return []
+    
+    # bincount ağırlıkları sırayla toplar: saf Python toplamıyla aynı kayan nokta sonucu
+    revenue = np.bincount(movies, weights=data['total'][valid], minlength=len(movie_ids))
+    tickets = np.bincount(movies, weights=data['seats'][valid], minlength=len(movie_ids))
+    counts = np.bincount(movies, minlength=len(movie_ids))
+    
+    top_list = [{
+        'movie_id': movie_ids[code],
+        'revenue': round(float(revenue[code]), 2),
+        'tickets_sold': int(tickets[code]),
+        'bookings': int(counts[code])
+    } for code in _first_seen_order(movies)]
+    
+    top_list.sort(key=lambda x: x['revenue'], reverse=True)
+    return top_list[:limit]
+
+
+def peak_days_analysis(columns):
+    """En yoğun günler (reports.peak_days_analysis ile aynı sonuç)"""
+    data = columns.arrays()
+    valid = data['status'] == ACTIVE
+    days = data['day'][valid]
+    
+    size = len(columns.day_labels)
+    revenue = np.bincount(days, weights=data['total'][valid], minlength=size)
+    tickets = np.bincount(days, weights=data['seats'][valid], minlength=size)
+    counts = np.bincount(days, minlength=size)
+    
+    order = _first_seen_order(days) if len(days) else []
+    peak_days = [{
+        'date': columns.day_labels[code],
+        'bookings': int(counts[code]),
+        'tickets': int(tickets[code]),
+        'revenue': round(float(revenue[code]), 2)
+    } for code in order]
+    
+    peak_days.sort(key=lambda x: x['revenue'], reverse=True)
+    
+    return {
+        'total_days': len(order),
+        'peak_days': peak_days[:10]
+    }
@@ -0,0 +1,13 @@
+"""
+Performans ölçüm (benchmark) paketi
+
+Sentetik veriyle (varsayılan: 10.000 seans, 1.000.000 rezervasyon,
+100.000 müşteri) sıcak yollar ölçülür: veri yükleme/kaydetme, koltuk
+haritası, rezervasyon, iptal, fiyat hesaplama, harita çizimi ve reports
+modülündeki tüm fonksiyonlar. Sonuçlar JSON dosyasına yazılır ve kayıtlı
+bir temel ölçümle (baseline) karşılaştırılır.
+
+Kullanım:
+    python -m benchmarks [--scale 0.01] [--output sonuc.json]
+                         [--baseline benchmarks/baseline.json] [--save-baseline]
+"""
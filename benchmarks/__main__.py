@@ -0,0 +1,5 @@
+import sys
+from benchmarks.suite import main_bench
+
+
+sys.exit(main_bench())
@@ -0,0 +1,129 @@
+"""
+Sentetik veri üretici
+
+Aynı tohum (seed) ile her çalıştırmada aynı veri üretilir; ID'ler de
+rastgele sayı üretecinden alınır. Koltuk haritaları rezervasyonlarla
+tutarlıdır: onaylı rezervasyonların koltukları doludur.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from bookings import calculate_booking_total
+from repository import Repository
+from seating import SeatMap, SOLD, define_layout, register_screen
+
+
+# Büyük salon: 20 x 20 = 400 koltuk (1M rezervasyon 10k seansa sığar)
+BENCH_LAYOUT = {
+    'layout_id': 'bench-20x20',
+    'rows': 20,
+    'seats_per_row': 20,
+    'premium_rows': ['A', 'B', 'C', 'D'],
+    'aisles': [5, 15]
+}
+BENCH_SCREEN = 'Bench Screen'
+
+GENRES = ('Action', 'Comedy', 'Drama', 'Horror', 'Sci-Fi', 'Animation')
+RATINGS = ('G', 'PG', 'PG-13', 'R')
+TIMES = ('10:00', '13:00', '16:00', '19:00', '22:00')
+
+START_DATE = date(2025, 1, 1)
+DAYS = 365
+
+# Onaylı rezervasyonların bu oranı iptal edilmiş olarak üretilir
+CANCEL_RATE = 0.1
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_dataset(showtimes=10000, bookings=1000000, customers=100000, movies=200, seed=0):
+    """Sentetik veri üret
+    
+    Dönen sözlük: 'movies', 'showtimes', 'bookings' (indeksli listeler),
+    'seat_maps' (seans ID -> SeatMap) ve 'customers' (e-posta listesi).
+    """
+    rng = random.Random(seed)
+    layout = define_layout(BENCH_LAYOUT)
+    register_screen(BENCH_SCREEN, layout)
+    
+    movie_list = [{
+        'movie_id': _uuid(rng),
+        'title': f"Film {i + 1}",
+        'genre': rng.choice(GENRES),
+        'duration': rng.randint(80, 180),
+        'rating': rng.choice(RATINGS),
+        'description': '',
+        'active': True
+    } for i in range(movies)]
+    
+    showtime_list = []
+    for i in range(showtimes):
+        showtime_list.append({
+            'showtime_id': _uuid(rng),
+            'movie_id': movie_list[i % movies]['movie_id'],
+            'screen': BENCH_SCREEN,
+            'date': (START_DATE + timedelta(days=i % DAYS)).isoformat(),
+            'time': TIMES[i % len(TIMES)],
+            'language': 'English',
+            'pricing': {'standard': 10.0, 'premium': 15.0}
+        })
+    
+    customer_list = [f"musteri{i}@example.com" for i in range(customers)]
+    
+    # Koltuklar seans başına sırayla doldurulur; dolan seansa düşen
+    # rezervasyonlar iptal edilmiş sayılır
+    statuses = [bytearray(layout.capacity) for _ in range(showtimes)]
+    cursors = [0] * showtimes
+    codes = layout.codes
+    # Tutarları hesaplamak için örnek harita (yalnızca bölge bilgisi kullanılır)
+    pricing_map = SeatMap(layout)
+    pricing = {'standard': 10.0, 'premium': 15.0}
+    days = [(START_DATE + timedelta(days=d)).isoformat() for d in range(DAYS)]
+    
+    booking_list = []
+    for _ in range(bookings):
+        s = rng.randrange(showtimes)
+        count = rng.randint(1, 4)
+        start = cursors[s]
+        cancelled = start + count > layout.capacity or rng.random() < CANCEL_RATE
+        if start + count > layout.capacity:
+            start = 0
+        seats = list(codes[start:start + count])
+        if not cancelled:
+            status = statuses[s]
+            for i in range(start, start + count):
+                status[i] = SOLD
+            cursors[s] = start + count
+        
+        email = customer_list[rng.randrange(customers)]
+        cost = calculate_booking_total(seats, pricing, pricing_map,
+                                       'student' if rng.random() < 0.2 else 'none')
+        booking_list.append({
+            'booking_id': _uuid(rng),
+            'showtime_id': showtime_list[s]['showtime_id'],
+            'seats': seats,
+            'customer_name': email.split('@')[0],
+            'customer_email': email,
+            'customer_phone': '',
+            'booking_date': f"{days[rng.randrange(DAYS)]} {rng.randrange(10, 23):02d}:00:00",
+            'subtotal': cost['subtotal'],
+            'discount': cost['discount'],
+            'discount_type': cost['discount_type'],
+            'total': cost['total'],
+            'status': 'cancelled' if cancelled else 'confirmed'
+        })
+    
+    seat_maps = {showtime['showtime_id']: SeatMap(layout, status)
+                 for showtime, status in zip(showtime_list, statuses)}
+    
+    repository = Repository(movie_list, showtime_list, booking_list)
+    return {
+        'movies': repository.movies,
+        'showtimes': repository.showtimes,
+        'bookings': repository.bookings,
+        'seat_maps': seat_maps,
+        'customers': customer_list
+    }
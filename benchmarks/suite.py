@@ -0,0 +1,361 @@
+"""
+Ölçüm senaryoları, çalıştırıcı ve temel ölçümle karşılaştırma
+
+Her senaryo @benchmark ile kaydedilen bir hazırlık fonksiyonudur: veri
+setini alır ve ölçülecek sıfır argümanlı fonksiyonu döndürür. Hazırlık
+süresi ölçülmez; ölçülen fonksiyon her tekrarda 'number' kez çağrılır ve
+işlem başına en iyi süre raporlanır.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from bookings import create_booking, cancel_booking, calculate_booking_total
+from repository import Repository
+from seating import SeatMap, initialize_seat_map, render_seat_map, get_layout
+from storage import load_state, save_state
+import reports
+from benchmarks.datagen import generate_dataset, BENCH_LAYOUT, BENCH_SCREEN
+
+
+# Varsayılan veri boyutları (scale ile çarpılır)
+DEFAULT_SIZES = {'showtimes': 10000, 'bookings': 1000000, 'customers': 100000, 'movies': 200}
+
+# Temel ölçümden bu orandan fazla yavaşlayan senaryolar gerileme sayılır
+DEFAULT_TOLERANCE = 0.10
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# save_state senaryosunda her tekrardan önce değişmiş sayılan harita oranı (1/n)
+SAVE_DIRTY_EVERY = 10
+
+# Ad -> (hazırlık fonksiyonu, tekrar başına çağrı sayısı)
+BENCHMARKS = {}
+
+
+def benchmark(name, number=1):
+    """Senaryo kaydet"""
+    def register(factory):
+        BENCHMARKS[name] = (factory, number)
+        return factory
+    return register
+
+
+class Workspace:
+    """Senaryoların paylaştığı veri seti ve geçici klasör"""
+    
+    def __init__(self, data):
+        self.data = data
+        self.tmp = tempfile.mkdtemp(prefix='cinema-bench-')
+        self._saved_dir = None
+    
+    def saved_dir(self):
+        """Veri setinin kaydedildiği klasör (ilk çağrıda bir kez kaydedilir)"""
+        if self._saved_dir is None:
+            self._saved_dir = os.path.join(self.tmp, 'saved')
+            d = self.data
+            save_state(self._saved_dir, d['showtimes'], d['seat_maps'], d['bookings'])
+        return self._saved_dir
+    
+    def sample_showtime(self):
+        return self.data['showtimes'][len(self.data['showtimes']) // 2]
+    
+    def close(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def _fresh_showtime():
+    """Boş koltuk haritalı tek seans (rezervasyon senaryoları için)"""
+    showtime = {
+        'showtime_id': 'bench-showtime',
+        'movie_id': 'bench-movie',
+        'screen': BENCH_SCREEN,
+        'date': '2025-06-01',
+        'time': '19:00',
+        'pricing': {'standard': 10.0, 'premium': 15.0}
+    }
+    seat_map = SeatMap(get_layout(BENCH_LAYOUT['layout_id']))
+    return Repository(showtimes=[showtime]).showtimes, {'bench-showtime': seat_map}
+
+
+def _consume(rows):
+    for _ in rows:
+        pass
+
+
+# --- Veri yükleme / kaydetme ---
+
+@benchmark('load_state')
+def bench_load_state(ws):
+    base_dir = ws.saved_dir()
+    return lambda: load_state(base_dir)
+
+
+@benchmark('save_state')
+def bench_save_state(ws):
+    base_dir = os.path.join(ws.tmp, 'save')
+    d = ws.data
+    # İlk tam kayıt ölçülmez; yazılmamış haritalar ilk tekrarı şişirmesin
+    if not os.path.isdir(base_dir):
+        save_state(base_dir, d['showtimes'], d['seat_maps'], d['bookings'])
+    # Önceki tekrar haritaları temizlemiştir: aynı haritalar yeniden değişmiş sayılır
+    for showtime in d['showtimes'][::SAVE_DIRTY_EVERY]:
+        d['seat_maps'][showtime['showtime_id']].dirty = True
+    return lambda: save_state(base_dir, d['showtimes'], d['seat_maps'], d['bookings'])
+
+
+# --- Koltuk haritası ve rezervasyon ---
+
+@benchmark('initialize_seat_map', number=1000)
+def bench_initialize_seat_map(ws):
+    layout = get_layout(BENCH_LAYOUT['layout_id'])
+    return lambda: initialize_seat_map(layout)
+
+
+@benchmark('render_seat_map', number=100)
+def bench_render_seat_map(ws):
+    seat_map = ws.data['seat_maps'][ws.sample_showtime()['showtime_id']]
+    return lambda: render_seat_map(seat_map)
+
+
+@benchmark('calculate_booking_total', number=1000)
+def bench_calculate_booking_total(ws):
+    seat_map = ws.data['seat_maps'][ws.sample_showtime()['showtime_id']]
+    seats = ['A1', 'A2', 'E5', 'E6']
+    pricing = {'standard': 10.0, 'premium': 15.0}
+    return lambda: calculate_booking_total(seats, pricing, seat_map, 'student')
+
+
+@benchmark('create_booking', number=200)
+def bench_create_booking(ws):
+    showtimes, seat_maps = _fresh_showtime()
+    codes = get_layout(BENCH_LAYOUT['layout_id']).codes
+    requests = iter([{
+        'showtime_id': 'bench-showtime',
+        'seats': [seat_code],
+        'customer_name': 'Bench',
+        'customer_email': 'bench@example.com'
+    } for seat_code in codes])
+    return lambda: create_booking(showtimes, seat_maps, next(requests))
+
+
+@benchmark('cancel_booking', number=200)
+def bench_cancel_booking(ws):
+    showtimes, seat_maps = _fresh_showtime()
+    codes = get_layout(BENCH_LAYOUT['layout_id']).codes
+    bookings = Repository().bookings
+    for seat_code in codes[:200]:
+        bookings.append(create_booking(showtimes, seat_maps, {
+            'showtime_id': 'bench-showtime',
+            'seats': [seat_code],
+            'customer_name': 'Bench',
+            'customer_email': 'bench@example.com'
+        }))
+    booking_ids = iter([booking['booking_id'] for booking in bookings])
+    return lambda: cancel_booking(bookings, next(booking_ids), seat_maps)
+
+
+# --- Raporlar (reports modülündeki tüm fonksiyonlar) ---
+
+PERIOD = ('2025-03-01', '2025-05-31')
+
+
+@benchmark('reports.iter_occupancy_rows')
+def bench_iter_occupancy_rows(ws):
+    d = ws.data
+    return lambda: _consume(reports.iter_occupancy_rows(d['showtimes'], d['seat_maps']))
+
+
+@benchmark('reports.occupancy_report')
+def bench_occupancy_report(ws):
+    d = ws.data
+    return lambda: reports.occupancy_report(d['showtimes'], d['seat_maps'], d['bookings'])
+
+
+@benchmark('reports.revenue_index')
+def bench_revenue_index(ws):
+    # Düz liste: indeks her çağrıda baştan oluşturulur (soğuk başlangıç)
+    bookings = list(ws.data['bookings'])
+    return lambda: reports.revenue_index(bookings)
+
+
+@benchmark('reports.revenue_summary', number=1000)
+def bench_revenue_summary(ws):
+    bookings = ws.data['bookings']
+    reports.revenue_index(bookings)
+    return lambda: reports.revenue_summary(bookings, PERIOD)
+
+
+@benchmark('reports.iter_revenue_rows', number=100)
+def bench_iter_revenue_rows(ws):
+    bookings = ws.data['bookings']
+    reports.revenue_index(bookings)
+    return lambda: _consume(reports.iter_revenue_rows(bookings, PERIOD))
+
+
+@benchmark('reports.iter_peak_day_rows', number=100)
+def bench_iter_peak_day_rows(ws):
+    bookings = ws.data['bookings']
+    reports.revenue_index(bookings)
+    return lambda: _consume(reports.iter_peak_day_rows(bookings, 10))
+
+
+@benchmark('reports.top_movies')
+def bench_top_movies(ws):
+    d = ws.data
+    return lambda: reports.top_movies(d['bookings'], d['showtimes'])
+
+
+@benchmark('reports.peak_days_analysis')
+def bench_peak_days_analysis(ws):
+    bookings = ws.data['bookings']
+    return lambda: reports.peak_days_analysis(bookings)
+
+
+@benchmark('reports.showtime_performance_report', number=100)
+def bench_showtime_performance_report(ws):
+    d = ws.data
+    showtime_id = ws.sample_showtime()['showtime_id']
+    return lambda: reports.showtime_performance_report(
+        d['showtimes'], d['seat_maps'], d['bookings'], showtime_id)
+
+
+@benchmark('reports.export_report')
+def bench_export_report(ws):
+    d = ws.data
+    report = reports.occupancy_report(d['showtimes'], d['seat_maps'], d['bookings'])
+    filename = os.path.join(ws.tmp, 'occupancy.json')
+    return lambda: reports.export_report(report, filename)
+
+
+@benchmark('reports.export_rows')
+def bench_export_rows(ws):
+    d = ws.data
+    filename = os.path.join(ws.tmp, 'occupancy.jsonl')
+    return lambda: reports.export_rows(
+        reports.iter_occupancy_rows(d['showtimes'], d['seat_maps']), filename)
+
+
+def measure(factory, ws, number=1, repeat=3):
+    """Senaryoyu ölç: tekrar başına süreler (saniye, 'number' çağrı için)"""
+    timings = []
+    for _ in range(repeat):
+        func = factory(ws)
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_suite(ws, names=None, repeat=3, progress=None):
+    """Senaryoları çalıştır ve ad -> sonuç sözlüğü döndür"""
+    results = {}
+    for name, (factory, number) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        timings = measure(factory, ws, number, repeat)
+        results[name] = {
+            'number': number,
+            'repeat': repeat,
+            'best': min(timings) / number,
+            'median': statistics.median(timings) / number
+        }
+        if progress:
+            progress.write(f"{name:40s} {results[name]['best'] * 1e6:12.1f} µs/işlem\n")
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Sonuçları temel ölçümle karşılaştır
+    
+    Her iki tarafta bulunan senaryolar için {'name', 'baseline', 'current',
+    'ratio'} listesi döner; yalnızca 'tolerance' oranından fazla yavaşlayanlar
+    listelenir.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or previous['best'] <= 0:
+            continue
+        ratio = result['best'] / previous['best']
+        if ratio > 1 + tolerance:
+            regressions.append({
+                'name': name,
+                'baseline': previous['best'],
+                'current': result['best'],
+                'ratio': round(ratio, 3)
+            })
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Performans ölçümlerini çalıştır")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="Veri boyutu çarpanı (1.0: 10k seans, 1M rezervasyon, 100k müşteri)")
+    parser.add_argument('--repeat', type=int, default=3, help="Senaryo başına tekrar sayısı")
+    parser.add_argument('--only', nargs='*', help="Yalnızca bu senaryoları çalıştır")
+    parser.add_argument('--seed', type=int, default=0, help="Veri üretici tohumu")
+    parser.add_argument('--output', default='bench_results.json', help="Sonuç dosyası")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Temel ölçüm dosyası")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Sonuçları temel ölçüm olarak da kaydet")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Gerileme eşiği (0.10: %%10 yavaşlama)")
+    return parser.parse_args(argv)
+
+
+def main_bench(argv=None):
+    """Ölçümleri çalıştır; gerileme varsa 1 döndür"""
+    args = parse_args(argv)
+    sizes = {key: max(1, int(value * args.scale)) for key, value in DEFAULT_SIZES.items()}
+    
+    print(f"Veri üretiliyor: {sizes['showtimes']} seans, {sizes['bookings']} rezervasyon, "
+          f"{sizes['customers']} müşteri")
+    ws = Workspace(generate_dataset(seed=args.seed, **sizes))
+    try:
+        results = run_suite(ws, args.only, args.repeat, progress=sys.stdout)
+    finally:
+        ws.close()
+    
+    report = {
+        'meta': {
+            'sizes': sizes,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': reports.USE_NUMPY,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S')
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Sonuçlar kaydedildi: {args.output}")
+    
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline['meta']['sizes'] != sizes:
+            print("Uyarı: temel ölçüm farklı veri boyutlarıyla alınmış!")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for item in regressions:
+            print(f"GERİLEME {item['name']}: {item['baseline'] * 1e6:.1f} -> "
+                  f"{item['current'] * 1e6:.1f} µs/işlem (x{item['ratio']})")
+        if not regressions:
+            print("Temel ölçüme göre gerileme yok.")
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Temel ölçüm kaydedildi: {args.baseline}")
+    
+    return 1 if regressions else 0
@@ -0,0 +1,85 @@
+"""
+Eşzamanlı rezervasyon motoru modülü
+
+Birden fazla satış noktası (iş parçacığı) aynı anda rezervasyon yapabilir.
+Koltuk kontrolü ve rezervasyonu seansın kendi kilidi altında yapılır;
+farklı seansları satan iş parçacıkları birbirini beklemez. Rezervasyon ve
+iptal, seansın kilidi bırakılmadan listeye işlenip günlüğe yazılır: aynı
+koltuğun iptali ve yeniden satışı günlüğe gerçekleştiği sırayla düşer.
+"""
+
+from bookings import create_booking, create_bookings, cancel_booking
+from holds import HoldScheduler
+
+
+class BookingEngine:
+    """İş parçacığı güvenli rezervasyon motoru
+    
+    journal: record_booking/record_cancellation metotlarına sahip kalıcılık
+    nesnesi (storage.BookingJournal veya sqlite_storage.SqliteJournal).
+    """
+    
+    def __init__(self, showtimes, seat_maps, bookings, journal=None):
+        self.showtimes = showtimes
+        self.seat_maps = seat_maps
+        self.bookings = bookings
+        self.journal = journal
+        self.holds = HoldScheduler(seat_maps)
+    
+    def hold(self, showtime_id, seats, ttl=None):
+        """Koltukları ödeme tamamlanana kadar geçici olarak tut"""
+        return self.holds.hold(showtime_id, seats, ttl)
+    
+    def release_hold(self, hold_id):
+        """Tutulan koltukları bırak"""
+        return self.holds.release(hold_id)
+    
+    def book(self, booking_data):
+        """Rezervasyon yap (koltukların hepsi ayrılır ya da hiçbiri)"""
+        # Seans kilidi yalnızca create_booking içinde tutulur; _publish bu
+        # kilit altında çağrılır
+        booking = create_booking(self.showtimes, self.seat_maps, booking_data,
+                                 publish=self._publish)
+        
+        # Satışa dönüşen tutma zamanlayıcıdan düşülür
+        if booking_data.get('hold_id'):
+            self.holds.release(booking_data['hold_id'])
+        
+        return booking
+    
+    def _publish(self, booking):
+        """Yeni rezervasyonu listeye ekle ve günlüğe yaz (seansın kilidi tutulurken)"""
+        # IndexedList ekleme, indeks ve izleyici güncellemelerini (gelir
+        # indeksi, analiz sütunları) liste kilidi altında yapar
+        self.bookings.append(booking)
+        
+        if self.journal:
+            self.journal.record_booking(booking)
+    
+    def book_many(self, requests):
+        """Toplu rezervasyon yap; başarılı olanlar tek seferde kalıcı yazılır
+        
+        İstek sırasıyla sonuç listesi döner (bkz. bookings.create_bookings).
+        """
+        results = create_bookings(self.showtimes, self.seat_maps, requests)
+        
+        batch = []
+        for booking_data, result in zip(requests, results):
+            if result['ok']:
+                batch.append(result['booking'])
+                if booking_data.get('hold_id'):
+                    self.holds.release(booking_data['hold_id'])
+        
+        if batch:
+            self.bookings.extend(batch)
+            if self.journal:
+                self.journal.record_bookings(batch)
+        
+        return results
+    
+    def cancel(self, booking_id):
+        """Rezervasyonu iptal et"""
+        # Günlük kaydı koltuklar bırakılırken tutulan seans kilidi altında yazılır:
+        # aynı koltuğun yeni satışı bu kayıttan önce günlüğe düşemez
+        publish = self.journal.record_cancellation if self.journal else None
+        return cancel_booking(self.bookings, booking_id, self.seat_maps, publish=publish)
@@ -3,50 +3,191 @@ Rezervasyon yönetimi modülü
 """
 
 import uuid
+import threading
+import time
 from datetime import datetime
 import os
-from seating import reserve_seat, release_seat, get_seat_zone, is_seat_available
+from seating import reserve_seat, release_seat, get_seat_zone, is_seat_available, claim_hold
+from repository import find_record, filter_records, update_record
+import metrics
 
 
-def create_booking(showtimes, seat_maps, booking_data):
-    """Yeni rezervasyon oluştur"""
-    showtime_id = booking_data['showtime_id']
-    seats = booking_data['seats']
+# Koltuk haritası olmayan rezervasyonların iptali için
+_cancel_lock = threading.Lock()
+
+BOOKING_SECONDS = metrics.histogram('cinema_booking_seconds',
+                                    "Rezervasyon oluşturma süresi (saniye)")
+BATCH_SECONDS = metrics.histogram('cinema_booking_batch_seconds',
+                                  "Toplu rezervasyon süresi (saniye)")
+BOOKINGS_CREATED = metrics.counter('cinema_bookings_total', "Rezervasyon istekleri",
+                                   {'result': 'ok'})
+BOOKINGS_FAILED = metrics.counter('cinema_bookings_total', "Rezervasyon istekleri",
+                                  {'result': 'error'})
+CANCELLATIONS = metrics.counter('cinema_cancellations_total', "İptal edilen rezervasyonlar")
+
+
+def create_booking(showtimes, seat_maps, booking_data, publish=None):
+    """Yeni rezervasyon oluştur
+    
+    Koltuklar seansın kilidi altında kontrol edilip rezerve edilir: ya
+    istenen koltukların hepsi ayrılır ya da hiçbiri. booking_data içinde
+    'hold_id' varsa daha önce tutulmuş koltuklar satışa çevrilir.
+    
+    publish verilirse yeni rezervasyonla kilit hâlâ tutulurken çağrılır
+    (listeye ekleme ve günlüğe yazma; bkz. booking_engine).
+    """
+    start = time.perf_counter()
+    try:
+        _check_request(booking_data)
+        showtime, seat_map = _find_showtime(showtimes, seat_maps, booking_data['showtime_id'])
+        cost_breakdown = _price_booking(showtime, seat_map, booking_data)
+        
+        with seat_map.lock:
+            _reserve_seats(seat_map, booking_data['seats'], booking_data.get('hold_id'))
+            booking = _new_booking(booking_data, cost_breakdown)
+            if publish:
+                publish(booking)
+    except Exception:
+        BOOKINGS_FAILED.inc()
+        raise
+    
+    BOOKING_SECONDS.observe(time.perf_counter() - start)
+    BOOKINGS_CREATED.inc()
+    return booking
+
+
+def create_bookings(showtimes, seat_maps, requests):
+    """Toplu rezervasyon oluştur
+    
+    İstekler seansa göre gruplanır: seans, koltuk haritası ve fiyatlar her
+    seans için bir kez bulunur ve seansın kilidi bir kez alınır. Her istek
+    kendi içinde hepsi-ya-hiçbiri kuralıyla işlenir; başarısız istekler
+    diğerlerini etkilemez; hatalı biçimli istek de yalnızca kendi sonucunu
+    başarısız yapar (hiçbir hata, koltuklar ayrıldıktan sonra dışarı çıkmaz).
     
-    # Seansı bul
-    showtime = None
-    for st in showtimes:
-        if st['showtime_id'] == showtime_id:
-            showtime = st
-            break
+    İstek sırasıyla sonuç listesi döner: başarılı istekler için
+    {'ok': True, 'booking': ...}, başarısızlar için {'ok': False, 'error': ...}
+    """
+    start = time.perf_counter()
+    results = [None] * len(requests)
+    
+    groups = {}
+    for position, booking_data in enumerate(requests):
+        try:
+            _check_request(booking_data)
+        except ValueError as e:
+            results[position] = {'ok': False, 'error': str(e)}
+            continue
+        groups.setdefault(booking_data.get('showtime_id'), []).append(position)
+    
+    for showtime_id, positions in groups.items():
+        try:
+            showtime, seat_map = _find_showtime(showtimes, seat_maps, showtime_id)
+        except Exception as e:
+            for position in positions:
+                results[position] = {'ok': False, 'error': str(e)}
+            continue
+        
+        # Doğrulama ve fiyatlandırma kilit dışında yapılır
+        prepared = []
+        for position in positions:
+            try:
+                prepared.append((position, _price_booking(showtime, seat_map, requests[position])))
+            except Exception as e:
+                results[position] = {'ok': False, 'error': str(e)}
+        
+        with seat_map.lock:
+            for position, cost_breakdown in prepared:
+                booking_data = requests[position]
+                try:
+                    _reserve_seats(seat_map, booking_data['seats'], booking_data.get('hold_id'))
+                except Exception as e:
+                    results[position] = {'ok': False, 'error': str(e)}
+                    continue
+                results[position] = {'ok': True,
+                                     'booking': _new_booking(booking_data, cost_breakdown)}
+    
+    BATCH_SECONDS.observe(time.perf_counter() - start)
+    succeeded = sum(1 for result in results if result['ok'])
+    BOOKINGS_CREATED.inc(succeeded)
+    BOOKINGS_FAILED.inc(len(results) - succeeded)
+    return results
+
+
+def _find_showtime(showtimes, seat_maps, showtime_id):
+    """Seansı ve koltuk haritasını bul"""
+    showtime = find_record(showtimes, 'showtime_id', showtime_id)
     
     if not showtime:
         raise ValueError("Seans bulunamadı!")
     
-    # Koltuk haritasını al
     seat_map = seat_maps.get(showtime_id)
     if not seat_map:
         raise ValueError("Koltuk haritası bulunamadı!")
     
-    # Tüm koltukların müsait olduğunu kontrol et
-    for seat_code in seats:
-        if not is_seat_available(seat_map, seat_code):
-            raise ValueError(f"Koltuk {seat_code} müsait değil!")
+    return showtime, seat_map
+
+
+def _check_request(booking_data):
+    """İsteğin biçimini doğrula (gruplama ve koltuk ayırmadan önce)"""
+    if not isinstance(booking_data, dict):
+        raise ValueError("Rezervasyon isteği JSON nesnesi olmalı")
+    
+    showtime_id = booking_data.get('showtime_id')
+    if showtime_id is not None and not isinstance(showtime_id, str):
+        raise ValueError(f"Geçersiz seans ID: {showtime_id!r}")
+
+
+def _price_booking(showtime, seat_map, booking_data):
+    """İsteği doğrula ve toplam fiyatı hesapla (indirimlerle)"""
+    _check_request(booking_data)
+    
+    # Eksik alan koltuklar ayrıldıktan sonra değil, şimdi fark edilir
+    for field in ('seats', 'customer_name', 'customer_email'):
+        if field not in booking_data:
+            raise ValueError(f"Eksik alan: {field}")
+    
+    seats = booking_data['seats']
+    if not isinstance(seats, list) or not all(isinstance(code, str) for code in seats):
+        raise ValueError("Koltuklar koltuk kodu listesi olmalı")
+    if len(set(seats)) != len(seats):
+        raise ValueError("Aynı koltuk birden fazla seçilmiş!")
     
-    # Toplam fiyatı hesapla (indirimlerle)
     pricing = showtime.get('pricing', {'standard': 10.0, 'premium': 15.0})
     discount_type = booking_data.get('discount_type', 'none')  # 'student', 'group', 'none'
-    cost_breakdown = calculate_booking_total(seats, pricing, seat_map, discount_type)
+    return calculate_booking_total(seats, pricing, seat_map, discount_type)
+
+
+def _reserve_seats(seat_map, seats, hold_id=None):
+    """Koltukları ayır (seansın kilidi tutulurken çağrılır)"""
+    if hold_id:
+        # Daha önce tutulan koltukları satışa çevir
+        claim_hold(seat_map, hold_id, seats)
+        return
     
-    # Koltukları rezerve et
+    # Tüm koltukların müsait olduğunu kontrol et
     for seat_code in seats:
-        reserve_seat(seat_map, seat_code)
+        if not is_seat_available(seat_map, seat_code):
+            raise ValueError(f"Koltuk {seat_code} müsait değil!")
     
-    # Rezervasyonu oluştur
-    booking = {
+    # Koltukları rezerve et (hata olursa ayrılanları geri bırak)
+    reserved = []
+    try:
+        for seat_code in seats:
+            reserve_seat(seat_map, seat_code)
+            reserved.append(seat_code)
+    except Exception:
+        for seat_code in reserved:
+            release_seat(seat_map, seat_code)
+        raise
+
+
+def _new_booking(booking_data, cost_breakdown):
+    """Rezervasyon kaydını oluştur"""
+    return {
         'booking_id': str(uuid.uuid4()),
-        'showtime_id': showtime_id,
-        'seats': seats,
+        'showtime_id': booking_data['showtime_id'],
+        'seats': booking_data['seats'],
         'customer_name': booking_data['customer_name'],
         'customer_email': booking_data['customer_email'],
         'customer_phone': booking_data.get('customer_phone', ''),
@@ -57,38 +198,45 @@ def create_booking(showtimes, seat_maps, booking_data):
         'total': cost_breakdown['total'],
         'status': 'confirmed'
     }
-    
-    return booking
 
 
-def cancel_booking(bookings, booking_id, seat_maps):
-    """Rezervasyonu iptal et"""
+def cancel_booking(bookings, booking_id, seat_maps, publish=None):
+    """Rezervasyonu iptal et
+    
+    publish verilirse iptal edilen rezervasyonla, koltuklar bırakıldıktan
+    sonra ve seansın kilidi hâlâ tutulurken çağrılır.
+    """
     # Rezervasyonu bul
-    booking = None
-    for b in bookings:
-        if b['booking_id'] == booking_id:
-            booking = b
-            break
+    booking = find_record(bookings, 'booking_id', booking_id)
     
     if not booking:
         return False
     
-    if booking['status'] == 'cancelled':
-        print("Rezervasyon zaten iptal edilmiş!")
-        return False
-    
-    # Koltukları serbest bırak
     showtime_id = booking['showtime_id']
     seat_map = seat_maps.get(showtime_id)
     
-    if seat_map:
-        for seat_code in booking['seats']:
-            release_seat(seat_map, seat_code)
-    
-    # Rezervasyon durumunu güncelle
-    booking['status'] = 'cancelled'
-    booking['cancelled_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Durum kontrolü ve koltukların bırakılması seansın kilidi altında yapılır
+    # (aynı rezervasyon iki kez iptal edilip koltuklar iki kez bırakılmaz)
+    lock = seat_map.lock if seat_map else _cancel_lock
+    with lock:
+        if booking['status'] == 'cancelled':
+            print("Rezervasyon zaten iptal edilmiş!")
+            return False
+        
+        # Koltukları serbest bırak
+        if seat_map:
+            for seat_code in booking['seats']:
+                release_seat(seat_map, seat_code)
+        
+        # Rezervasyon durumunu güncelle (gelir indeksi gibi izleyiciler de güncellenir)
+        update_record(bookings, booking, {
+            'status': 'cancelled',
+            'cancelled_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+        if publish:
+            publish(booking)
     
+    CANCELLATIONS.inc()
     return True
 
 
@@ -134,15 +282,12 @@ def calculate_booking_total(seats, pricing, seat_map, discount_type='none'):
 
 def list_customer_bookings(bookings, email):
     """Müşterinin rezervasyonlarını listele"""
-    return [b for b in bookings if b['customer_email'] == email]
+    return filter_records(bookings, 'customer_email', email)
 
 
 def get_booking(bookings, booking_id):
     """ID'ye göre rezervasyon bul"""
-    for booking in bookings:
-        if booking['booking_id'] == booking_id:
-            return booking
-    return None
+    return find_record(bookings, 'booking_id', booking_id)
 
 
 def generate_ticket(booking, tickets_dir):
@@ -0,0 +1,108 @@
+"""
+Geçici koltuk tutma (hold) modülü
+
+Müşteri bilgilerini girerken seçtiği koltuklar belirli bir süre (TTL)
+başka satış noktalarına kapatılır. Süresi dolan tutmalar bitiş zamanına
+göre sıralı bir min-heap'ten toplu olarak bırakılır; koltuk haritaları
+taranmaz.
+"""
+
+import heapq
+import threading
+import time
+import uuid
+from seating import hold_seats, release_hold
+
+
+# Varsayılan tutma süresi (saniye)
+DEFAULT_HOLD_TTL = 300
+
+
+class HoldScheduler:
+    """Koltuk tutmalarının süresini yöneten zamanlayıcı"""
+    
+    def __init__(self, seat_maps, ttl=DEFAULT_HOLD_TTL):
+        self.seat_maps = seat_maps
+        self.ttl = ttl
+        self._heap = []    # (bitiş zamanı, tutma ID)
+        self._holds = {}   # tutma ID -> koltuk haritası
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def hold(self, showtime_id, seats, ttl=None):
+        """Koltukları tut ve tutma bilgisini döndür"""
+        seat_map = self.seat_maps.get(showtime_id)
+        if not seat_map:
+            raise ValueError("Koltuk haritası bulunamadı!")
+        
+        hold_id = str(uuid.uuid4())
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        hold_seats(seat_map, seats, hold_id, expires_at)
+        
+        # Harita referansı tutulur: önbellekten çıksa da aynı nesne kullanılır
+        with self._lock:
+            heapq.heappush(self._heap, (expires_at, hold_id))
+            self._holds[hold_id] = seat_map
+        
+        return {
+            'hold_id': hold_id,
+            'showtime_id': showtime_id,
+            'seats': list(seats),
+            'expires_at': expires_at
+        }
+    
+    def release(self, hold_id):
+        """Tutmayı süresi dolmadan bırak"""
+        with self._lock:
+            seat_map = self._holds.pop(hold_id, None)
+        if seat_map is None:
+            return False
+        return release_hold(seat_map, hold_id) > 0
+    
+    def release_expired(self, now=None):
+        """Süresi dolan tutmaları bırak (bırakılan tutma sayısı)
+        
+        Heap'in başındaki süresi dolmuş kayıtlar alınır; satışa dönüşmüş ya
+        da elle bırakılmış tutmalar release_hold tarafından yok sayılır.
+        """
+        if now is None:
+            now = time.time()
+        
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, hold_id = heapq.heappop(self._heap)
+                seat_map = self._holds.pop(hold_id, None)
+                if seat_map is not None:
+                    expired.append((hold_id, seat_map))
+        
+        released = 0
+        for hold_id, seat_map in expired:
+            if release_hold(seat_map, hold_id):
+                released += 1
+        return released
+    
+    def __len__(self):
+        return len(self._holds)
+    
+    def start(self, interval=1.0):
+        """Süresi dolan tutmaları arka planda düzenli olarak bırak"""
+        if self._thread is not None:
+            return
+        
+        def run():
+            while not self._stop.wait(interval):
+                self.release_expired()
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='hold-expiry', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Arka plan iş parçacığını durdur"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
@@ -3,17 +3,25 @@ Sinema Bilet Rezervasyon Sistemi Ana Program
 """
 
 import os
+import sys
 from datetime import datetime
-from movies import (load_movies, save_movies, add_movie, schedule_showtime, 
+from movies import (load_movies, save_movies, add_movie, schedule_showtime,
                    list_showtimes, get_showtime, get_movie, list_active_movies)
-from seating import render_seat_map, validate_seat_code
-from bookings import (create_booking, cancel_booking, list_customer_bookings, 
-                     generate_ticket, get_booking)
-from storage import load_state, save_state, backup_state
-from reports import (occupancy_report, revenue_summary, top_movies, 
-                    peak_days_analysis, showtime_performance_report, export_report)
-from validation import (validate_email, validate_phone, validate_date, 
+from seating import render_seat_map, validate_seat_code, find_best_seats
+from bookings import list_customer_bookings, generate_ticket, get_booking
+from booking_engine import BookingEngine
+from storage import load_state, save_state, backup_state, BookingJournal
+import sqlite_storage
+import sharded_storage
+from repository import Repository, ChangedRecords
+from persistence import WriteBehind, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_LAG
+from reports import (occupancy_report, revenue_summary, top_movies,
+                    peak_days_analysis, showtime_performance_report, export_report,
+                    iter_occupancy_rows, iter_revenue_rows, iter_peak_day_rows, export_rows)
+from validation import (validate_email, validate_phone, validate_date,
                        validate_time, validate_name, validate_price, validate_duration)
+import profiling
+import metrics
 
 
 # Klasörler
@@ -21,11 +29,31 @@ DATA_DIR = 'data'
 BACKUP_DIR = 'backups'
 TICKETS_DIR = 'tickets'
 
+# Veri saklama yöntemi: 'json' (varsayılan), 'sqlite' veya 'sharded' (seans başına dosya)
+STORAGE_BACKEND = os.environ.get('CINEMA_STORAGE', 'json')
+
+# Günlükte bu kadar kayıt birikince tam kontrol noktası (checkpoint) alınır
+CHECKPOINT_INTERVAL = 200
+
+# Arka plan kaydı: istekler bu kadar saniye durulunca tek kayıtta birleştirilir,
+# en geç MAX_SAVE_LAG saniye sonra yazılır (bkz. persistence.py)
+SAVE_INTERVAL = float(os.environ.get('CINEMA_SAVE_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+MAX_SAVE_LAG = float(os.environ.get('CINEMA_MAX_SAVE_LAG', DEFAULT_MAX_LAG))
+
+# Ölçümlerin düzenli olarak yazılacağı dosya (Prometheus metin biçimi, boşsa yazılmaz)
+METRICS_FILE = os.environ.get('CINEMA_METRICS_FILE', '')
+
 # Global değişkenler
 movies = []
 showtimes = []
 seat_maps = {}
 bookings = []
+journal = None
+engine = None
+writer = None
+saved_versions = {}   # liste adı -> son kaydedilen değişiklik damgası (bkz. repository.py)
+booking_changes = None   # SQLite: son kontrol noktasından beri değişen rezervasyonlar
+metrics_exporter = None
 
 
 def clear_screen():
@@ -40,16 +68,142 @@ def pause():
 
 def load_data():
     """Tüm verileri yükle"""
-    global movies, showtimes, seat_maps, bookings
-    movies = load_movies(os.path.join(DATA_DIR, 'movies.json'))
-    showtimes, seat_maps, bookings = load_state(DATA_DIR)
+    global movies, showtimes, seat_maps, bookings, journal, engine, writer, saved_versions
+    global metrics_exporter, booking_changes
+    # Önceki verilerin bekleyen kaydı yeni veriler yüklenmeden yazılır
+    if writer:
+        writer.stop()
+    
+    if STORAGE_BACKEND == 'sqlite':
+        movies = sqlite_storage.load_movies(DATA_DIR)
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(DATA_DIR)
+        journal = sqlite_storage.SqliteJournal(DATA_DIR)
+    elif STORAGE_BACKEND == 'sharded':
+        movies = load_movies(os.path.join(DATA_DIR, 'movies.json'))
+        showtimes, seat_maps, bookings = sharded_storage.load_state(DATA_DIR)
+        journal = BookingJournal(DATA_DIR)
+    else:
+        movies = load_movies(os.path.join(DATA_DIR, 'movies.json'))
+        showtimes, seat_maps, bookings = load_state(DATA_DIR)
+        journal = BookingJournal(DATA_DIR)
+    
+    # ID ile aramalar için indeksli listeler
+    repository = Repository(movies, showtimes, bookings)
+    movies, showtimes, bookings = repository.movies, repository.showtimes, repository.bookings
+    # Yüklenen veriler diskteki ile aynıdır (günlükten oynatılanlar kayıtta yazılır)
+    saved_versions = {'movies': movies.version, 'showtimes': showtimes.version,
+                      'bookings': bookings.version}
+    booking_changes = None
+    if STORAGE_BACKEND == 'sqlite':
+        # Yüklenen satırlar veritabanında zaten var
+        booking_changes = bookings.watch(ChangedRecords())
+        booking_changes.take()
+    engine = BookingEngine(showtimes, seat_maps, bookings, journal)
+    engine.holds.start()
+    writer = WriteBehind(save_data, SAVE_INTERVAL, MAX_SAVE_LAG)
+    writer.start()
+    
+    if METRICS_FILE and metrics_exporter is None:
+        metrics_exporter = metrics.TextfileExporter(METRICS_FILE)
+        metrics_exporter.start()
     print("Veriler yüklendi!")
 
 
 def save_data():
-    """Tüm verileri kaydet"""
-    save_movies(os.path.join(DATA_DIR, 'movies.json'), movies)
-    save_state(DATA_DIR, showtimes, seat_maps, bookings)
+    """Tüm verileri kaydet (kontrol noktası)
+    
+    Arka plan yazıcısından çağrılır: yazma sürerken yapılan değişiklikler
+    yazılan verileri bozmasın diye listeler ve kayıtlar önce kopyalanır.
+    Yalnızca son kayıttan beri değişen listeler ve koltuk haritaları yazılır.
+    """
+    # Bu noktadan sonra günlüğe eklenen kayıtlar kopyada olmayabilir; silinmez
+    mark = journal.mark() if journal else None
+    # Damgalar kopyadan önce okunur: kopyalama sırasındaki değişiklik bir
+    # sonraki kayıtta yeniden yazılır
+    versions = {'movies': getattr(movies, 'version', None),
+                'showtimes': getattr(showtimes, 'version', None),
+                'bookings': getattr(bookings, 'version', None)}
+    changed = {name for name, version in versions.items()
+               if version is None or saved_versions.get(name) != version}
+    # Günlükteki kayıtlar silinmeden önce rezervasyon dosyasına yazılmalı
+    if mark and mark[1]:
+        changed.add('bookings')
+    
+    # İkili anlık görüntü iki listeyi birlikte tutar: biri değiştiyse ikisi de
+    # gerekir. Seans listesi küçüktür ve parçalı saklamada her kayıtta gerekir.
+    state_changed = changed & {'showtimes', 'bookings'}
+    showtime_records = [dict(showtime) for showtime in showtimes]
+    
+    if STORAGE_BACKEND == 'sqlite':
+        # Rezervasyon ve iptaller günlükte satır satır yazılır; kontrol noktası
+        # yalnızca son kayıttan beri değişen satırları yazar (tüm tabloyu değil)
+        if booking_changes is not None:
+            updated, removed = booking_changes.take()
+        else:
+            updated, removed = list(bookings), []   # load_data öncesi: tüm liste
+        try:
+            if 'movies' in changed:
+                sqlite_storage.save_movies(DATA_DIR, [dict(movie) for movie in movies])
+            sqlite_storage.save_state(DATA_DIR, showtime_records, seat_maps,
+                                      [dict(booking) for booking in updated], state_changed,
+                                      [booking['booking_id'] for booking in removed])
+        except Exception:
+            if booking_changes is not None:
+                booking_changes.restore(updated, removed)
+            raise
+    else:
+        booking_records = [dict(booking) for booking in bookings] if state_changed else []
+        if 'movies' in changed:
+            save_movies(os.path.join(DATA_DIR, 'movies.json'), [dict(movie) for movie in movies])
+        if STORAGE_BACKEND == 'sharded':
+            sharded_storage.save_state(DATA_DIR, showtime_records, seat_maps, booking_records,
+                                       state_changed)
+        else:
+            save_state(DATA_DIR, showtime_records, seat_maps, booking_records, state_changed)
+    saved_versions.update(versions)
+    
+    # Günlükteki kayıtlar artık JSON dosyalarında
+    if journal:
+        journal.reset(mark)
+
+
+def request_save():
+    """Verilerin arka planda kaydedilmesini iste (yazıcı yoksa hemen kaydet)"""
+    if writer:
+        writer.request()
+    else:
+        save_data()
+
+
+def flush_data():
+    """Bekleyen kayıt istekleri diske yazılana kadar bekle"""
+    if writer:
+        writer.flush()
+
+
+def checkpoint_if_needed():
+    """Günlük yeterince büyüdüyse kontrol noktası iste"""
+    if journal.records >= CHECKPOINT_INTERVAL:
+        request_save()
+
+
+def close_data(checkpoint=True):
+    """Kapanış: tutmaları durdur, bekleyen kaydı yap, günlüğü ve ölçümleri kapat
+    
+    checkpoint: günlükteki kayıtlar da veri dosyalarına yazılsın mı
+    """
+    global writer
+    engine.holds.stop()
+    if writer:
+        if checkpoint:
+            writer.request()
+        writer.stop()
+        writer = None
+    elif checkpoint:
+        save_data()
+    journal.close()
+    if metrics_exporter:
+        metrics_exporter.stop()
 
 
 def display_header(title):
@@ -242,9 +396,17 @@ def book_tickets():
     
     print(render_seat_map(seat_map))
     
-    # Koltuk seç
-    seats_input = input("Koltuk kodları (virgülle ayırın, örn: A5,A6): ").strip()
-    selected_seats = [s.strip().upper() for s in seats_input.split(',')]
+    # Koltuk seç (kişi sayısı girilirse en iyi yan yana koltuklar önerilir)
+    seats_input = input("Koltuk kodları (virgülle ayırın, örn: A5,A6) veya kişi sayısı: ").strip()
+    if seats_input.isdigit():
+        selected_seats = find_best_seats(seat_map, int(seats_input))
+        if not selected_seats:
+            print("Bu sayıda müsait koltuk bulunamadı!")
+            pause()
+            return
+        print(f"Önerilen koltuklar: {', '.join(selected_seats)}")
+    else:
+        selected_seats = [s.strip().upper() for s in seats_input.split(',')]
     
     # Koltukları kontrol et
     for seat in selected_seats:
@@ -253,6 +415,14 @@ def book_tickets():
             pause()
             return
     
+    # Koltukları bilgiler girilirken başka satışlara kapat
+    try:
+        hold = engine.hold(showtime_id, selected_seats)
+    except ValueError as e:
+        print(f"Hata: {e}")
+        pause()
+        return
+    
     # Müşteri bilgileri
     print("\nMüşteri Bilgileri:")
     
@@ -309,6 +479,7 @@ def book_tickets():
     
     confirm = input("\nDevam etmek istiyor musunuz? (evet/hayır): ").strip().lower()
     if confirm != 'evet':
+        engine.release_hold(hold['hold_id'])
         print("Rezervasyon iptal edildi.")
         pause()
         return
@@ -321,12 +492,12 @@ def book_tickets():
             'customer_name': name,
             'customer_email': email,
             'customer_phone': phone,
-            'discount_type': discount_type
+            'discount_type': discount_type,
+            'hold_id': hold['hold_id']
         }
         
-        booking = create_booking(showtimes, seat_maps, booking_data)
-        bookings.append(booking)
-        save_data()
+        booking = engine.book(booking_data)
+        checkpoint_if_needed()
         
         print("\n" + "=" * 70)
         print("REZERVASYON BAŞARILI!")
@@ -343,8 +514,9 @@ def book_tickets():
         ticket_path = generate_ticket(booking, TICKETS_DIR)
         if ticket_path:
             print(f"\nBilet kaydedildi: {ticket_path}")
-        
+    
     except Exception as e:
+        engine.release_hold(hold['hold_id'])
         print(f"\nHata: {e}")
     
     pause()
@@ -403,8 +575,8 @@ def cancel_booking_menu():
     confirm = input("\nİptal etmek istediğinizden emin misiniz? (evet/hayır): ").strip().lower()
     
     if confirm == 'evet':
-        if cancel_booking(bookings, booking_id, seat_maps):
-            save_data()
+        if engine.cancel(booking_id):
+            checkpoint_if_needed()
             print("\nRezervasyon iptal edildi!")
         else:
             print("\nİptal başarısız!")
@@ -437,11 +609,11 @@ def add_movie_menu():
         }
         
         movie = add_movie(movies, movie_data)
-        save_data()
+        request_save()
         
         print(f"\nFilm eklendi!")
         print(f"Film ID: {movie['movie_id']}")
-        
+    
     except ValueError:
         print("Geçersiz giriş!")
     
@@ -492,12 +664,14 @@ def schedule_showtime_menu():
         }
         
         showtime = schedule_showtime(showtimes, showtime_data)
-        seat_maps[showtime['showtime_id']] = showtime['seat_map']
-        save_data()
+        # Harita yalnızca önbellekte tutulur (yükleme yolundaki gibi); seans
+        # kaydında kalırsa bellekten hiç çıkarılamaz
+        seat_maps[showtime['showtime_id']] = showtime.pop('seat_map')
+        request_save()
         
         print(f"\nSeans planlandı!")
         print(f"Seans ID: {showtime['showtime_id']}")
-        
+    
     except Exception as e:
         print(f"Hata: {e}")
     
@@ -572,13 +746,39 @@ def show_occupancy_report():
     
     export = input("\nDosyaya kaydet? (evet/hayır): ").strip().lower()
     if export == 'evet':
-        filename = f"doluluk_raporu_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = export_report(report, filename)
+        extension = choose_export_format(allow_json=True)
+        filename = f"doluluk_raporu_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        if extension == 'json':
+            filepath = export_report(report, filename)
+        else:
+            export_rows(iter_occupancy_rows(showtimes, seat_maps), filename)
+            filepath = filename
         print(f"Rapor kaydedildi: {filepath}")
     
     pause()
 
 
+def choose_export_format(allow_json=False):
+    """Dışa aktarma biçimini sor (dosya uzantısı döner)"""
+    options = (['json'] if allow_json else []) + ['jsonl', 'csv', 'csv.gz']
+    names = {'json': 'JSON', 'jsonl': 'JSON Lines', 'csv': 'CSV', 'csv.gz': 'CSV (gzip)'}
+    for i, option in enumerate(options, 1):
+        print(f"{i}. {names[option]}")
+    
+    choice = input("Biçim: ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(options):
+        return options[int(choice) - 1]
+    return options[0]
+
+
+def export_report_rows(rows, prefix):
+    """Rapor satırlarını seçilen biçimde dosyaya yaz"""
+    extension = choose_export_format()
+    filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    count = export_rows(rows, filename)
+    print(f"Rapor kaydedildi: {filename} ({count} satır)")
+
+
 def show_revenue_summary():
     """Gelir özeti"""
     display_header("GELİR ÖZETİ")
@@ -587,7 +787,12 @@ def show_revenue_summary():
     start_date = input("Başlangıç tarihi (YYYY-MM-DD): ").strip()
     end_date = input("Bitiş tarihi (YYYY-MM-DD): ").strip()
     
-    summary = revenue_summary(bookings, (start_date, end_date))
+    try:
+        summary = revenue_summary(bookings, (start_date, end_date))
+    except ValueError:
+        print("Geçersiz tarih formatı! (YYYY-MM-DD)")
+        pause()
+        return
     
     print("\n" + "=" * 70)
     print(f"Dönem: {summary['period']['start']} - {summary['period']['end']}")
@@ -597,6 +802,10 @@ def show_revenue_summary():
     print(f"Toplam Bilet: {summary['total_tickets']}")
     print(f"Ortalama Bilet Fiyatı: ${summary['average_ticket_price']:.2f}")
     
+    export = input("\nGünlük dökümü dosyaya kaydet? (evet/hayır): ").strip().lower()
+    if export == 'evet':
+        export_report_rows(iter_revenue_rows(bookings, (start_date, end_date)), 'gelir_raporu')
+    
     pause()
 
 
@@ -640,6 +849,10 @@ def show_peak_days():
         print(f"   Bilet: {day['tickets']}")
         print(f"   Gelir: ${day['revenue']:.2f}\n")
     
+    export = input("Tüm günleri dosyaya kaydet? (evet/hayır): ").strip().lower()
+    if export == 'evet':
+        export_report_rows(iter_peak_day_rows(bookings), 'yogun_gunler')
+    
     pause()
 
 
@@ -692,7 +905,15 @@ def backup_data_menu():
     """Veri yedekleme"""
     display_header("VERİ YEDEKLEME")
     
-    backup_files = backup_state(DATA_DIR, BACKUP_DIR)
+    # Yedek diskteki dosyalardan alınır: bekleyen değişiklikler önce yazılır
+    flush_data()
+    
+    if STORAGE_BACKEND == 'sqlite':
+        backup_files = sqlite_storage.backup_state(DATA_DIR, BACKUP_DIR)
+    elif STORAGE_BACKEND == 'sharded':
+        backup_files = sharded_storage.backup_state(DATA_DIR, BACKUP_DIR)
+    else:
+        backup_files = backup_state(DATA_DIR, BACKUP_DIR)
     
     if backup_files:
         print("Yedekleme başarılı!")
@@ -716,6 +937,16 @@ def initialize_sample_data():
     
     movies_path = os.path.join(DATA_DIR, 'movies.json')
     
+    if STORAGE_BACKEND == 'sqlite':
+        if os.path.exists(sqlite_storage.db_path(DATA_DIR)):
+            return
+        
+        # SQLite ilk kez kullanılıyorsa mevcut JSON verilerini aktar
+        if os.path.exists(movies_path) and os.path.getsize(movies_path) > 0:
+            sqlite_storage.migrate_from_json(DATA_DIR)
+            print("JSON verileri SQLite veritabanına aktarıldı!")
+            return
+    
     if not os.path.exists(movies_path) or os.path.getsize(movies_path) == 0:
         # Örnek filmler
         sample_movies = [
@@ -752,7 +983,7 @@ def initialize_sample_data():
                 }
             }
             showtime = schedule_showtime(showtimes, showtime_data)
-            seat_maps[showtime['showtime_id']] = showtime['seat_map']
+            seat_maps[showtime['showtime_id']] = showtime.pop('seat_map')
         
         save_data()
         print("Örnek veriler oluşturuldu!")
@@ -762,6 +993,10 @@ def main():
     """Ana program"""
     print("Sinema Bilet Sistemi yükleniyor...")
     
+    # Profil çıkarma: CINEMA_PROFILE=1 veya --profile (bkz. profiling.py)
+    if profiling.ENABLED or '--profile' in sys.argv[1:]:
+        profiling.enable()
+    
     # Örnek veri oluştur
     initialize_sample_data()
     
@@ -781,7 +1016,7 @@ def main():
             backup_data_menu()
         elif choice == '5':
             print("\nSistemden çıkılıyor...")
-            save_data()
+            close_data()
             break
         else:
             print("Geçersiz seçim!")
@@ -0,0 +1,278 @@
+"""
+Ölçüm (metrics) modülü
+
+Sayaçlar (counter), göstergeler (gauge) ve sabit kovalı histogramlar
+tutulur ve Prometheus metin biçiminde dışa aktarılır: dosyaya düzenli
+olarak (TextfileExporter) veya sunucunun /metrics uç noktasından.
+
+Kayıt kilitsizdir: her iş parçacığı kendi hücresine yazar, toplama yalnızca
+dışa aktarımda yapılır. Hücre iş parçacığının ilk kaydında bir kez
+oluşturulur; bunun dışında sıcak yolda kilit alınmaz.
+
+Kullanım:
+    BOOKINGS = metrics.counter('cinema_bookings_total', "Rezervasyon sayısı")
+    BOOKINGS.inc()
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# Varsayılan gecikme kovaları (saniye)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Dışa aktarma aralığı (saniye)
+DEFAULT_FLUSH_INTERVAL = 15
+
+
+class _Cells:
+    """İş parçacığı başına değer hücreleri (kilitsiz kayıt, toplamda birleştirme)"""
+    
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+    
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._local.cell = [0] * self.size
+            with self._lock:
+                self._cells.append(cell)
+            return cell
+    
+    def total(self):
+        with self._lock:
+            cells = list(self._cells)
+        totals = [0] * self.size
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class Metric:
+    """Tüm ölçüm türlerinin ortak alanları"""
+    
+    kind = None
+    
+    def __init__(self, name, help_text, labels=None):
+        self.name = name
+        self.help = help_text
+        self.labels = dict(labels or {})
+    
+    def _label_text(self, extra=None):
+        labels = dict(self.labels, **(extra or {}))
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class Counter(Metric):
+    """Yalnızca artan sayaç"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, help_text, labels=None):
+        super().__init__(name, help_text, labels)
+        self._cells = _Cells(1)
+    
+    def inc(self, amount=1):
+        self._cells.cell()[0] += amount
+    
+    @property
+    def value(self):
+        return self._cells.total()[0]
+    
+    def samples(self):
+        yield self.name + self._label_text(), self.value
+
+
+class Gauge(Metric):
+    """Anlık değer (son yazılan değer geçerlidir)
+    
+    function verilirse değer dışa aktarımda bu fonksiyondan okunur.
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(self, name, help_text, labels=None):
+        super().__init__(name, help_text, labels)
+        self._value = 0
+        self.function = None
+    
+    def set(self, value):
+        self._value = value
+    
+    def set_function(self, function):
+        self.function = function
+    
+    @property
+    def value(self):
+        return self.function() if self.function else self._value
+    
+    def samples(self):
+        yield self.name + self._label_text(), self.value
+
+
+class Histogram(Metric):
+    """Sabit kovalı histogram (kovalar artan sırada üst sınırlardır)"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Hücre: kova sayıları (+Inf dahil), toplam, gözlem sayısı
+        self._cells = _Cells(len(self.buckets) + 3)
+    
+    def observe(self, value):
+        cell = self._cells.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+    
+    @property
+    def count(self):
+        return self._cells.total()[-1]
+    
+    def samples(self):
+        totals = self._cells.total()
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), totals):
+            cumulative += count
+            le = '+Inf' if bound == math.inf else repr(bound)
+            yield self.name + '_bucket' + self._label_text({'le': le}), cumulative
+        yield self.name + '_sum' + self._label_text(), totals[-2]
+        yield self.name + '_count' + self._label_text(), totals[-1]
+
+
+class Registry:
+    """Ölçümlerin kaydı: aynı ad ve etiketler için aynı nesne döner"""
+    
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def register(self, cls, name, help_text, labels=None, **kwargs):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, help_text, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Ölçüm farklı türde tanımlı: {name}")
+            return metric
+    
+    def render(self):
+        """Prometheus metin biçimi"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        
+        lines = []
+        previous = None
+        for metric in metrics:
+            if metric.name != previous:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                previous = metric.name
+            for sample, value in metric.samples():
+                lines.append(f"{sample} {_format(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labels=None):
+    return REGISTRY.register(Counter, name, help_text, labels)
+
+
+def gauge(name, help_text, labels=None):
+    return REGISTRY.register(Gauge, name, help_text, labels)
+
+
+def histogram(name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram, name, help_text, labels, buckets=buckets)
+
+
+def render():
+    return REGISTRY.render()
+
+
+def timed(metric):
+    """Fonksiyonun süresini histograma kaydeden dekoratör"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Ölçümleri dosyaya yaz (geçici dosya + yeniden adlandırma; okuyucu yarım dosya görmez)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    if isinstance(value, float):
+        if value == math.inf:
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+
+class TextfileExporter:
+    """Ölçümleri arka planda düzenli olarak dosyaya yazan iş parçacığı"""
+    
+    def __init__(self, path, interval=DEFAULT_FLUSH_INTERVAL, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def flush(self):
+        write_textfile(self.path, self.registry)
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        
+        def run():
+            while not self._stop.wait(self.interval):
+                self.flush()
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='metrics-export', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """İş parçacığını durdur ve son değerleri yaz"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
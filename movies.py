@@ -5,6 +5,9 @@ Film yönetimi ve seans planlama modülü
 import json
 import os
 import uuid
+from repository import find_record, filter_records
+from storage import save_json
+from validation import validate_date
 
 
 def load_movies(path):
@@ -17,10 +20,8 @@ def load_movies(path):
 
 
 def save_movies(path, movies):
-    """Filmleri JSON dosyasına kaydet"""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w') as f:
-        json.dump(movies, f, indent=2)
+    """Filmleri JSON dosyasına kaydet (geçici dosya + yeniden adlandırma)"""
+    save_json(path, movies)
 
 
 def add_movie(movies, movie_data):
@@ -40,15 +41,17 @@ def add_movie(movies, movie_data):
 
 def get_movie(movies, movie_id):
     """ID'ye göre film bul"""
-    for movie in movies:
-        if movie['movie_id'] == movie_id:
-            return movie
-    return None
+    return find_record(movies, 'movie_id', movie_id)
 
 
 def schedule_showtime(showtimes, showtime_data):
     """Yeni seans planla"""
-    from seating import initialize_seat_map
+    from seating import initialize_seat_map, get_screen_layout
+    
+    # Tarih, parçalı saklamada klasör adı olarak da kullanılır
+    date = showtime_data['date']
+    if not isinstance(date, str) or not validate_date(date):
+        raise ValueError(f"Geçersiz tarih formatı (YYYY-MM-DD): {date}")
     
     showtime = {
         'showtime_id': str(uuid.uuid4()),
@@ -63,8 +66,8 @@ def schedule_showtime(showtimes, showtime_data):
         })
     }
     
-    # Koltuk haritası oluştur (8 sıra x 12 koltuk)
-    showtime['seat_map'] = initialize_seat_map()
+    # Koltuk haritası oluştur (salonun oturma düzenine göre, varsayılan 8x12)
+    showtime['seat_map'] = initialize_seat_map(get_screen_layout(showtime['screen']))
     showtimes.append(showtime)
     return showtime
 
@@ -72,16 +75,13 @@ def schedule_showtime(showtimes, showtime_data):
 def list_showtimes(showtimes, movie_id=None):
     """Seansları listele"""
     if movie_id:
-        return [s for s in showtimes if s['movie_id'] == movie_id]
+        return filter_records(showtimes, 'movie_id', movie_id)
     return showtimes
 
 
 def get_showtime(showtimes, showtime_id):
     """ID'ye göre seans bul"""
-    for showtime in showtimes:
-        if showtime['showtime_id'] == showtime_id:
-            return showtime
-    return None
+    return find_record(showtimes, 'showtime_id', showtime_id)
 
 
 def list_active_movies(movies):
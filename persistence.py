@@ -0,0 +1,143 @@
+"""
+Arka plan kalıcılık (write-behind) modülü
+
+Veri değiştiren menü işlemleri diske kendileri yazmaz; yazıcıya bir kayıt
+isteği bırakır. Yazıcı iş parçacığı isteklerin durulmasını bekler
+(flush_interval saniye yeni istek gelmezse) ve art arda gelen istekleri
+tek bir kayıtta birleştirir. İstekler hiç durulmasa bile ilk bekleyen
+istekten en geç max_lag saniye sonra yazılır.
+
+flush() bir bariyerdir: çağrıdan önce bırakılan tüm istekleri kapsayan
+kayıt bitene kadar bekler (diskteki veriyi okuyacak işlemler için).
+stop() ve program çıkışı bekleyen istekleri son bir kayıtla yazar.
+"""
+
+import atexit
+import sys
+import threading
+import time
+
+
+# İsteklerin durulması için beklenen süre (saniye)
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+# İlk bekleyen istekten sonra kayda kadar geçebilecek en uzun süre (saniye)
+DEFAULT_MAX_LAG = 5.0
+
+
+class WriteBehind:
+    """İstekleri birleştirip save fonksiyonunu arka planda çağıran yazıcı"""
+    
+    def __init__(self, save, flush_interval=DEFAULT_FLUSH_INTERVAL, max_lag=DEFAULT_MAX_LAG):
+        self.save = save
+        self.flush_interval = flush_interval
+        self.max_lag = max_lag
+        self.requested = 0   # istek sayacı
+        self.saved = 0       # son tamamlanan kaydın kapsadığı istek sayısı
+        self.saves = 0       # yapılan kayıt sayısı
+        self.error = None    # son başarısız kaydın hatası
+        self._first = None   # ilk bekleyen isteğin zamanı
+        self._last = None    # son isteğin zamanı
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._stopping = False
+        self._thread = None
+    
+    @property
+    def pending(self):
+        """Henüz diske yazılmamış istek var mı"""
+        return self.requested > self.saved
+    
+    def request(self):
+        """Kayıt iste (hemen döner)"""
+        with self._cond:
+            now = time.monotonic()
+            self.requested += 1
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._cond.notify_all()
+    
+    def flush(self):
+        """Bu çağrıdan önceki istekler diske yazılana kadar bekle
+        
+        Kayıt çağıran iş parçacığında yapılır; yazıcı o sırada kayıttaysa
+        onun bitmesi beklenir. Kayıt başarısız olursa hata yükseltilir.
+        """
+        with self._cond:
+            target = self.requested
+        while self.saved < target:
+            self._save()
+    
+    def _save(self):
+        """Bekleyen tüm istekleri tek kayıtta yaz"""
+        with self._save_lock:
+            with self._cond:
+                covered = self.requested
+                if covered <= self.saved:
+                    return
+                # Kayıt sürerken gelen istekler bir sonraki kayda kalır
+                self._first = self._last = None
+            
+            try:
+                self.save()
+            except Exception as e:
+                with self._cond:
+                    self.error = e
+                    if self._first is None:
+                        self._first = self._last = time.monotonic()
+                    self._cond.notify_all()
+                raise
+            
+            with self._cond:
+                self.saved = covered
+                self.saves += 1
+                self.error = None
+                self._cond.notify_all()
+    
+    def _due(self):
+        """Bekleyen isteklerin yazılma zamanı"""
+        return min(self._last + self.flush_interval, self._first + self.max_lag)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not self.pending:
+                    self._cond.wait()
+                while not self._stopping and self.pending:
+                    if self._first is None:
+                        # Başka iş parçacığında kayıt sürüyor; bitince bildirilir
+                        self._cond.wait()
+                        continue
+                    remaining = self._due() - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            
+            try:
+                self._save()
+            except Exception as e:
+                # İstekler bekler; kayıt flush_interval sonra yeniden denenir
+                print(f"Uyarı: veriler kaydedilemedi: {e}", file=sys.stderr)
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        # Çıkışta (ör. Ctrl+C) bekleyen istekler kaybolmasın
+        atexit.register(self.stop)
+    
+    def stop(self):
+        """İş parçacığını durdur ve bekleyen istekleri yaz"""
+        if self._thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            self._thread.join()
+            self._thread = None
+            atexit.unregister(self.stop)
+        self.flush()
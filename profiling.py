@@ -0,0 +1,187 @@
+"""
+İsteğe bağlı profil çıkarma modülü
+
+CINEMA_PROFILE=1 ortam değişkeni veya --profile seçeneğiyle açılır.
+Açıkken main.py menü işlemleri, bookings ve reports fonksiyonları (ve
+sunucunun uç noktaları) cProfile ve tracemalloc ile sarılır; her işlem
+için profiles/ klasörüne bir pstats dosyası (.prof) ve en çok bellek
+ayıran satırların özeti (.txt) yazılır.
+
+Kapalıyken hiçbir fonksiyon sarılmaz; ek maliyet yoktur. İç içe veya
+eşzamanlı çağrılarda yalnızca en dıştaki işlemin profili çıkarılır
+(cProfile aynı anda tek profil çıkarıcıyla çalışır).
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+
+PROFILE_DIR = os.environ.get('CINEMA_PROFILE_DIR', 'profiles')
+ENABLED = os.environ.get('CINEMA_PROFILE', '') not in ('', '0')
+
+# Özet dosyasındaki satır sayıları
+TOP_ALLOCATIONS = 15
+TOP_FUNCTIONS = 25
+
+# Profili çıkarılan main.py işlemleri
+MAIN_ACTIONS = (
+    'load_data', 'save_data', 'view_movies', 'view_showtimes', 'book_tickets',
+    'view_customer_bookings', 'cancel_booking_menu', 'add_movie_menu',
+    'schedule_showtime_menu', 'view_all_showtimes', 'view_all_bookings',
+    'show_occupancy_report', 'show_revenue_summary', 'show_top_movies',
+    'show_peak_days', 'show_showtime_performance', 'backup_data_menu'
+)
+
+# Tüm genel fonksiyonları sarılan modüller
+FUNCTION_MODULES = ('bookings', 'reports')
+
+# Sarılan fonksiyonlara 'from x import y' ile başvuran modüller
+REFERENCING_MODULES = ('main', 'bookings', 'reports', 'booking_engine', 'server',
+                       'replay', 'movies', 'storage', 'sqlite_storage')
+
+_active = threading.Lock()   # Profili çıkarılan bir işlem varken tutulur
+_sequence = itertools.count(1)
+_originals = {}              # sarmalayıcı -> asıl fonksiyon
+
+
+def profile(func, name=None, directory=None):
+    """Fonksiyonu her çağrıda profili çıkarılacak şekilde sar"""
+    name = name or func.__name__
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # İç içe veya eşzamanlı çağrı: profil çıkarılmadan çalışır
+        if not _active.acquire(blocking=False):
+            return func(*args, **kwargs)
+        try:
+            return _run(func, name, directory or PROFILE_DIR, args, kwargs)
+        finally:
+            _active.release()
+    
+    _originals[wrapper] = func
+    return wrapper
+
+
+def _run(func, name, directory, args, kwargs):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if started:
+            tracemalloc.stop()
+        # Profil çıkarıcının kendi ayırdığı bellek özete girmez
+        ignore = (tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, tracemalloc.__file__))
+        allocations = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+        _write(directory, name, profiler, elapsed, peak, allocations)
+
+
+def _write(directory, name, profiler, elapsed, peak, allocations):
+    """İşlemin pstats dosyasını ve özetini yaz"""
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-"
+                                   f"{next(_sequence):04d}-{name}")
+    profiler.dump_stats(base + '.prof')
+    
+    stream = io.StringIO()
+    stream.write(f"İşlem: {name}\n")
+    stream.write(f"Süre: {elapsed * 1000:.3f} ms\n")
+    stream.write(f"En yüksek bellek: {peak / 1024:.1f} KiB\n\n")
+    
+    stream.write(f"En çok bellek ayıran {TOP_ALLOCATIONS} satır (işlem sonunda tutulan):\n")
+    for stat in allocations[:TOP_ALLOCATIONS]:
+        stream.write(f"  {stat}\n")
+    
+    stream.write(f"\nEn çok zaman alan {TOP_FUNCTIONS} fonksiyon (kümülatif):\n")
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(stream.getvalue())
+
+
+def _modules(module_name):
+    """Adı verilen yüklü modüller
+    
+    'python main.py' ile başlatılan program sys.modules'te '__main__'
+    adıyla kayıtlıdır; 'main' için o da döner.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        yield module
+    if module_name == 'main':
+        script = sys.modules.get('__main__')
+        path = getattr(script, '__file__', None) or ''
+        if script is not None and script is not module and os.path.basename(path) == 'main.py':
+            yield script
+
+
+def _targets():
+    """Sarılacak fonksiyonlar: (modül adı, ad, fonksiyon)"""
+    for main in _modules('main'):
+        for name in MAIN_ACTIONS:
+            yield 'main', name, getattr(main, name)
+    
+    for module_name in FUNCTION_MODULES:
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for name, value in list(vars(module).items()):
+            # Üreteçler sarılmaz: profil yalnızca üretecin oluşturulmasını ölçerdi
+            if (inspect.isfunction(value) and value.__module__ == module_name
+                    and not name.startswith('_') and not inspect.isgeneratorfunction(value)):
+                yield module_name, name, value
+
+
+def _rebind(replacements):
+    """Modüllerdeki fonksiyon başvurularını değiştir (asıl -> yeni)"""
+    for module_name in REFERENCING_MODULES:
+        for module in _modules(module_name):
+            for name, value in list(vars(module).items()):
+                if inspect.isfunction(value) and value in replacements:
+                    setattr(module, name, replacements[value])
+
+
+def enable(directory=None):
+    """Profil çıkarmayı aç (zaten açıksa bir şey yapmaz)"""
+    global ENABLED, PROFILE_DIR
+    if directory:
+        PROFILE_DIR = directory
+    ENABLED = True
+    
+    replacements = {}
+    for module_name, name, func in _targets():
+        if func in _originals or func in replacements:
+            continue
+        replacements[func] = profile(func, f"{module_name}.{name}")
+    _rebind(replacements)
+
+
+def disable():
+    """Profil çıkarmayı kapat ve asıl fonksiyonları geri yükle"""
+    global ENABLED
+    ENABLED = False
+    _rebind(dict(_originals))
+    _originals.clear()
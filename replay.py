@@ -0,0 +1,192 @@
+"""
+Etkileşimsiz JSONL işlem oynatıcı
+
+Rezervasyon, iptal ve seans planlama işlemlerini içeren bir JSON Lines
+dosyasını satır satır okuyup rezervasyon motoruna uygular. Toplu içe
+aktarma ve üretim trafiğini yeniden oynatmak için kullanılır.
+
+Kullanım:
+    python replay.py islemler.jsonl [--commit-every 1000] [--storage sqlite]
+
+Satır biçimleri ('ref' alanları dosya içi takma adlardır; üretilen ID'ler
+yerine kullanılabilir):
+    {"op": "movie", "ref": "m1", "title": "...", "genre": "...", "duration": 120, "rating": "PG"}
+    {"op": "schedule", "ref": "s1", "movie_ref": "m1", "date": "2025-01-20", "time": "18:00"}
+    {"op": "book", "ref": "b1", "showtime_ref": "s1", "seats": ["A1"],
+     "customer_name": "...", "customer_email": "..."}
+    {"op": "cancel", "booking_ref": "b1"}
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import main
+from movies import add_movie, schedule_showtime
+
+
+class LatencyStats:
+    """Gecikme istatistikleri (sabit boyutlu örneklemle, sınırlı bellek)"""
+    
+    def __init__(self, sample_size=100000, seed=0):
+        self.sample_size = sample_size
+        self.samples = []
+        self.count = 0
+        self._random = random.Random(seed)
+    
+    def add(self, seconds):
+        # Rezervuar örnekleme: her ölçümün örneklemde olma olasılığı eşittir
+        self.count += 1
+        if len(self.samples) < self.sample_size:
+            self.samples.append(seconds)
+        else:
+            i = self._random.randrange(self.count)
+            if i < self.sample_size:
+                self.samples[i] = seconds
+    
+    def percentile(self, p):
+        """Yüzdelik değer (saniye)"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class Replayer:
+    """İşlemleri rezervasyon motoruna uygulayan oynatıcı"""
+    
+    def __init__(self, commit_every=1000):
+        self.commit_every = commit_every
+        self.refs = {'movie': {}, 'showtime': {}, 'booking': {}}
+        self.latency = LatencyStats()
+        self.ok = 0
+        self.failed = 0
+        self.uncommitted = 0
+    
+    def _resolve(self, op, kind):
+        """ID veya dosya içi takma addan gerçek ID'yi bul"""
+        ref = op.get(f'{kind}_ref')
+        if ref is not None:
+            if ref not in self.refs[kind]:
+                raise ValueError(f"Bilinmeyen {kind} takma adı: {ref}")
+            return self.refs[kind][ref]
+        if f'{kind}_id' not in op:
+            raise ValueError(f"Eksik alan: {kind}_id")
+        return op[f'{kind}_id']
+    
+    def apply(self, op):
+        """Tek işlemi uygula"""
+        kind = op.get('op')
+        
+        if kind == 'book':
+            booking_data = dict(op, showtime_id=self._resolve(op, 'showtime'))
+            booking = main.engine.book(booking_data)
+            if 'ref' in op:
+                self.refs['booking'][op['ref']] = booking['booking_id']
+        
+        elif kind == 'cancel':
+            booking_id = self._resolve(op, 'booking')
+            if not main.engine.cancel(booking_id):
+                raise ValueError(f"Rezervasyon iptal edilemedi: {booking_id}")
+            # İptal edilen rezervasyonun takma adı artık gerekmez
+            self.refs['booking'].pop(op.get('booking_ref'), None)
+        
+        elif kind == 'schedule':
+            showtime = schedule_showtime(main.showtimes, dict(op, movie_id=self._resolve(op, 'movie')))
+            main.seat_maps[showtime['showtime_id']] = showtime.pop('seat_map')
+            if 'ref' in op:
+                self.refs['showtime'][op['ref']] = showtime['showtime_id']
+        
+        elif kind == 'movie':
+            movie = add_movie(main.movies, op)
+            if 'ref' in op:
+                self.refs['movie'][op['ref']] = movie['movie_id']
+        
+        else:
+            raise ValueError(f"Bilinmeyen işlem: {kind}")
+    
+    def run(self, lines, errors=None):
+        """Satırları sırayla oynat (dosya satır satır okunur)"""
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            
+            start = time.perf_counter()
+            try:
+                self.apply(json.loads(line))
+                self.ok += 1
+            except (ValueError, KeyError, TypeError) as e:
+                self.failed += 1
+                if errors:
+                    errors.write(f"Satır {line_no}: {e}\n")
+            self.latency.add(time.perf_counter() - start)
+            
+            self.uncommitted += 1
+            if self.commit_every and self.uncommitted >= self.commit_every:
+                self.commit()
+        
+        self.commit()
+    
+    def commit(self):
+        """Kontrol noktası al (filmler, seanslar, koltuklar, rezervasyonlar)"""
+        main.request_save()
+        main.flush_data()
+        self.uncommitted = 0
+    
+    def summary(self, elapsed):
+        total = self.ok + self.failed
+        return {
+            'operations': total,
+            'succeeded': self.ok,
+            'failed': self.failed,
+            'seconds': round(elapsed, 3),
+            'ops_per_second': round(total / elapsed, 1) if elapsed > 0 else 0.0,
+            'p50_ms': round(self.latency.percentile(50) * 1000, 3),
+            'p99_ms': round(self.latency.percentile(99) * 1000, 3)
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="JSONL işlem dosyasını oynat")
+    parser.add_argument('path', help="İşlem dosyası (JSON Lines, '-' standart girdi)")
+    parser.add_argument('--commit-every', type=int, default=1000,
+                        help="Kaç işlemde bir kontrol noktası alınacağı (0: yalnızca sonda)")
+    parser.add_argument('--data-dir', default=main.DATA_DIR, help="Veri klasörü")
+    parser.add_argument('--storage', choices=('json', 'sqlite', 'sharded'), default=main.STORAGE_BACKEND,
+                        help="Veri saklama türü")
+    parser.add_argument('--quiet', action='store_true', help="Hatalı satırları yazdırma")
+    return parser.parse_args(argv)
+
+
+def main_replay(argv=None):
+    """Oynatıcıyı çalıştır ve özet yazdır"""
+    args = parse_args(argv)
+    main.DATA_DIR = args.data_dir
+    main.STORAGE_BACKEND = args.storage
+    main.load_data()
+    
+    replayer = Replayer(commit_every=args.commit_every)
+    errors = None if args.quiet else sys.stderr
+    
+    start = time.perf_counter()
+    try:
+        if args.path == '-':
+            replayer.run(sys.stdin, errors)
+        else:
+            with open(args.path, 'r', encoding='utf-8') as f:
+                replayer.run(f, errors)
+    finally:
+        main.close_data(checkpoint=False)
+    summary = replayer.summary(time.perf_counter() - start)
+    
+    print(f"İşlem: {summary['operations']} (başarılı {summary['succeeded']}, "
+          f"hatalı {summary['failed']})")
+    print(f"Süre: {summary['seconds']} sn - {summary['ops_per_second']} işlem/sn")
+    print(f"Gecikme: p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms")
+    return summary
+
+
+if __name__ == "__main__":
+    main_replay()
@@ -2,24 +2,33 @@
 Raporlama modülü
 """
 
+import csv
+import gzip
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
-from seating import get_seat_count_by_status
+from seating import get_seat_count_by_status, get_zone_counts
+from repository import IndexedList, find_record, filter_records
+import analytics
+import metrics
 
 
-def occupancy_report(showtimes, seat_maps, bookings):
-    """Doluluk raporu oluştur"""
-    report = {
-        'showtimes': [],
-        'overall': {
-            'total_seats': 0,
-            'sold_seats': 0,
-            'occupancy_rate': 0.0
-        }
-    }
-    
-    total_capacity = 0
-    total_sold = 0
+# NumPy kuruluysa top_movies ve peak_days_analysis sütunlu analiz kullanır
+USE_NUMPY = analytics.HAS_NUMPY
+
+
+def _report_seconds(report):
+    return metrics.histogram('cinema_report_seconds', "Rapor hesaplama süresi (saniye)",
+                             {'report': report})
+
+
+def iter_occupancy_rows(showtimes, seat_maps):
+    """Seans doluluk satırlarını sırayla üret
     
+    Koltuk haritaları birer birer alınır; önbellekli haritalarla bellek
+    kullanımı seans sayısından bağımsızdır.
+    """
     for showtime in showtimes:
         showtime_id = showtime['showtime_id']
         seat_map = seat_maps.get(showtime_id)
@@ -34,7 +43,7 @@ def occupancy_report(showtimes, seat_maps, bookings):
         
         occupancy_rate = (sold / capacity * 100) if capacity > 0 else 0
         
-        showtime_report = {
+        yield {
             'showtime_id': showtime_id,
             'movie_id': showtime['movie_id'],
             'date': showtime['date'],
@@ -45,10 +54,27 @@ def occupancy_report(showtimes, seat_maps, bookings):
             'available': seat_counts.get('available', 0),
             'occupancy_rate': round(occupancy_rate, 2)
         }
-        
+
+
+@metrics.timed(_report_seconds('occupancy'))
+def occupancy_report(showtimes, seat_maps, bookings):
+    """Doluluk raporu oluştur"""
+    report = {
+        'showtimes': [],
+        'overall': {
+            'total_seats': 0,
+            'sold_seats': 0,
+            'occupancy_rate': 0.0
+        }
+    }
+    
+    total_capacity = 0
+    total_sold = 0
+    
+    for showtime_report in iter_occupancy_rows(showtimes, seat_maps):
         report['showtimes'].append(showtime_report)
-        total_capacity += capacity
-        total_sold += sold
+        total_capacity += showtime_report['capacity']
+        total_sold += showtime_report['sold']
     
     # Genel doluluk oranı
     if total_capacity > 0:
@@ -59,27 +85,112 @@ def occupancy_report(showtimes, seat_maps, bookings):
     return report
 
 
+class RevenueIndex:
+    """Günlük gelir kovaları ve önek toplamları
+    
+    Her gün için gelir (kuruş), bilet ve rezervasyon sayısı tutulur. İptal
+    edilmemiş rezervasyonlar eklenir; iptal edilenler düşülür. Önek toplamları
+    değişiklikten sonraki ilk sorguda yeniden hesaplanır; tarih aralığı
+    sorguları iki ikili arama (bisect) ile yanıtlanır.
+    
+    IndexedList.watch ile rezervasyon listesine bağlanır; eklenen ve
+    update_record ile iptal edilen rezervasyonlar otomatik yansır.
+    Güncellemeler eşzamanlı satışlardan, sorgular rapor isteklerinden
+    gelir; kovalar ve önek toplamları kilitle korunur.
+    """
+    
+    def __init__(self, bookings=()):
+        self._lock = threading.Lock()
+        self.clear()
+        for booking in bookings:
+            self.add(booking)
+    
+    def clear(self):
+        with self._lock:
+            self._days = []      # Sıralı günler ('YYYY-MM-DD' sözlük sırası = tarih sırası)
+            self._buckets = {}   # gün -> [gelir (kuruş), bilet, rezervasyon]
+            self._prefix = None  # Önek toplamları (değişiklikte geçersiz olur)
+    
+    def _apply(self, booking, sign):
+        if booking.get('status') == 'cancelled':
+            return
+        
+        day = booking['booking_date'][:10]
+        revenue = sign * round(booking['total'] * 100)
+        tickets = sign * len(booking['seats'])
+        with self._lock:
+            bucket = self._buckets.get(day)
+            if bucket is None:
+                bucket = self._buckets[day] = [0, 0, 0]
+                insort(self._days, day)
+            
+            bucket[0] += revenue
+            bucket[1] += tickets
+            bucket[2] += sign
+            self._prefix = None
+    
+    def add(self, booking):
+        self._apply(booking, 1)
+    
+    def discard(self, booking):
+        self._apply(booking, -1)
+    
+    def _prefix_sums(self):
+        # Kilit tutularak çağrılır
+        if self._prefix is None:
+            revenue, tickets, count = [0], [0], [0]
+            for day in self._days:
+                bucket = self._buckets[day]
+                revenue.append(revenue[-1] + bucket[0])
+                tickets.append(tickets[-1] + bucket[1])
+                count.append(count[-1] + bucket[2])
+            self._prefix = (revenue, tickets, count)
+        return self._prefix
+    
+    def iter_days(self, start_date=None, end_date=None):
+        """Aralıktaki günleri sırayla üret: (gün, gelir, bilet, rezervasyon)"""
+        # Satırlar kilit altında kopyalanır; üretim sırasında satışlar beklemez
+        with self._lock:
+            lo = 0 if start_date is None else bisect_left(self._days, start_date)
+            hi = len(self._days) if end_date is None else bisect_right(self._days, end_date)
+            rows = [(day, tuple(self._buckets[day])) for day in self._days[lo:hi]]
+        for day, (revenue, tickets, count) in rows:
+            if count:
+                yield day, revenue / 100, tickets, count
+    
+    def query(self, start_date, end_date):
+        """Tarih aralığındaki (dahil) gelir, bilet ve rezervasyon toplamları"""
+        with self._lock:
+            revenue, tickets, count = self._prefix_sums()
+            lo = bisect_left(self._days, start_date)
+            hi = bisect_right(self._days, end_date)
+        if hi <= lo:
+            return 0.0, 0, 0
+        return (revenue[hi] - revenue[lo]) / 100, tickets[hi] - tickets[lo], count[hi] - count[lo]
+
+
+def revenue_index(bookings):
+    """Rezervasyon listesinin gelir indeksini al
+    
+    IndexedList için indeks ilk kullanımda bağlanır ve sonra güncel tutulur;
+    düz listeler için her seferinde yeniden oluşturulur.
+    """
+    if isinstance(bookings, IndexedList):
+        return bookings.watcher(RevenueIndex)
+    return RevenueIndex(bookings)
+
+
+@metrics.timed(_report_seconds('revenue_summary'))
 def revenue_summary(bookings, period):
     """Gelir özeti oluştur"""
     start_date, end_date = period
     
-    # Dönemdeki rezervasyonları filtrele
-    period_bookings = []
-    for booking in bookings:
-        if booking['status'] == 'cancelled':
-            continue
-        
-        booking_date = datetime.strptime(booking['booking_date'].split()[0], '%Y-%m-%d')
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        if start <= booking_date <= end:
-            period_bookings.append(booking)
+    # Dönem sınırları bir kez doğrulanır ve sıralanabilir biçime getirilir
+    start = datetime.strptime(start_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d').strftime('%Y-%m-%d')
     
     # İstatistikleri hesapla
-    total_revenue = sum(b['total'] for b in period_bookings)
-    total_tickets = sum(len(b['seats']) for b in period_bookings)
-    total_bookings = len(period_bookings)
+    total_revenue, total_tickets, total_bookings = revenue_index(bookings).query(start, end)
     
     avg_ticket_price = total_revenue / total_tickets if total_tickets > 0 else 0
     
@@ -94,8 +205,29 @@ def revenue_summary(bookings, period):
     return summary
 
 
+def iter_revenue_rows(bookings, period=None):
+    """Günlük gelir satırlarını tarih sırasıyla üret"""
+    start = end = None
+    if period:
+        start = datetime.strptime(period[0], '%Y-%m-%d').strftime('%Y-%m-%d')
+        end = datetime.strptime(period[1], '%Y-%m-%d').strftime('%Y-%m-%d')
+    
+    for day, revenue, tickets, count in revenue_index(bookings).iter_days(start, end):
+        yield {'date': day, 'bookings': count, 'tickets': tickets, 'revenue': round(revenue, 2)}
+
+
+def iter_peak_day_rows(bookings, limit=None):
+    """Günleri gelire göre azalan sırayla üret (eşitlikte tarih sırası)"""
+    rows = sorted(iter_revenue_rows(bookings), key=lambda x: x['revenue'], reverse=True)
+    yield from rows[:limit]
+
+
+@metrics.timed(_report_seconds('top_movies'))
 def top_movies(bookings, showtimes, limit=5):
     """En çok gelir getiren filmleri bul"""
+    if USE_NUMPY:
+        return analytics.top_movies(analytics.booking_columns(bookings), showtimes, limit)
+    
     movie_stats = {}
     
     # Seans ID -> Film ID eşlemesi
@@ -133,8 +265,12 @@ def top_movies(bookings, showtimes, limit=5):
     return top_list[:limit]
 
 
+@metrics.timed(_report_seconds('peak_days'))
 def peak_days_analysis(bookings):
     """En yoğun günleri analiz et"""
+    if USE_NUMPY:
+        return analytics.peak_days_analysis(analytics.booking_columns(bookings))
+    
     day_stats = {}
     
     for booking in bookings:
@@ -168,14 +304,11 @@ def peak_days_analysis(bookings):
     }
 
 
+@metrics.timed(_report_seconds('showtime_performance'))
 def showtime_performance_report(showtimes, seat_maps, bookings, showtime_id):
     """Seans performans raporu"""
     # Seansı bul
-    showtime = None
-    for st in showtimes:
-        if st['showtime_id'] == showtime_id:
-            showtime = st
-            break
+    showtime = find_record(showtimes, 'showtime_id', showtime_id)
     
     if not showtime:
         return {'error': 'Seans bulunamadı'}
@@ -191,8 +324,8 @@ def showtime_performance_report(showtimes, seat_maps, bookings, showtime_id):
     occupancy_rate = (sold / capacity * 100) if capacity > 0 else 0
     
     # Rezervasyon bilgilerini al
-    showtime_bookings = [b for b in bookings 
-                        if b['showtime_id'] == showtime_id and b['status'] != 'cancelled']
+    showtime_bookings = [b for b in filter_records(bookings, 'showtime_id', showtime_id)
+                         if b['status'] != 'cancelled']
     
     total_revenue = sum(b['total'] for b in showtime_bookings)
     avg_booking_value = total_revenue / len(showtime_bookings) if showtime_bookings else 0
@@ -206,6 +339,7 @@ def showtime_performance_report(showtimes, seat_maps, bookings, showtime_id):
         'capacity': capacity,
         'seats_sold': sold,
         'occupancy_rate': round(occupancy_rate, 2),
+        'zones': get_zone_counts(seat_map),
         'total_bookings': len(showtime_bookings),
         'total_revenue': round(total_revenue, 2),
         'average_booking_value': round(avg_booking_value, 2)
@@ -214,7 +348,46 @@ def showtime_performance_report(showtimes, seat_maps, bookings, showtime_id):
 
 def export_report(report, filename):
     """Raporu dosyaya kaydet"""
-    import json
     with open(filename, 'w') as f:
         json.dump(report, f, indent=2)
     return filename
+
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+
+
+def export_rows(rows, filename, fmt=None):
+    """Rapor satırlarını üretildikçe dosyaya yaz (JSON Lines veya CSV)
+    
+    Satırlar bellekte toplanmaz. Biçim verilmezse dosya uzantısından
+    anlaşılır; '.gz' ile biten dosyalar gzip ile sıkıştırılır.
+    Yazılan satır sayısını döndürür.
+    """
+    base = filename[:-3] if filename.endswith('.gz') else filename
+    if fmt is None:
+        fmt = base.rsplit('.', 1)[-1].lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Desteklenmeyen dışa aktarma biçimi: {fmt}")
+    
+    if filename.endswith('.gz'):
+        f = gzip.open(filename, 'wt', encoding='utf-8', newline='')
+    else:
+        f = open(filename, 'w', encoding='utf-8', newline='')
+    
+    count = 0
+    with f:
+        if fmt == 'jsonl':
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+                count += 1
+        else:
+            writer = None
+            for row in rows:
+                if writer is None:
+                    # Sütunlar ilk satırdan alınır
+                    writer = csv.DictWriter(f, fieldnames=list(row), extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(row)
+                count += 1
+    return count
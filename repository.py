@@ -0,0 +1,269 @@
+"""
+İndeksli bellek içi veri deposu modülü
+
+Filmler, seanslar ve rezervasyonlar IndexedList içinde tutulur. IndexedList
+normal bir listedir (JSON'a aynen yazılır) ancak her değişiklikte birincil
+anahtar ve ikincil indeksleri günceller; böylece ID ile arama O(1) olur.
+
+Listeye bağlanan izleyiciler (add/discard/clear metotları olan nesneler,
+örn: reports.RevenueIndex) eklenen ve çıkarılan kayıtlardan haberdar edilir.
+Kayıt yerinde değiştirilecekse update_record kullanılmalıdır.
+
+Değişiklikler ve izleyici bildirimleri listenin kilidi (lock) tutularak
+yapılır: eşzamanlı satışlar (BookingEngine.book) indeksleri ve
+izleyicilerin durumunu bozmaz. İzleyiciler sorgularını kendi kilitleriyle
+korur.
+
+Her değişiklikte listenin version damgası yenilenir; kaydedilen damgayla
+karşılaştırılarak listenin son kayıttan beri değişip değişmediği anlaşılır
+(bkz. main.save_data).
+"""
+
+import itertools
+import threading
+
+
+# Değişiklik damgaları: tüm listeler için artan tek sayaç (next() atomiktir,
+# eşzamanlı değişikliklerde aynı damga iki kez verilmez)
+_stamps = itertools.count(1)
+
+
+class IndexedList(list):
+    """Birincil anahtar ve ikincil (grup) indekslerini güncel tutan liste
+    
+    key: birincil anahtar alanı (örn: 'booking_id')
+    groups: ikincil indeks alanları (örn: ('customer_email', 'showtime_id'))
+    """
+    
+    def __init__(self, items=(), key=None, groups=()):
+        super().__init__(items)
+        self.key = key
+        self.groups = tuple(groups)
+        self.watchers = []
+        # İç içe çağrılar olur (örn: clear -> _rebuild)
+        self.lock = threading.RLock()
+        self._rebuild()
+    
+    def _rebuild(self):
+        self.version = next(_stamps)
+        self._index = {}
+        self._groups = {field: {} for field in self.groups}
+        for watcher in self.watchers:
+            watcher.clear()
+        for item in self:
+            self._add(item)
+    
+    def _add(self, item):
+        if self.key:
+            self._index[item[self.key]] = item
+        for field, index in self._groups.items():
+            index.setdefault(item.get(field), []).append(item)
+        for watcher in self.watchers:
+            watcher.add(item)
+    
+    def _discard(self, item):
+        for watcher in self.watchers:
+            watcher.discard(item)
+        if self.key:
+            value = item[self.key]
+            if self._index.get(value) is item:
+                del self._index[value]
+        for field, index in self._groups.items():
+            value = item.get(field)
+            members = index.get(value)
+            if members:
+                for i, member in enumerate(members):
+                    if member is item:
+                        del members[i]
+                        break
+                if not members:
+                    del index[value]
+    
+    # Sorgular
+    
+    def find(self, value):
+        """Birincil anahtara göre kayıt bul (O(1))"""
+        return self._index.get(value)
+    
+    def group(self, field, value):
+        """İkincil indeksteki kayıtları al (eklenme sırasıyla)"""
+        return list(self._groups[field].get(value, ()))
+    
+    def watch(self, watcher):
+        """İzleyici bağla (mevcut kayıtlar hemen eklenir)"""
+        with self.lock:
+            for item in self:
+                watcher.add(item)
+            self.watchers.append(watcher)
+        return watcher
+    
+    def watcher(self, cls):
+        """cls türündeki izleyiciyi al; yoksa oluşturup bağla"""
+        with self.lock:
+            for watcher in self.watchers:
+                if isinstance(watcher, cls):
+                    return watcher
+            return self.watch(cls())
+    
+    # Liste değişiklikleri
+    
+    def append(self, item):
+        with self.lock:
+            super().append(item)
+            self.version = next(_stamps)
+            self._add(item)
+    
+    def extend(self, items):
+        items = list(items)
+        with self.lock:
+            super().extend(items)
+            self.version = next(_stamps)
+            for item in items:
+                self._add(item)
+    
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+    
+    def insert(self, position, item):
+        with self.lock:
+            super().insert(position, item)
+            # Araya ekleme indekslerin ve izleyicilerin liste sırasını bozar
+            if self[-1] is item:
+                self.version = next(_stamps)
+                self._add(item)
+            else:
+                self._rebuild()
+    
+    def remove(self, item):
+        with self.lock:
+            super().remove(item)
+            self.version = next(_stamps)
+            self._discard(item)
+    
+    def pop(self, position=-1):
+        with self.lock:
+            item = super().pop(position)
+            self.version = next(_stamps)
+            self._discard(item)
+        return item
+    
+    def clear(self):
+        with self.lock:
+            super().clear()
+            self._rebuild()
+    
+    def __setitem__(self, position, value):
+        with self.lock:
+            super().__setitem__(position, value)
+            self._rebuild()
+    
+    def __delitem__(self, position):
+        with self.lock:
+            super().__delitem__(position)
+            self._rebuild()
+    
+    def sort(self, *args, **kwargs):
+        with self.lock:
+            super().sort(*args, **kwargs)
+            self._rebuild()
+    
+    def reverse(self):
+        with self.lock:
+            super().reverse()
+            self._rebuild()
+
+
+class ChangedRecords:
+    """Son take() çağrısından beri eklenen, güncellenen veya çıkarılan kayıtlar
+    
+    IndexedList izleyicisidir. Kayıtlar kimlikleriyle (id) tutulur;
+    update_record (çıkar + ekle) kaydı değişmiş sayar. Bağlanırken
+    eklenen mevcut kayıtlar take() ile atılabilir.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        with self._lock:
+            self._changed = {}
+            self._removed = {}
+    
+    def add(self, item):
+        with self._lock:
+            self._changed[id(item)] = item
+            self._removed.pop(id(item), None)
+    
+    def discard(self, item):
+        with self._lock:
+            self._changed.pop(id(item), None)
+            self._removed[id(item)] = item
+    
+    def take(self):
+        """Biriken değişiklikleri al ve sıfırla: (değişen kayıtlar, çıkarılan kayıtlar)"""
+        with self._lock:
+            changed, removed = list(self._changed.values()), list(self._removed.values())
+            self._changed, self._removed = {}, {}
+        return changed, removed
+    
+    def restore(self, changed, removed):
+        """Yazılamayan değişiklikleri geri koy (sonradan gelenler geçerlidir)"""
+        with self._lock:
+            for item in changed:
+                if id(item) not in self._removed:
+                    self._changed.setdefault(id(item), item)
+            for item in removed:
+                if id(item) not in self._changed:
+                    self._removed.setdefault(id(item), item)
+
+
+class Repository:
+    """Film, seans ve rezervasyon listelerini indeksli olarak tutan depo"""
+    
+    def __init__(self, movies=(), showtimes=(), bookings=()):
+        self.movies = IndexedList(movies, key='movie_id')
+        self.showtimes = IndexedList(showtimes, key='showtime_id', groups=('movie_id',))
+        self.bookings = IndexedList(bookings, key='booking_id',
+                                    groups=('customer_email', 'showtime_id'))
+
+
+def find_record(records, field, value):
+    """Alana göre tek kayıt bul (indeks varsa O(1), yoksa doğrusal arama)"""
+    if isinstance(records, IndexedList) and records.key == field:
+        return records.find(value)
+    
+    for record in records:
+        if record[field] == value:
+            return record
+    return None
+
+
+def update_record(records, record, changes):
+    """Kaydı yerinde güncelle ve listenin izleyicilerini haberdar et
+    
+    İndekslenen alanlar (birincil anahtar, grup alanları) bu yolla
+    değiştirilmemelidir.
+    """
+    if not isinstance(records, IndexedList):
+        record.update(changes)
+        return record
+    
+    with records.lock:
+        for watcher in records.watchers:
+            watcher.discard(record)
+        record.update(changes)
+        # Damga değişiklikten sonra alınır: arada başlayan kayıt değişikliği kaçırmaz
+        records.version = next(_stamps)
+        for watcher in records.watchers:
+            watcher.add(record)
+    return record
+
+
+def filter_records(records, field, value):
+    """Alanı verilen değere eşit kayıtları listele"""
+    if isinstance(records, IndexedList) and field in records.groups:
+        return records.group(field, value)
+    
+    return [record for record in records if record[field] == value]
@@ -0,0 +1,212 @@
+"""
+Koltuk durumu yayını (server push) modülü
+
+Büyük galalarda yüzlerce istemcinin aynı seansın koltuk haritasını
+yoklaması yerine sunucu değişiklikleri açık bağlantılardan iletir:
+Server-Sent Events (text/event-stream) veya satır başına bir JSON
+(application/x-ndjson). Bkz. server.py, GET /showtimes/<id>/stream.
+
+Değişiklikler set_seat_status'tan gelir; rezervasyon (reserve_seat),
+iptal (release_seat) ve süresi dolan tutmalar aynı yoldan geçer. Haritaya
+eklenen izleyici hangi iş parçacığında çağrılırsa çağrılsın olay
+döngüsüne tek bir uyandırma bırakır; art arda gelen değişiklikler bu
+uyandırmada birleşir.
+
+Abonelere ayrı kuyruk tutulmaz. Ortak tampon haritanın kendi değişiklik
+halkasıdır (seating.CHANGE_LOG_SIZE): her abone yalnızca son gönderdiği
+sürümü tutar ve yazabildiği anda changes_since ile farkı alır. Aynı
+sürümdeki abonelere giden olay bir kez üretilir. Gönderim tamponu dolan
+yavaş istemci beklerken halka ilerler; sürümü halkadan düşmüşse tam
+görüntüyle (snapshot olayı) yeniden eşitlenir. Bellek, abone sayısı ve
+hızından bağımsız olarak sınırlı kalır. Gönderim tamponu DRAIN_TIMEOUT
+saniye boşalmayan istemcinin bağlantısı kapatılır.
+
+Olaylar:
+    snapshot  {"version", "layout", "snapshot", "showtime_id"}   tam görüntü
+    changes   {"version", "changes", "showtime_id"}              fark
+"""
+
+import asyncio
+import json
+import metrics
+from seating import changes_since
+
+
+SSE, NDJSON = 'sse', 'ndjson'
+CONTENT_TYPES = {
+    SSE: 'text/event-stream; charset=utf-8',
+    NDJSON: 'application/x-ndjson; charset=utf-8',
+}
+
+# Değişiklik olmadığında bağlantının canlı tutulma aralığı (saniye)
+HEARTBEAT_INTERVAL = 15
+
+# Abone başına gönderim tamponu üst sınırı (bayt)
+WRITE_BUFFER_LIMIT = 64 * 1024
+
+# Gönderim tamponunun boşalması için beklenen en uzun süre (saniye)
+DRAIN_TIMEOUT = 30
+
+_HEARTBEATS = {SSE: b': heartbeat\n\n', NDJSON: b'{"event":"heartbeat"}\n'}
+
+RESYNCS = metrics.counter('cinema_stream_resyncs_total',
+                          "Geride kaldığı için tam görüntü gönderilen abone sayısı")
+DROPPED = metrics.counter('cinema_stream_dropped_total',
+                          "Gönderim tamponu boşalmadığı için kapatılan abone bağlantısı sayısı")
+SUBSCRIBERS = metrics.gauge('cinema_stream_subscribers', "Açık koltuk yayını bağlantısı sayısı")
+
+
+def encode_event(kind, data, fmt):
+    """Olayı biçime göre baytlara çevir"""
+    if fmt == SSE:
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        # Olay kimliği sürümdür: istemci yeniden bağlanırken ?since= olarak gönderir
+        return f"id: {data['version']}\nevent: {kind}\ndata: {payload}\n\n".encode('utf-8')
+    payload = json.dumps(dict(data, event=kind), ensure_ascii=False, separators=(',', ':'))
+    return payload.encode('utf-8') + b'\n'
+
+
+class SeatFeed:
+    """Tek seansın değişiklik bildirimi ve paylaşılan olay önbelleği"""
+    
+    def __init__(self, showtime_id, seat_map, loop):
+        self.showtime_id = showtime_id
+        self.seat_map = seat_map
+        self.loop = loop
+        self.subscribers = 0
+        self._event = asyncio.Event()
+        self._scheduled = False
+        # (abonenin sürümü, biçim) -> (yeni sürüm, olay türü, olay baytları)
+        self._events = {}
+        self._events_version = None
+    
+    def notify(self, seat_map):
+        """Koltuk değişikliğinde çağrılır (herhangi bir iş parçacığı, harita kilidi tutulurken)"""
+        if self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            self.loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            pass   # Olay döngüsü kapanmış; abone kalmamıştır
+    
+    def _wake(self):
+        # Bayrak abonelerden önce indirilir: sonraki değişiklik yeni uyandırma bırakır
+        self._scheduled = False
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+    
+    async def wait(self, version, timeout):
+        """Harita version sürümünden ilerleyene kadar bekle (zaman aşımında False)"""
+        event = self._event
+        if self.seat_map.version != version:
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+    
+    def next_event(self, version, fmt):
+        """version sürümündeki aboneye gidecek olay: (yeni sürüm, tür, baytlar)
+        
+        Aynı sürümde bekleyen aboneler aynı baytları alır; fark ve JSON
+        kodlaması harita her değiştiğinde sürüm başına bir kez yapılır.
+        version None ise tam görüntü, değişiklik yoksa tür ve baytlar None döner.
+        """
+        current = self.seat_map.version
+        if current != self._events_version:
+            self._events.clear()
+            self._events_version = current
+        
+        key = (version, fmt)
+        cached = self._events.get(key)
+        if cached is not None:
+            return cached
+        
+        delta = changes_since(self.seat_map, -1 if version is None else version)
+        if 'snapshot' in delta:
+            kind = 'snapshot'
+        elif delta['version'] == version:
+            cached = self._events[key] = (version, None, None)
+            return cached
+        else:
+            kind = 'changes'
+        delta['showtime_id'] = self.showtime_id
+        cached = self._events[key] = (delta['version'], kind, encode_event(kind, delta, fmt))
+        return cached
+
+
+class SeatStreams:
+    """Olay döngüsündeki açık yayınlar: seans ID -> SeatFeed
+    
+    İzleyici yalnızca abonesi olan haritalara eklenir; son abone
+    ayrıldığında kaldırılır. Abone haritaya güçlü başvuru tuttuğu için
+    harita önbellekten çıkarılsa da aynı nesne kullanılmaya devam eder.
+    """
+    
+    def __init__(self):
+        self.feeds = {}
+        SUBSCRIBERS.set_function(self.subscriber_count)
+    
+    def subscriber_count(self):
+        return sum(feed.subscribers for feed in list(self.feeds.values()))
+    
+    def subscribe(self, showtime_id, seat_map):
+        feed = self.feeds.get(showtime_id)
+        if feed is None or feed.seat_map is not seat_map:
+            feed = self.feeds[showtime_id] = SeatFeed(showtime_id, seat_map,
+                                                      asyncio.get_running_loop())
+            with seat_map.lock:
+                seat_map.watchers = (seat_map.watchers or ()) + (feed.notify,)
+        feed.subscribers += 1
+        return feed
+    
+    def unsubscribe(self, feed):
+        feed.subscribers -= 1
+        if feed.subscribers:
+            return
+        seat_map = feed.seat_map
+        with seat_map.lock:
+            watchers = tuple(notify for notify in seat_map.watchers or ()
+                             if notify != feed.notify)
+            seat_map.watchers = watchers or None
+        if self.feeds.get(feed.showtime_id) is feed:
+            del self.feeds[feed.showtime_id]
+    
+    async def stream(self, writer, showtime_id, seat_map, fmt, since=None):
+        """Bağlantı kapanana kadar olayları gönder (yanıt başlığı yazılmış olmalı)
+        
+        since verilmezse önce tam görüntü gönderilir. Her olaydan sonra
+        gönderim tamponunun boşalması beklenir; bu sırada gelen değişiklikler
+        yalnızca haritanın halka tamponunda birikir.
+        """
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_LIMIT)
+        feed = self.subscribe(showtime_id, seat_map)
+        version = since
+        try:
+            while not writer.is_closing():
+                sent, kind, data = feed.next_event(version, fmt)
+                if kind == 'snapshot' and version is not None:
+                    RESYNCS.inc()
+                version = sent
+                if data is not None and not await _send(writer, data):
+                    return
+                if not await feed.wait(version, HEARTBEAT_INTERVAL):
+                    if not await _send(writer, _HEARTBEATS[fmt]):
+                        return
+        except ConnectionError:
+            pass
+        finally:
+            self.unsubscribe(feed)
+
+
+async def _send(writer, data):
+    """Yaz ve gönderim tamponunun boşalmasını bekle (boşalmazsa False)"""
+    writer.write(data)
+    try:
+        await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        DROPPED.inc()
+        return False
+    return True
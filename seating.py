@@ -2,72 +2,566 @@
 Koltuk haritası yönetimi modülü
 """
 
+import threading
+import time
+from array import array
+from collections.abc import Mapping
 
-def initialize_seat_map():
-    """Koltuk haritası oluştur (8 sıra x 12 koltuk)"""
-    rows = 8
-    seats_per_row = 12
-    premium_rows = ['A', 'B']  # A ve B sıraları premium
-    
-    row_labels = [chr(65 + i) for i in range(rows)]  # A, B, C, ...
-    
-    seat_map = {
-        'config': {
-            'rows': rows,
-            'seats_per_row': seats_per_row,
-            'premium_rows': premium_rows
-        },
-        'seats': {}
+
+# Koltuk durumları (bytearray içinde bu kodlarla tutulur)
+STATUSES = ('available', 'sold', 'held')
+STATUS_CODES = {name: code for code, name in enumerate(STATUSES)}
+AVAILABLE = STATUS_CODES['available']
+SOLD = STATUS_CODES['sold']
+HELD = STATUS_CODES['held']
+
+# Diskteki kompakt kodlama: her koltuk için tek karakter ('0' müsait, '1' dolu).
+# Tutulan (held) koltuklar geçicidir; diske müsait olarak yazılır.
+_ENCODE = bytes.maketrans(bytes([AVAILABLE, SOLD, HELD]), b'010')
+_DECODE = bytes.maketrans(b'01', bytes([AVAILABLE, SOLD]))
+
+# İstemcilere gönderilen tam görüntü: '0' müsait, '1' dolu, '2' tutuldu
+_SNAPSHOT = bytes.maketrans(bytes([AVAILABLE, SOLD, HELD]), b'012')
+
+# Harita başına tutulan son koltuk değişikliği sayısı (bkz. changes_since)
+CHANGE_LOG_SIZE = 256
+
+# Yüklenen haritanın sürümü en az (yükleme anı, saniye) << EPOCH_BITS olur:
+# çökmeden önce verilip diske yazılamamış sürümler yeniden kullanılmaz
+EPOCH_BITS = 20
+
+DEFAULT_SCREEN_LAYOUT = {
+    'layout_id': '8x12-AB',
+    'rows': 8,
+    'seats_per_row': 12,
+    'premium_rows': ['A', 'B']  # A ve B sıraları premium
+}
+
+# Salon düzenleri (düzen ID -> Layout) ve salon adı -> düzen ID eşlemesi
+_layouts = {}
+_screen_layouts = {}
+
+
+class Layout:
+    """Salon oturma düzeni
+    
+    Koltuk sırası, bölgeler, koordinatlar ve koltuk kodu -> indeks tablosu
+    bir kez hesaplanır. Düzen değiştirilemez; aynı salondaki tüm seanslar
+    aynı Layout nesnesini paylaşır ve yalnızca koltuk durumlarını tutar.
+    
+    Tanım alanları:
+    - rows, seats_per_row: ızgara boyutu
+    - premium_rows: premium bölgedeki sıralar
+    - aisles: koridorlar (bu numaralı koltuktan sonra boşluk, örn: [4, 8])
+    - gaps: ızgarada bulunmayan koltuklar (örn: ['A1', 'A12'])
+    - accessible: engelli erişimine uygun koltuklar
+    """
+    
+    __slots__ = ('layout_id', 'definition', 'codes', 'index', 'zones', 'rows', 'numbers',
+                 'coords', 'accessible', 'row_labels', 'row_ranges', 'row_zones',
+                 'column_numbers', 'row_positions', 'zone_capacity')
+    
+    def __init__(self, definition):
+        definition = normalize_layout(definition)
+        rows = definition['rows']
+        seats_per_row = definition['seats_per_row']
+        premium_rows = set(definition['premium_rows'])
+        aisles = definition['aisles']
+        gaps = set(definition['gaps'])
+        
+        row_labels = tuple(chr(65 + i) for i in range(rows))  # A, B, C, ...
+        
+        # Kolon numaraları (koridorlar None)
+        column_numbers = []
+        for number in range(1, seats_per_row + 1):
+            column_numbers.append(number)
+            if number in aisles and number < seats_per_row:
+                column_numbers.append(None)
+        
+        codes, zones, seat_rows, numbers, coords, row_ranges = [], [], [], [], [], []
+        for y, row in enumerate(row_labels):
+            start = len(codes)
+            for x, number in enumerate(column_numbers):
+                if number is None:
+                    continue
+                seat_code = f"{row}{number}"
+                if seat_code in gaps:
+                    continue
+                codes.append(seat_code)
+                zones.append('premium' if row in premium_rows else 'standard')
+                seat_rows.append(row)
+                numbers.append(number)
+                coords.append((x, y))
+            row_ranges.append((start, len(codes)))
+        
+        _set = object.__setattr__
+        _set(self, 'layout_id', definition['layout_id'])
+        _set(self, 'definition', definition)
+        _set(self, 'codes', tuple(codes))
+        _set(self, 'index', {code: i for i, code in enumerate(codes)})
+        _set(self, 'zones', tuple(zones))
+        _set(self, 'rows', tuple(seat_rows))
+        _set(self, 'numbers', tuple(numbers))
+        _set(self, 'coords', tuple(coords))
+        _set(self, 'accessible', frozenset(definition['accessible']))
+        _set(self, 'row_labels', row_labels)
+        _set(self, 'row_ranges', tuple(row_ranges))
+        _set(self, 'row_zones', tuple('premium' if row in premium_rows else 'standard'
+                                      for row in row_labels))
+        _set(self, 'column_numbers', tuple(column_numbers))
+        # Her sıra için ızgara kolonu (x) -> koltuk indeksi
+        _set(self, 'row_positions', tuple({coords[i][0]: i for i in range(start, end)}
+                                          for start, end in row_ranges))
+        zone_capacity = {}
+        for zone in zones:
+            zone_capacity[zone] = zone_capacity.get(zone, 0) + 1
+        _set(self, 'zone_capacity', zone_capacity)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Salon düzeni değiştirilemez")
+    
+    @property
+    def config(self):
+        """Düzen tanımının kopyası (eski seat_map['config'] biçimi)"""
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in self.definition.items()}
+    
+    @property
+    def capacity(self):
+        return len(self.codes)
+    
+    def __repr__(self):
+        return f"Layout({self.layout_id!r}, {self.capacity} koltuk)"
+
+
+def normalize_layout(definition):
+    """Düzen tanımını varsayılan alanlarla tamamla"""
+    premium_rows = list(definition.get('premium_rows', []))
+    layout_id = definition.get('layout_id')
+    if not layout_id:
+        layout_id = f"{definition['rows']}x{definition['seats_per_row']}"
+        if premium_rows:
+            layout_id += '-' + ''.join(premium_rows)
+    
+    return {
+        'layout_id': layout_id,
+        'rows': int(definition['rows']),
+        'seats_per_row': int(definition['seats_per_row']),
+        'premium_rows': premium_rows,
+        'aisles': sorted(definition.get('aisles', [])),
+        'gaps': sorted(definition.get('gaps', [])),
+        'accessible': sorted(definition.get('accessible', []))
     }
+
+
+def define_layout(definition):
+    """Salon düzeni tanımla (aynı ID için aynı nesne döner)"""
+    definition = normalize_layout(definition)
+    layout = _layouts.get(definition['layout_id'])
     
-    for row in row_labels:
-        for seat_num in range(1, seats_per_row + 1):
-            seat_code = f"{row}{seat_num}"
-            seat_map['seats'][seat_code] = {
-                'status': 'available',
-                'zone': 'premium' if row in premium_rows else 'standard',
-                'row': row,
-                'number': seat_num
-            }
+    if layout is not None:
+        if layout.definition != definition:
+            raise ValueError(f"Salon düzeni zaten farklı tanımlı: {definition['layout_id']}")
+        return layout
+    
+    layout = Layout(definition)
+    _layouts[layout.layout_id] = layout
+    return layout
+
+
+def get_layout(layout_id):
+    """ID'ye göre salon düzeni bul"""
+    layout = _layouts.get(layout_id)
+    if layout is None:
+        raise ValueError(f"Salon düzeni bulunamadı: {layout_id}")
+    return layout
+
+
+def register_screen(screen, layout):
+    """Salonu bir oturma düzenine bağla"""
+    if not isinstance(layout, Layout):
+        layout = define_layout(layout)
+    _screen_layouts[screen] = layout.layout_id
+    return layout
+
+
+def get_screen_layout(screen):
+    """Salonun oturma düzenini al (tanımlı değilse varsayılan 8x12)"""
+    layout_id = _screen_layouts.get(screen)
+    if layout_id is None:
+        return DEFAULT_LAYOUT
+    return _layouts[layout_id]
+
+
+def export_layouts(layout_ids=None):
+    """Düzenleri ve salon eşlemesini JSON'a yazılabilir biçimde al"""
+    if layout_ids is None:
+        layout_ids = list(_layouts)
+    layout_ids = set(layout_ids) | set(_screen_layouts.values())
+    
+    return {
+        'layouts': [_layouts[layout_id].config for layout_id in sorted(layout_ids)],
+        'screens': dict(_screen_layouts)
+    }
+
+
+def import_layouts(data):
+    """Kaydedilmiş düzenleri ve salon eşlemesini yükle"""
+    for definition in data.get('layouts', []):
+        define_layout(definition)
+    for screen, layout_id in data.get('screens', {}).items():
+        register_screen(screen, get_layout(layout_id))
+
+
+DEFAULT_LAYOUT = define_layout(DEFAULT_SCREEN_LAYOUT)
+
+
+class SeatMap:
+    """Kompakt koltuk haritası
+    
+    Koltuk durumları koltuk başına bir bayt olarak bytearray içinde tutulur;
+    sabit düzen bilgisi paylaşılan Layout nesnesindedir. Eski sözlük biçimi
+    de desteklenir: seat_map['config'] ve seat_map['seats'][koltuk_kodu]['status']
+    gibi erişimler çalışmaya devam eder.
+    
+    Her haritanın kendi kilidi (lock) vardır; aynı seansın koltuklarını
+    değiştiren işlemler bu kilidi tutar, farklı seanslar birbirini beklemez.
+    
+    Koltuk durumları yalnızca set_seat_status ile değiştirilir; böylece
+    türetilmiş yapılar (bölge sayaçları, sıra bazında boş koltuk maskeleri)
+    güncel kalır.
+    
+    Her değişiklik sürümü (version) bir artırır ve CHANGE_LOG_SIZE
+    kayıtlık halka tampona (changes) yazılır; istemciler yalnızca son
+    bildikleri sürümden sonraki farkı alır (bkz. changes_since).
+    İzleyiciler (watchers) her değişiklikten sonra harita kilidi tutulurken
+    çağrılır (bkz. seat_stream.py); hızlı dönmeleri gerekir.
+    """
+    
+    __slots__ = ('layout', 'status', 'dirty', 'lock', 'holds', 'free', 'counts',
+                 'version', 'logged_from', 'changes', 'watchers', '__weakref__')
+    
+    def __init__(self, layout, status=None, counts=None, version=0):
+        self.layout = layout
+        self.lock = threading.RLock()
+        # Geçici tutmalar: tutma ID -> {'seats': [...], 'expires_at': zaman}
+        self.holds = {}
+        # Sıra başına boş koltuk bit maskesi (ilk otomatik seçimde oluşturulur)
+        self.free = None
+        # Yeni oluşturulan harita henüz diske yazılmamıştır
+        self.dirty = status is None
+        if status is None:
+            status = bytearray(layout.capacity)
+        self.status = status
+        # Bölge -> durum koduna göre koltuk sayıları ([müsait, dolu, tutuldu])
+        if counts is None:
+            counts = _count_zones(layout, status)
+        self.counts = counts
+        self.version = version
+        # Günlükteki ilk sürüm (bu nesnede yapılan ilk değişiklik)
+        self.logged_from = version + 1
+        # Halka tampon: sürüm % boyut -> koltuk sırası << 2 | yeni durum.
+        # Harita başına 1 KiB; ilk değişiklikte oluşturulur.
+        self.changes = None
+        # Değişiklik bildirimi alan fonksiyonlar (demet) veya None
+        self.watchers = None
+    
+    @property
+    def config(self):
+        return self.layout.config
+    
+    def __getitem__(self, key):
+        if key == 'config':
+            return self.config
+        if key == 'seats':
+            return SeatsView(self)
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return key in ('config', 'seats')
+    
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+    
+    def keys(self):
+        return ['config', 'seats']
+    
+    def __repr__(self):
+        return f"SeatMap({self.layout.layout_id!r}, {get_seat_count_by_status(self)!r})"
+
+
+class SeatsView(Mapping):
+    """seat_map['seats'] için sözlük görünümü (koltuk kodu -> koltuk bilgisi)"""
+    
+    __slots__ = ('seat_map',)
+    
+    def __init__(self, seat_map):
+        self.seat_map = seat_map
+    
+    def __getitem__(self, seat_code):
+        return SeatView(self.seat_map, self.seat_map.layout.index[seat_code])
+    
+    def __contains__(self, seat_code):
+        return seat_code in self.seat_map.layout.index
+    
+    def __iter__(self):
+        return iter(self.seat_map.layout.codes)
+    
+    def __len__(self):
+        return len(self.seat_map.layout.codes)
+
+
+class SeatView(Mapping):
+    """Tek koltuk için sözlük görünümü ('status', 'zone', 'row', 'number')"""
+    
+    __slots__ = ('seat_map', 'i')
     
+    _KEYS = ('status', 'zone', 'row', 'number')
+    
+    def __init__(self, seat_map, i):
+        self.seat_map = seat_map
+        self.i = i
+    
+    def __getitem__(self, key):
+        layout = self.seat_map.layout
+        if key == 'status':
+            return STATUSES[self.seat_map.status[self.i]]
+        if key == 'zone':
+            return layout.zones[self.i]
+        if key == 'row':
+            return layout.rows[self.i]
+        if key == 'number':
+            return layout.numbers[self.i]
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        if key != 'status':
+            raise TypeError(f"Koltuk alanı değiştirilemez: {key}")
+        if value not in STATUS_CODES:
+            raise ValueError(f"Geçersiz koltuk durumu: {value}")
+        set_seat_status(self.seat_map, self.i, STATUS_CODES[value])
+    
+    def __iter__(self):
+        return iter(self._KEYS)
+    
+    def __len__(self):
+        return len(self._KEYS)
+    
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _count_zones(layout, status):
+    """Bölge bazında durum sayaçlarını hesapla (sıra dilimleri C düzeyinde sayılır)"""
+    counts = {zone: [0] * len(STATUSES) for zone in layout.zone_capacity}
+    for (start, end), zone in zip(layout.row_ranges, layout.row_zones):
+        if start == end:
+            continue
+        row_status = status[start:end]
+        zone_counts = counts[zone]
+        for code in range(len(STATUSES)):
+            zone_counts[code] += row_status.count(code)
+    return counts
+
+
+def _restore_counts(layout, data):
+    """Diskteki sayaçları yükle (düzenle uyuşmuyorsa None)"""
+    if set(data) != set(layout.zone_capacity):
+        return None
+    
+    counts = {}
+    for zone, zone_counts in data.items():
+        available, sold = zone_counts.get('available', 0), zone_counts.get('sold', 0)
+        if available + sold != layout.zone_capacity[zone]:
+            return None
+        counts[zone] = [available, sold, 0]
+    return counts
+
+
+def set_seat_status(seat_map, i, code):
+    """Koltuk durumunu değiştir ve türetilmiş yapıları güncelle"""
+    old = seat_map.status[i]
+    if old == code:
+        return
+    
+    seat_map.status[i] = code
+    seat_map.dirty = True
+    
+    seat_map.version += 1
+    changes = seat_map.changes
+    if changes is None:
+        changes = seat_map.changes = array('I', [0]) * CHANGE_LOG_SIZE
+    changes[seat_map.version % CHANGE_LOG_SIZE] = i << 2 | code
+    
+    counts = seat_map.counts[seat_map.layout.zones[i]]
+    counts[old] -= 1
+    counts[code] += 1
+    
+    if seat_map.free is not None:
+        x, y = seat_map.layout.coords[i]
+        if code == AVAILABLE:
+            seat_map.free[y] |= 1 << x
+        elif old == AVAILABLE:
+            seat_map.free[y] &= ~(1 << x)
+    
+    if seat_map.watchers:
+        for notify in seat_map.watchers:
+            notify(seat_map)
+
+
+def initialize_seat_map(layout=None):
+    """Koltuk haritası oluştur (varsayılan: 8 sıra x 12 koltuk)"""
+    if layout is None:
+        layout = DEFAULT_LAYOUT
+    return SeatMap(layout)
+
+
+def layout_from_config(config):
+    """Eski 'config' sözlüğünden paylaşılan düzeni al"""
+    return define_layout(config)
+
+
+def encode_seat_map(seat_map):
+    """Koltuk haritasını diske yazmak için kompakt biçime çevir
+    
+    Yalnızca düzen ID'si, koltuk başına tek karakterlik durum ve bölge
+    sayaçları yazılır; düzen tanımı ayrıca (layouts.json) saklanır.
+    Tutulan koltuklar müsait sayılır. Durum, sayaçlar ve sürüm harita
+    kilidi altında aynı andan alınır; yazıldıktan sonra mark_saved'e
+    'version' verilir.
+    """
+    with seat_map.lock:
+        counts = {zone: {'available': c[AVAILABLE] + c[HELD], 'sold': c[SOLD]}
+                  for zone, c in seat_map.counts.items()}
+        return {
+            'layout': seat_map.layout.layout_id,
+            'status': seat_map.status.translate(_ENCODE).decode('ascii'),
+            'counts': counts,
+            'version': seat_map.version
+        }
+
+
+def mark_saved(seat_map, version):
+    """version sürümünde alınan görüntü yazıldı: o sürümden beri değişiklik yoksa temiz say
+    
+    Görüntü alınıp yazılırken satılan koltuk haritayı değişmiş (dirty)
+    bırakır ve sonraki yazmada kaydedilir.
+    """
+    with seat_map.lock:
+        if seat_map.version == version:
+            seat_map.dirty = False
+
+
+def decode_seat_map(data):
+    """Diskteki koltuk haritasını yükle (kompakt veya eski sözlük biçimi)"""
+    if isinstance(data, SeatMap):
+        return data
+    
+    if 'layout' in data:
+        layout = get_layout(data['layout'])
+    else:
+        layout = layout_from_config(data['config'])
+    
+    if 'status' in data:
+        status = bytearray(data['status'].encode('ascii').translate(_DECODE))
+        if len(status) != layout.capacity:
+            raise ValueError(f"Koltuk haritası düzenle uyuşmuyor: {layout.layout_id}")
+        # Kaydedilmiş sayaçlar varsa koltuklar yeniden sayılmaz
+        counts = _restore_counts(layout, data['counts']) if 'counts' in data else None
+        return SeatMap(layout, status, counts, _loaded_version(data.get('version', 0)))
+    
+    # Eski biçim: koltuk başına bir sözlük
+    seat_map = SeatMap(layout)
+    index = layout.index
+    for seat_code, seat_info in data['seats'].items():
+        set_seat_status(seat_map, index[seat_code], STATUS_CODES[seat_info.get('status', 'available')])
+    # Yükleme sırasındaki değişiklikler günlüğe sayılmaz
+    seat_map.version = _loaded_version(data.get('version', seat_map.version))
+    seat_map.logged_from = seat_map.version + 1
     return seat_map
 
 
+def _loaded_version(saved):
+    """Diskten yüklenen haritanın sürümü
+    
+    Tutmalar diske yazılmaz: yüklenen harita kaydedilen sürümden en az bir
+    ileridedir, o sürümü bilen istemci tam görüntü alır. Son yazmadan sonra
+    verilen sürümler (ör. çökmeden önce yalnızca günlüğe düşen satışlar)
+    diskte yoktur; yükleme anından türetilen taban bunların da ilerisindedir.
+    """
+    return max(saved + 1, int(time.time()) << EPOCH_BITS)
+
+
+def changes_since(seat_map, version):
+    """İstemcinin bildiği sürümden sonraki koltuk değişiklikleri
+    
+    Günlük o sürümden sonraki tüm değişiklikleri içeriyorsa koltuk başına
+    son durumu veren kompakt fark döner:
+        {'version': 42, 'changes': {'A1': 'sold', 'B3': 'available'}}
+    Sürüm günlükten düşmüşse veya bilinmiyorsa tam görüntü döner (koltuk
+    başına bir karakter, düzendeki koltuk sırasıyla):
+        {'version': 42, 'layout': 'default', 'snapshot': '0012...'}
+    """
+    with seat_map.lock:
+        current = seat_map.version
+        oldest = max(seat_map.logged_from, current - CHANGE_LOG_SIZE + 1)
+        
+        if version == current:
+            return {'version': current, 'changes': {}}
+        if not oldest - 1 <= version < current:
+            return {
+                'version': current,
+                'layout': seat_map.layout.layout_id,
+                'snapshot': seat_map.status.translate(_SNAPSHOT).decode('ascii')
+            }
+        
+        codes = seat_map.layout.codes
+        changes = seat_map.changes
+        delta = {}
+        for entry_version in range(version + 1, current + 1):
+            entry = changes[entry_version % CHANGE_LOG_SIZE]
+            delta[codes[entry >> 2]] = STATUSES[entry & 3]
+        return {'version': current, 'changes': delta}
+
+
 def render_seat_map(seat_map):
     """Koltuk haritasını ekrana yazdır"""
-    config = seat_map['config']
-    seats = seat_map['seats']
-    
-    rows = config['rows']
-    seats_per_row = config['seats_per_row']
-    row_labels = [chr(65 + i) for i in range(rows)]
+    layout = seat_map.layout
+    status = seat_map.status
     
     # Başlık
     output = "\n" + "=" * 60 + "\n"
     output += "                         PERDE\n"
     output += "=" * 60 + "\n\n"
-    output += "Açıklama: [M] Müsait  [D] Dolu\n\n"
+    output += "Açıklama: [M] Müsait  [T] Tutuldu  [D] Dolu"
+    if layout.accessible:
+        output += "  [E] Engelli erişimine uygun"
+    output += "\n\n"
     
-    # Kolon numaraları
+    # Kolon numaraları (koridorlar boş)
     output += "    "
-    for i in range(1, seats_per_row + 1):
-        output += f"{i:3d} "
+    for number in layout.column_numbers:
+        output += f"{number:3d} " if number is not None else "    "
     output += "\n"
     
-    # Koltuk ızgarası
-    for row in row_labels:
-        output += f"{row}  "
-        for seat_num in range(1, seats_per_row + 1):
-            seat_code = f"{row}{seat_num}"
-            seat_info = seats.get(seat_code, {})
-            status = seat_info.get('status', 'available')
-            
-            symbol = '[M]' if status == 'available' else '[D]'
-            output += f"{symbol} "
+    # Koltuk ızgarası (boşluklar ve koridorlar boş hücre)
+    for y, row in enumerate(layout.row_labels):
+        cells = ["    "] * len(layout.column_numbers)
+        start, end = layout.row_ranges[y]
+        for i in range(start, end):
+            if status[i] == HELD:
+                symbol = '[T]'
+            elif status[i] != AVAILABLE:
+                symbol = '[D]'
+            elif layout.codes[i] in layout.accessible:
+                symbol = '[E]'
+            else:
+                symbol = '[M]'
+            cells[layout.coords[i][0]] = f"{symbol} "
+        output += f"{row}  " + "".join(cells)
         
         # Bölge göstergesi
-        zone = seats.get(f"{row}1", {}).get('zone', 'standard')
-        zone_tr = 'PREMIUM' if zone == 'premium' else 'STANDART'
+        zone_tr = 'PREMIUM' if layout.row_zones[y] == 'premium' else 'STANDART'
         output += f"  ({zone_tr})\n"
     
     output += "\n"
@@ -76,68 +570,280 @@ def render_seat_map(seat_map):
 
 def is_seat_available(seat_map, seat_code):
     """Koltuk müsait mi kontrol et"""
-    seats = seat_map['seats']
-    seat_info = seats.get(seat_code)
+    i = seat_map.layout.index.get(seat_code)
     
-    if not seat_info:
+    if i is None:
         return False
     
-    return seat_info['status'] == 'available'
+    return seat_map.status[i] == AVAILABLE
 
 
 def reserve_seat(seat_map, seat_code):
     """Koltuğu rezerve et (dolu olarak işaretle)"""
-    seats = seat_map['seats']
+    i = seat_map.layout.index.get(seat_code)
     
-    if seat_code not in seats:
+    if i is None:
         raise ValueError(f"Geçersiz koltuk kodu: {seat_code}")
     
-    seat_info = seats[seat_code]
-    
-    if seat_info['status'] != 'available':
+    if seat_map.status[i] != AVAILABLE:
         raise ValueError(f"Koltuk {seat_code} müsait değil!")
     
-    seat_info['status'] = 'sold'
-    return seat_info
+    set_seat_status(seat_map, i, SOLD)
+    return SeatView(seat_map, i)
 
 
 def release_seat(seat_map, seat_code):
     """Koltuğu serbest bırak"""
-    seats = seat_map['seats']
+    i = seat_map.layout.index.get(seat_code)
     
-    if seat_code not in seats:
+    if i is None:
         raise ValueError(f"Geçersiz koltuk kodu: {seat_code}")
     
-    seat_info = seats[seat_code]
-    seat_info['status'] = 'available'
-    return seat_info
+    set_seat_status(seat_map, i, AVAILABLE)
+    return SeatView(seat_map, i)
+
+
+def hold_seats(seat_map, seat_codes, hold_id, expires_at):
+    """Koltukları geçici olarak tut (hepsi ya da hiçbiri)
+    
+    Tutulan koltuklar müsait sayılmaz; satışa claim_hold ile dönüşür ya da
+    release_hold ile serbest kalır.
+    """
+    index = seat_map.layout.index
+    status = seat_map.status
+    
+    with seat_map.lock:
+        indices = []
+        for seat_code in seat_codes:
+            i = index.get(seat_code)
+            if i is None:
+                raise ValueError(f"Geçersiz koltuk kodu: {seat_code}")
+            if status[i] != AVAILABLE:
+                raise ValueError(f"Koltuk {seat_code} müsait değil!")
+            indices.append(i)
+        
+        if len(set(indices)) != len(indices):
+            raise ValueError("Aynı koltuk birden fazla seçilmiş!")
+        
+        for i in indices:
+            set_seat_status(seat_map, i, HELD)
+        seat_map.holds[hold_id] = {'seats': list(seat_codes), 'expires_at': expires_at}
+
+
+def claim_hold(seat_map, hold_id, seat_codes, now=None):
+    """Tutulan koltukları satışa çevir
+    
+    İstenmeyen tutulmuş koltuklar serbest bırakılır ve tutma silinir.
+    """
+    if now is None:
+        now = time.time()
+    
+    with seat_map.lock:
+        hold = seat_map.holds.get(hold_id)
+        if hold is None:
+            raise ValueError("Koltuk tutma bulunamadı!")
+        if hold['expires_at'] <= now:
+            raise ValueError("Koltuk tutma süresi doldu!")
+        
+        held = set(hold['seats'])
+        for seat_code in seat_codes:
+            if seat_code not in held:
+                raise ValueError(f"Koltuk {seat_code} bu tutmaya ait değil!")
+        
+        index = seat_map.layout.index
+        for seat_code in hold['seats']:
+            set_seat_status(seat_map, index[seat_code], AVAILABLE)
+        for seat_code in seat_codes:
+            set_seat_status(seat_map, index[seat_code], SOLD)
+        
+        del seat_map.holds[hold_id]
+
+
+def release_hold(seat_map, hold_id):
+    """Tutmayı kaldır ve koltukları serbest bırak (bırakılan koltuk sayısı)"""
+    with seat_map.lock:
+        hold = seat_map.holds.pop(hold_id, None)
+        if hold is None:
+            return 0
+        
+        index = seat_map.layout.index
+        for seat_code in hold['seats']:
+            i = index[seat_code]
+            if seat_map.status[i] == HELD:
+                set_seat_status(seat_map, i, AVAILABLE)
+        return len(hold['seats'])
 
 
 def get_seat_zone(seat_map, seat_code):
     """Koltuğun fiyat bölgesini al"""
-    seats = seat_map['seats']
-    seat_info = seats.get(seat_code, {})
-    return seat_info.get('zone', 'standard')
+    i = seat_map.layout.index.get(seat_code)
+    if i is None:
+        return 'standard'
+    return seat_map.layout.zones[i]
 
 
 def get_available_seats(seat_map):
     """Müsait koltukları listele"""
-    seats = seat_map['seats']
-    return [code for code, info in seats.items() if info['status'] == 'available']
+    codes = seat_map.layout.codes
+    return [codes[i] for i, code in enumerate(seat_map.status) if code == AVAILABLE]
 
 
 def get_seat_count_by_status(seat_map):
-    """Durumlara göre koltuk sayılarını al"""
-    seats = seat_map['seats']
-    counts = {'available': 0, 'sold': 0}
+    """Durumlara göre koltuk sayılarını al (bölge sayaçlarından, O(bölge sayısı))"""
+    totals = [0] * len(STATUSES)
+    for zone_counts in seat_map.counts.values():
+        for code, count in enumerate(zone_counts):
+            totals[code] += count
+    return dict(zip(STATUSES, totals))
+
+
+def get_zone_counts(seat_map):
+    """Bölge bazında durum sayaçlarını al"""
+    return {zone: dict(zip(STATUSES, zone_counts))
+            for zone, zone_counts in seat_map.counts.items()}
+
+
+def _free_masks(seat_map):
+    """Sıra başına boş koltuk bit maskeleri (bit x: x kolonundaki koltuk müsait)
     
-    for seat_info in seats.values():
-        status = seat_info.get('status', 'available')
-        counts[status] = counts.get(status, 0) + 1
+    Koridor kolonları ve boşluklar hiçbir zaman boş sayılmaz; böylece maskedeki
+    ardışık 1 bitleri yan yana oturulabilen koltuklardır.
+    """
+    if seat_map.free is None:
+        layout = seat_map.layout
+        free = [0] * len(layout.row_labels)
+        for i, code in enumerate(seat_map.status):
+            if code == AVAILABLE:
+                x, y = layout.coords[i]
+                free[y] |= 1 << x
+        seat_map.free = free
+    return seat_map.free
+
+
+def _block_starts(mask, size):
+    """Uzunluğu en az size olan boş aralıkların başlayabileceği kolonlar (maske)"""
+    starts = mask
+    for shift in range(1, size):
+        starts &= mask >> shift
+        if not starts:
+            break
+    return starts
+
+
+def _best_block(mask, size, center):
+    """Maskedeki en ortalı size uzunluğundaki blok: (merkeze uzaklık, başlangıç)"""
+    starts = _block_starts(mask, size)
+    best = None
+    while starts:
+        low = starts & -starts
+        x = low.bit_length() - 1
+        starts ^= low
+        candidate = (abs(x + (size - 1) / 2 - center), x)
+        if best is None or candidate < best:
+            best = candidate
+    return best
+
+
+def _longest_run(mask):
+    """Maskedeki en uzun ardışık 1 dizisinin uzunluğu"""
+    length = 0
+    while mask:
+        mask &= mask >> 1
+        length += 1
+    return length
+
+
+def find_best_seats(seat_map, count, zone=None):
+    """Yan yana en iyi count koltuğu bul (bulunamazsa boş liste)
     
-    return counts
+    Önce tek sırada ortalanmış bir blok aranır; sıranın salon ortasına ve
+    bloğun sıra ortasına uzaklığı toplamı en küçük olan seçilir. Tek sırada
+    yer yoksa grup, komşu sıralara en az dağılımla bölünür. zone verilirse
+    yalnızca o bölgedeki sıralar kullanılır. Koltuklar ayrılmaz; çağıran
+    reserve_seat veya hold_seats ile ayırır.
+    """
+    layout = seat_map.layout
+    if count <= 0:
+        return []
+    
+    with seat_map.lock:
+        free = _free_masks(seat_map)
+        rows = [y for y in range(len(layout.row_labels))
+                if zone is None or layout.row_zones[y] == zone]
+        if not rows:
+            return []
+        
+        center = (len(layout.column_numbers) - 1) / 2
+        middle_row = (rows[0] + rows[-1]) / 2
+        
+        # Tek sırada blok
+        best = None
+        for y in rows:
+            block = _best_block(free[y], count, center)
+            if block is None:
+                continue
+            candidate = (block[0] + abs(y - middle_row), y, block[1])
+            if best is None or candidate < best:
+                best = candidate
+        if best is not None:
+            _, y, x = best
+            return [layout.codes[layout.row_positions[y][x + k]] for k in range(count)]
+        
+        # Komşu sıralara bölme: en az sıra, sonra en ortalı yerleşim
+        for span in range(2, len(rows) + 1):
+            best = None
+            for first in range(len(rows) - span + 1):
+                window = rows[first:first + span]
+                if window[-1] - window[0] != span - 1:
+                    continue  # Bölge dışı sıra araya giriyor
+                placement = _split_across_rows(free, window, count, center)
+                if placement is None:
+                    continue
+                score = placement[0] + sum(abs(y - middle_row) for y in window) / span
+                if best is None or score < best[0]:
+                    best = (score, placement[1])
+            if best is not None:
+                return [layout.codes[layout.row_positions[y][x + k]]
+                        for y, x, size in best[1] for k in range(size)]
+        return []
+
+
+def _split_across_rows(free, window, count, center):
+    """Grubu verilen komşu sıralara böl: (merkeze uzaklık toplamı, [(y, x, adet)])
+    
+    Grup önce sıralara eşit dağıtılır; bir sıra payını alamıyorsa her sıra
+    en uzun boş bloğu kadar koltuk alır.
+    """
+    span = len(window)
+    even = [count // span + (1 if k < count % span else 0) for k in range(span)]
+    
+    placements = []
+    total = 0
+    for y, size in zip(window, even):
+        block = _best_block(free[y], size, center)
+        if block is None:
+            break
+        placements.append((y, block[1], size))
+        total += block[0]
+    else:
+        return total, placements
+    
+    placements = []
+    total = 0
+    remaining = count
+    for y in window:
+        size = min(remaining, _longest_run(free[y]))
+        if size == 0:
+            return None
+        block = _best_block(free[y], size, center)
+        placements.append((y, block[1], size))
+        total += block[0]
+        remaining -= size
+    if remaining:
+        return None
+    return total, placements
 
 
 def validate_seat_code(seat_map, seat_code):
     """Koltuk kodu geçerli mi kontrol et"""
-    return seat_code in seat_map['seats']
+    return seat_code in seat_map.layout.index
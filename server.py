@@ -0,0 +1,466 @@
+"""
+Asyncio HTTP/JSON rezervasyon sunucusu
+
+Gişe ve web arayüzü için seans listesi, koltuk haritası, koltuk tutma,
+rezervasyon, iptal ve raporları HTTP/1.1 üzerinden sunar. Yalnızca
+standart kütüphane kullanılır; tek makinede yük testi yapılabilir.
+
+- Kalıcı bağlantı (keep-alive) ve ardışık istekler (pipelining): aynı
+  bağlantıdan gelen istekler sırayla işlenir, yanıtlar aynı sırayla yazılır.
+- Değişiklikler (rezervasyon, iptal, tutma) ve raporlar tek iş parçacıklı
+  bir yürütücüde (executor) sırayla çalışır. Kontrol noktaları arka plan
+  yazıcısında alınır (bkz. persistence.py); olay döngüsünü bekletmez.
+- Koltuk haritası okumaları (önbellekte yoksa diskten yüklenir) ayrı bir
+  okuma havuzunda çalışır.
+- Koltuk yayını (/stream) bağlantıyı açık tutar ve seansın koltuk
+  değişikliklerini olay olarak iletir (bkz. seat_stream.py).
+
+Kullanım:
+    python server.py [--host 127.0.0.1] [--port 8080] [--storage sqlite] [--profile]
+
+Uç noktalar:
+    GET    /movies
+    GET    /showtimes[?movie_id=...]
+    GET    /showtimes/<id>/seats[?render=1 | ?since=<sürüm>]
+    GET    /showtimes/<id>/best-seats?count=N[&zone=premium]
+    GET    /showtimes/<id>/stream[?format=sse|ndjson][&since=<sürüm>]
+    POST   /holds                 {"showtime_id", "seats", "ttl"}
+    DELETE /holds/<hold_id>
+    POST   /bookings              tek istek veya istek listesi (toplu)
+    GET    /bookings/<id>
+    DELETE /bookings/<id>
+    GET    /reports/occupancy
+    GET    /reports/revenue?start=YYYY-MM-DD&end=YYYY-MM-DD
+    GET    /reports/top-movies[?limit=5]
+    GET    /reports/peak-days
+    GET    /reports/showtimes/<id>
+    GET    /metrics               ölçümler (Prometheus metin biçimi)
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+import main
+import metrics
+import profiling
+from bookings import get_booking
+from seat_stream import SeatStreams, CONTENT_TYPES, SSE
+from movies import list_showtimes
+from reports import (occupancy_report, revenue_summary, top_movies,
+                     peak_days_analysis, showtime_performance_report)
+from seating import (render_seat_map, get_available_seats, get_seat_count_by_status,
+                     find_best_seats, changes_since)
+
+
+# Boşta bekleyen kalıcı bağlantıların kapatılma süresi (saniye)
+KEEPALIVE_TIMEOUT = 15
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+
+# Yürütme yeri: döngü içinde, okuma havuzunda veya yazma iş parçacığında
+INLINE, READ, WRITE = 'inline', 'read', 'write'
+
+
+class HTTPError(Exception):
+    """İstemciye hata yanıtı olarak dönecek istisna"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StreamResponse:
+    """Bağlantıyı açık tutan yanıt: başlıktan sonra gövdeyi run(writer) yazar"""
+    
+    def __init__(self, content_type, run):
+        self.content_type = content_type
+        self.run = run
+
+
+class CinemaServer:
+    """main modülündeki verileri HTTP üzerinden sunan sunucu"""
+    
+    def __init__(self, read_workers=4):
+        self.readers = ThreadPoolExecutor(max_workers=read_workers,
+                                          thread_name_prefix='cinema-read')
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cinema-write')
+        self.server = None
+        self._connections = set()
+        self.streams = SeatStreams()
+        self.routes = [
+            ('GET', r'/movies', INLINE, self.movies),
+            ('GET', r'/showtimes', INLINE, self.showtimes),
+            ('GET', r'/showtimes/([^/]+)/seats', READ, self.seats),
+            ('GET', r'/showtimes/([^/]+)/best-seats', READ, self.best_seats),
+            ('GET', r'/showtimes/([^/]+)/stream', READ, self.stream),
+            ('POST', r'/holds', WRITE, self.hold),
+            ('DELETE', r'/holds/([^/]+)', WRITE, self.release_hold),
+            ('POST', r'/bookings', WRITE, self.book),
+            ('GET', r'/bookings/([^/]+)', INLINE, self.booking),
+            ('DELETE', r'/bookings/([^/]+)', WRITE, self.cancel),
+            ('GET', r'/reports/occupancy', WRITE, self.occupancy),
+            ('GET', r'/reports/revenue', WRITE, self.revenue),
+            ('GET', r'/reports/top-movies', WRITE, self.top_movies),
+            ('GET', r'/reports/peak-days', WRITE, self.peak_days),
+            ('GET', r'/reports/showtimes/([^/]+)', WRITE, self.showtime_report),
+            ('GET', r'/metrics', INLINE, self.metrics),
+        ]
+        self.routes = [(method, re.compile(pattern + '$'), where, handler)
+                       for method, pattern, where, handler in self.routes]
+        
+        # Profil çıkarma açıksa her uç nokta çağrısı ayrı bir işlem olarak kaydedilir
+        if profiling.ENABLED:
+            self.routes = [(method, pattern, where,
+                            profiling.profile(handler, f"api.{handler.__name__}"))
+                           for method, pattern, where, handler in self.routes]
+    
+    # Uç noktalar (query: ayrıştırılmış sorgu parametreleri, body: JSON gövde)
+    
+    def movies(self, query, body):
+        return list(main.movies)
+    
+    def showtimes(self, query, body):
+        movie_id = query.get('movie_id')
+        return [_public_showtime(showtime)
+                for showtime in list_showtimes(main.showtimes, movie_id)]
+    
+    def seats(self, query, body, showtime_id):
+        seat_map = _seat_map(showtime_id)
+        if query.get('render'):
+            return render_seat_map(seat_map)
+        # Yoklayan istemci: bildiği sürümden sonraki fark (veya tam görüntü)
+        if 'since' in query:
+            return dict(changes_since(seat_map, _int_param(query, 'since', 0)),
+                        showtime_id=showtime_id)
+        return {
+            'showtime_id': showtime_id,
+            'layout': seat_map.layout.layout_id,
+            'version': seat_map.version,
+            'counts': get_seat_count_by_status(seat_map),
+            'available': get_available_seats(seat_map)
+        }
+    
+    def stream(self, query, body, showtime_id):
+        seat_map = _seat_map(showtime_id)
+        fmt = query.get('format', SSE)
+        if fmt not in CONTENT_TYPES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Geçersiz biçim (sse veya ndjson)")
+        since = _int_param(query, 'since', None)
+        return HTTPStatus.OK, StreamResponse(
+            CONTENT_TYPES[fmt],
+            lambda writer: self.streams.stream(writer, showtime_id, seat_map, fmt, since)
+        )
+    
+    def best_seats(self, query, body, showtime_id):
+        count = _int_param(query, 'count', 1)
+        seats = find_best_seats(_seat_map(showtime_id), count, query.get('zone'))
+        if not seats:
+            raise HTTPError(HTTPStatus.CONFLICT, "Bu sayıda müsait koltuk bulunamadı!")
+        return {'showtime_id': showtime_id, 'seats': seats}
+    
+    def hold(self, query, body):
+        data = _require(body, 'showtime_id', 'seats')
+        return main.engine.hold(data['showtime_id'], data['seats'], _ttl_field(data))
+    
+    def release_hold(self, query, body, hold_id):
+        if not main.engine.release_hold(hold_id):
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Koltuk tutma bulunamadı!")
+        return {'released': hold_id}
+    
+    def book(self, query, body):
+        if isinstance(body, list):
+            results = main.engine.book_many(body)
+        else:
+            results = main.engine.book(_require(body, 'showtime_id', 'seats'))
+        main.checkpoint_if_needed()
+        return HTTPStatus.CREATED, results
+    
+    def booking(self, query, body, booking_id):
+        booking = get_booking(main.bookings, booking_id)
+        if not booking:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Rezervasyon bulunamadı!")
+        return booking
+    
+    def cancel(self, query, body, booking_id):
+        if not get_booking(main.bookings, booking_id):
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Rezervasyon bulunamadı!")
+        if not main.engine.cancel(booking_id):
+            raise HTTPError(HTTPStatus.CONFLICT, "Rezervasyon zaten iptal edilmiş!")
+        main.checkpoint_if_needed()
+        return get_booking(main.bookings, booking_id)
+    
+    def occupancy(self, query, body):
+        return occupancy_report(main.showtimes, main.seat_maps, main.bookings)
+    
+    def revenue(self, query, body):
+        if 'start' not in query or 'end' not in query:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "start ve end parametreleri gerekli")
+        return revenue_summary(main.bookings, (query['start'], query['end']))
+    
+    def top_movies(self, query, body):
+        return top_movies(main.bookings, main.showtimes, _int_param(query, 'limit', 5))
+    
+    def peak_days(self, query, body):
+        return peak_days_analysis(main.bookings)
+    
+    def showtime_report(self, query, body, showtime_id):
+        report = showtime_performance_report(main.showtimes, main.seat_maps, main.bookings,
+                                             showtime_id)
+        if 'error' in report:
+            raise HTTPError(HTTPStatus.NOT_FOUND, report['error'])
+        return report
+    
+    def metrics(self, query, body):
+        return metrics.render()
+    
+    # HTTP
+    
+    async def dispatch(self, method, target, body):
+        """İsteği uç noktaya yönlendir: (durum, yanıt gövdesi)"""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        
+        allowed = False
+        for route_method, pattern, where, handler in self.routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            
+            args = (query, body) + match.groups()
+            if where == INLINE:
+                result = handler(*args)
+            else:
+                executor = self.writer if where == WRITE else self.readers
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(executor, handler, *args)
+            
+            if isinstance(result, tuple):
+                return result
+            return HTTPStatus.OK, result
+        
+        if allowed:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Yöntem desteklenmiyor")
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Bulunamadı")
+    
+    async def handle_connection(self, reader, writer):
+        """Bağlantıdaki istekleri sırayla işle (keep-alive ve pipelining)"""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                                  KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                        {'error': "Başlık çok büyük"}, False)
+                    break
+                
+                try:
+                    method, target, version, headers = _parse_head(head)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST,
+                                        {'error': "Geçersiz istek"}, False)
+                    break
+                
+                connection = headers.get('connection', '').lower()
+                if version == 'HTTP/1.1':
+                    keep_alive = connection != 'close'
+                else:
+                    keep_alive = connection == 'keep-alive'
+                
+                status, payload = await self._process(reader, method, target, headers)
+                if isinstance(payload, StreamResponse):
+                    # Akış bağlantı kapanana kadar sürer; ardından istek okunmaz
+                    await self._stream(writer, payload)
+                    break
+                if status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE:
+                    keep_alive = False  # Okunmayan gövde bağlantıda kaldı
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+    
+    async def _process(self, reader, method, target, headers):
+        try:
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY_SIZE:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Gövde çok büyük")
+            body = None
+            if length:
+                try:
+                    body = json.loads(await reader.readexactly(length))
+                except json.JSONDecodeError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Geçersiz JSON")
+            return await self.dispatch(method, target, body)
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"Sunucu hatası: {e}"}
+    
+    async def _respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; charset=utf-8'
+        else:
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        
+        status = HTTPStatus(status)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        # drain yalnızca gönderim tamponu dolduğunda bekler
+        await writer.drain()
+    
+    async def _stream(self, writer, response):
+        head = ("HTTP/1.1 200 OK\r\n"
+                f"Content-Type: {response.content_type}\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n")
+        writer.write(head.encode('latin-1'))
+        await response.run(writer)
+    
+    async def start(self, host='127.0.0.1', port=8080):
+        self.server = await asyncio.start_server(self.handle_connection, host, port,
+                                                 limit=MAX_HEADER_SIZE)
+        return self.server
+    
+    async def stop(self):
+        """Yeni bağlantıları reddet ve açık bağlantıları kapat"""
+        if self.server is not None:
+            self.server.close()
+        connections = list(self._connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+    
+    def close(self):
+        """Bekleyen yazmaları bitir ve yürütücüleri kapat"""
+        self.readers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+
+
+def _parse_head(head):
+    """İstek satırı ve başlıkları ayrıştır"""
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ')
+    if not version.startswith('HTTP/'):
+        raise ValueError(version)
+    
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def _public_showtime(showtime):
+    """Seansı koltuk haritası olmadan al"""
+    return {key: value for key, value in showtime.items() if key != 'seat_map'}
+
+
+def _seat_map(showtime_id):
+    seat_map = main.seat_maps.get(showtime_id)
+    if not seat_map:
+        raise HTTPError(HTTPStatus.NOT_FOUND, "Koltuk haritası bulunamadı!")
+    return seat_map
+
+
+def _require(body, *fields):
+    if not isinstance(body, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "JSON nesnesi bekleniyor")
+    for field in fields:
+        if field not in body:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Eksik alan: {field}")
+    return body
+
+
+def _int_param(query, name, default):
+    value = query.get(name)
+    if value is None:
+        return default
+    if not value.isdigit():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Geçersiz sayı: {name}")
+    return int(value)
+
+
+def _ttl_field(body):
+    """Tutma süresi (saniye); verilmezse None, sayı değilse veya pozitif değilse 400"""
+    ttl = body.get('ttl')
+    if ttl is None:
+        return None
+    if (isinstance(ttl, bool) or not isinstance(ttl, (int, float))
+            or not math.isfinite(ttl) or ttl <= 0):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Geçersiz tutma süresi: ttl")
+    return ttl
+
+
+async def serve(host, port):
+    """Sunucuyu çalıştır (Ctrl+C veya SIGTERM ile durur)"""
+    server = CinemaServer()
+    await server.start(host, port)
+    
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopped.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C KeyboardInterrupt olarak gelir
+    
+    print(f"Sunucu çalışıyor: http://{host}:{port}")
+    try:
+        await stopped.wait()
+    finally:
+        await server.stop()
+        server.close()
+
+
+def main_server(argv=None):
+    parser = argparse.ArgumentParser(description="Sinema rezervasyon HTTP sunucusu")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data-dir', default=main.DATA_DIR, help="Veri klasörü")
+    parser.add_argument('--storage', choices=('json', 'sqlite', 'sharded'), default=main.STORAGE_BACKEND,
+                        help="Veri saklama türü")
+    parser.add_argument('--profile', action='store_true',
+                        help="Her isteğin profilini profiles/ klasörüne yaz")
+    args = parser.parse_args(argv)
+    
+    main.DATA_DIR = args.data_dir
+    main.STORAGE_BACKEND = args.storage
+    if args.profile or profiling.ENABLED:
+        profiling.enable()
+    main.load_data()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Kapanışta kontrol noktası: günlükteki kayıtlar veri dosyalarına yazılır
+        main.close_data()
+
+
+if __name__ == "__main__":
+    main_server()
@@ -0,0 +1,241 @@
+"""
+Seans başına parçalı (sharded) veri saklama modülü
+
+storage.py ile aynı load_state/save_state arayüzünü sunar. Her seans,
+kaydı ve koltuk haritasıyla birlikte tek küçük bir dosyada tutulur:
+
+    data/showtimes/<tarih>/<seans_id>.json
+    data/showtimes/index.json   # tüm seans kayıtları (kompakt, haritasız)
+
+Başlangıçta yalnızca dizin dosyası okunur; koltuk haritaları ilk erişimde
+seans dosyasından yüklenir. Koltuk değişikliği yalnızca o seansın
+dosyasını, seans kaydındaki değişiklik o dosyayı ve dizini yeniden yazar.
+Tarih aralığındaki seanslar listelenirken yalnızca o tarihlerin klasörleri
+açılır (bkz. list_showtimes_between).
+
+Filmler, rezervasyonlar ve günlük storage.py ile aynı JSON dosyalarındadır.
+İlk açılışta mevcut showtimes.json ve seat_maps/ verileri aktarılır.
+
+Kullanım:
+    CINEMA_STORAGE=sharded python main.py
+"""
+
+import os
+import shutil
+import threading
+import time
+import metrics
+from seating import encode_seat_map, decode_seat_map, mark_saved
+from validation import validate_date
+import storage
+from storage import (SeatMapCache, SEAT_MAP_CACHE_SIZE, JOURNAL_FILE, load_json, save_json,
+                     load_layouts, save_layouts, replay_journal, record_file_size)
+
+
+SHOWTIMES_DIR = 'showtimes'
+INDEX_FILE = 'index.json'
+
+LOAD_SECONDS = metrics.histogram('cinema_load_state_seconds', "Veri yükleme süresi (saniye)",
+                                 {'backend': 'sharded'})
+SAVE_SECONDS = metrics.histogram('cinema_save_state_seconds',
+                                 "Kontrol noktası kaydetme süresi (saniye)", {'backend': 'sharded'})
+
+
+class _Shards:
+    """Bir veri klasörünün seans dosyaları
+    
+    records, her seansın son yazılan kaydını (koltuk haritası olmadan)
+    tutar: değişen kayıtlar bununla karşılaştırılarak bulunur ve seans
+    dosyasının yolu (tarih klasörü) buradan alınır.
+    """
+    
+    def __init__(self, base_dir):
+        self.root = os.path.abspath(os.path.join(base_dir, SHOWTIMES_DIR))
+        self.records = {}
+        # Önbellekten çıkarılan harita ile kontrol noktası aynı dosyayı yazabilir
+        self._lock = threading.Lock()
+    
+    def path(self, record):
+        date, showtime_id = record['date'], record['showtime_id']
+        # Kayıttaki değerler yol bileşenidir: kök klasörün dışına çıkamamalı
+        if not isinstance(date, str) or not validate_date(date) or os.path.basename(date) != date:
+            raise ValueError(f"Geçersiz seans tarihi: {date!r}")
+        if (not isinstance(showtime_id, str) or os.path.basename(showtime_id) != showtime_id
+                or showtime_id in ('', '.', '..')):
+            raise ValueError(f"Geçersiz seans ID: {showtime_id!r}")
+        return os.path.join(self.root, date, f"{showtime_id}.json")
+    
+    def write(self, record, seat_map):
+        """Seans dosyasını yaz (kayıt ve koltuk haritası birlikte)"""
+        with self._lock:
+            data = encode_seat_map(seat_map)
+            save_json(self.path(record), {'showtime': record, 'seat_map': data}, indent=None)
+            mark_saved(seat_map, data['version'])
+            self.records[record['showtime_id']] = record
+    
+    def remove(self, record):
+        """Seans dosyasını sil (boşalan tarih klasörü de silinir)"""
+        path = self.path(record)
+        if os.path.exists(path):
+            os.remove(path)
+        directory = os.path.dirname(path)
+        if os.path.isdir(directory) and not os.listdir(directory):
+            os.rmdir(directory)
+    
+    def load_seat_map(self, showtime_id):
+        record = self.records.get(showtime_id)
+        if record is None or not os.path.exists(self.path(record)):
+            return None
+        return decode_seat_map(load_json(self.path(record))['seat_map'])
+    
+    def save_seat_map(self, showtime_id, seat_map):
+        record = self.records.get(showtime_id)
+        # Henüz kaydedilmemiş yeni seans: dosya yolu (tarih) bilinmiyor. Harita
+        # değişmiş (dirty) kalır; önbellek onu bellekte tutar ve sonraki
+        # save_state'te yazılır.
+        if record is not None:
+            self.write(record, seat_map)
+
+
+# Veri klasörü -> seans dosyaları
+_shards = {}
+
+
+def _get_shards(base_dir):
+    root = os.path.abspath(base_dir)
+    if root not in _shards:
+        _shards[root] = _Shards(base_dir)
+    return _shards[root]
+
+
+def index_path(base_dir):
+    return os.path.join(base_dir, SHOWTIMES_DIR, INDEX_FILE)
+
+
+def load_state(base_dir, cache_size=SEAT_MAP_CACHE_SIZE):
+    """Tüm sistem verilerini yükle (koltuk haritaları ilk erişimde yüklenir)"""
+    start = time.perf_counter()
+    load_layouts(base_dir)
+    
+    # Parçalı biçime ilk geçiş: JSON verileri seans dosyalarına yazılır
+    if (not os.path.exists(index_path(base_dir)) and
+            os.path.exists(os.path.join(base_dir, 'showtimes.json'))):
+        showtimes, seat_maps, bookings = storage.load_state(base_dir, cache_size)
+        save_state(base_dir, showtimes, seat_maps, bookings)
+    
+    shards = _get_shards(base_dir)
+    showtimes = load_json(index_path(base_dir))
+    bookings = load_json(os.path.join(base_dir, 'bookings.json'))
+    # Kopyalar: yerinde değişen kayıtlar karşılaştırmada fark edilir
+    shards.records = {showtime['showtime_id']: dict(showtime) for showtime in showtimes}
+    
+    seat_maps = SeatMapCache(
+        [showtime['showtime_id'] for showtime in showtimes],
+        loader=shards.load_seat_map,
+        writer=shards.save_seat_map,
+        capacity=cache_size,
+        source=shards.root
+    )
+    
+    replay_journal(os.path.join(base_dir, JOURNAL_FILE), seat_maps, bookings)
+    
+    LOAD_SECONDS.observe(time.perf_counter() - start)
+    return showtimes, seat_maps, bookings
+
+
+def save_state(base_dir, showtimes, seat_maps, bookings, changed=None):
+    """Değişen seans dosyalarını, dizini ve rezervasyonları kaydet
+    
+    Kaydı değişen, koltuk haritası değişen (dirty) veya dosyası olmayan
+    seansların dosyası yazılır; silinen seansların dosyası kaldırılır.
+    changed: değişen listeler ('showtimes', 'bookings'); None ise ikisi de
+    yazılmış sayılır. Seans kayıtları her durumda tek tek karşılaştırılır.
+    """
+    start = time.perf_counter()
+    if changed is None:
+        changed = ('showtimes', 'bookings')
+    shards = _get_shards(base_dir)
+    own_cache = isinstance(seat_maps, SeatMapCache) and seat_maps.source == shards.root
+    
+    save_layouts(base_dir)
+    
+    records = {}
+    for showtime in showtimes:
+        record = {key: value for key, value in showtime.items() if key != 'seat_map'}
+        records[record['showtime_id']] = record
+    
+    index_changed = records.keys() != shards.records.keys()
+    for showtime_id, record in records.items():
+        old = shards.records.get(showtime_id)
+        # Kendi önbelleğimizdeki değişmiş haritaları flush() yazar
+        if old == record and own_cache:
+            continue
+        
+        # Tarih değiştiyse harita eski yoldan yüklenir, dosya yeni klasöre taşınır
+        seat_map = seat_maps.get(showtime_id)
+        if seat_map is None:
+            continue
+        if old == record and not seat_map.dirty and os.path.exists(shards.path(record)):
+            continue
+        
+        shards.write(record, seat_map)
+        if old != record:
+            index_changed = True
+            if old is not None and old['date'] != record['date']:
+                shards.remove(old)
+    
+    for showtime_id in list(shards.records):
+        if showtime_id not in records:
+            shards.remove(shards.records.pop(showtime_id))
+    
+    if own_cache:
+        seat_maps.flush()
+    
+    # Dizin seans dosyalarından sonra yazılır
+    if index_changed or not os.path.exists(index_path(base_dir)):
+        save_json(index_path(base_dir), list(records.values()), indent=None)
+    
+    bookings_path = os.path.join(base_dir, 'bookings.json')
+    if 'bookings' in changed:
+        save_json(bookings_path, bookings)
+    
+    SAVE_SECONDS.observe(time.perf_counter() - start)
+    for path in (index_path(base_dir), bookings_path):
+        record_file_size(path)
+
+
+def list_showtimes_between(base_dir, start_date, end_date):
+    """Tarih aralığındaki seans kayıtları (yalnızca o tarihlerin klasörleri açılır)
+    
+    Tarihler YYYY-MM-DD biçimindedir; sınırlar dahildir. Kayıtlar tarih
+    ve saate göre sıralı döner.
+    """
+    root = os.path.join(base_dir, SHOWTIMES_DIR)
+    if not os.path.isdir(root):
+        return []
+    
+    records = []
+    for date in sorted(os.listdir(root)):
+        directory = os.path.join(root, date)
+        if not (start_date <= date <= end_date) or not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            if filename.endswith('.json'):
+                records.append(load_json(os.path.join(directory, filename))['showtime'])
+    
+    records.sort(key=lambda record: (record['date'], record.get('time', '')))
+    return records
+
+
+def backup_state(base_dir, backup_dir):
+    """Verilerin yedeğini al (seans dosyaları klasör olarak kopyalanır)"""
+    backup_files = storage.backup_state(base_dir, backup_dir)
+    
+    source = os.path.join(base_dir, SHOWTIMES_DIR)
+    if os.path.isdir(source):
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        destination = os.path.join(backup_dir, f"{SHOWTIMES_DIR}_{timestamp}")
+        shutil.copytree(source, destination)
+        backup_files.append(destination)
+    
+    return backup_files
@@ -0,0 +1,311 @@
+"""
+İkili (binary) anlık görüntü modülü
+
+Seans ve rezervasyon listeleri JSON dosyalarının yanına ikili bir anlık
+görüntü olarak da yazılır (data/snapshot.bin). Başlangıçta görüntü
+geçerliyse girintili JSON ayrıştırılmaz: kolonlar tipli diziler olarak
+tek seferde okunur, metinler ortak bir metin havuzundan (string pool)
+alınır. JSON dosyaları veri değişim biçimi olarak kalır.
+
+Dosya yapısı:
+    başlık: sihirli bayt, sürüm, bayt sırası, CRC32, gövde uzunluğu
+    gövde:  kaynak dosyaların (boyut, mtime) bilgisi, metin havuzu, tablolar
+
+Görüntü, yazıldığı andaki JSON dosyalarının boyutu ve değişiklik zamanı
+ile eşleşmiyorsa (JSON elle düzenlenmiş, yarım kalmış kayıt vb.) veya
+sağlama toplamı tutmuyorsa yok sayılır ve JSON okunur.
+"""
+
+import gc
+import json
+import math
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+
+SNAPSHOT_FILE = 'snapshot.bin'
+MAGIC = b'CINESNAP'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sHBxIQ')   # sihirli bayt, sürüm, bayt sırası, CRC32, uzunluk
+_COUNT = struct.Struct('<I')
+_SOURCE = struct.Struct('<Qq')         # boyut, mtime (ns)
+
+_BYTEORDER = 0 if sys.byteorder == 'little' else 1
+_NAN_BYTES = array('d', [math.nan]).tobytes()
+
+# Kolon türleri: metin, kayan nokta, metin listesi (virgülle birleşik), JSON
+STR, FLOAT, LIST, JSON = 's', 'f', 'l', 'j'
+
+# Tablolar: (JSON dosyası, kolonlar). Kolonlarda olmayan alanlar satırın
+# 'extra' alanında JSON olarak saklanır (sqlite_storage ile aynı yaklaşım).
+TABLES = (
+    ('showtimes.json', (
+        ('showtime_id', STR), ('movie_id', STR), ('screen', STR), ('date', STR),
+        ('time', STR), ('language', STR), ('pricing', JSON)
+    )),
+    ('bookings.json', (
+        ('booking_id', STR), ('showtime_id', STR), ('seats', LIST), ('customer_name', STR),
+        ('customer_email', STR), ('customer_phone', STR), ('booking_date', STR),
+        ('subtotal', FLOAT), ('discount', FLOAT), ('discount_type', STR), ('total', FLOAT),
+        ('status', STR)
+    )),
+)
+
+def _row_builder(columns):
+    """Kolon listelerinden sözlük listesi kuran fonksiyon"""
+    names = tuple(name for name, _ in columns)
+    
+    def build(values):
+        return [dict(zip(names, row)) for row in zip(*values)]
+    
+    return build
+
+
+_BUILDERS = [_row_builder(columns) for _, columns in TABLES]
+
+# Satır bayrakları
+COMPLETE = 0   # Tüm kolonlar dolu, ek alan yok: sözlük doğrudan kurulur
+PARTIAL = 1    # Eksik kolon veya ek alan var
+
+
+def snapshot_path(base_dir):
+    return os.path.join(base_dir, SNAPSHOT_FILE)
+
+
+def _source_stats(base_dir):
+    stats = []
+    for filename, _ in TABLES:
+        try:
+            st = os.stat(os.path.join(base_dir, filename))
+        except FileNotFoundError:
+            stats.append((0, -1))
+        else:
+            stats.append((st.st_size, st.st_mtime_ns))
+    return stats
+
+
+# Eksik kolon işareti (metin havuzunda -1 numaralı kayıt)
+_MISSING = object()
+
+
+def _split(value):
+    if value is _MISSING:
+        return value
+    return value.split(',') if value else []
+
+
+class _Pool:
+    """Metin havuzu: her farklı metin bir kez yazılır"""
+    
+    def __init__(self):
+        self.index = {}   # metin -> numara (sözlük sırası = numara sırası)
+    
+    def refs(self, values):
+        """Değerlerin havuz numaraları (metin olmayanlar için -1)"""
+        index = self.index
+        setdefault = index.setdefault
+        # Yeni metin, sözlüğün o anki boyutunu numara olarak alır
+        return array('i', [setdefault(value, len(index)) if type(value) is str else -1
+                           for value in values])
+    
+    def pack(self):
+        # Uzunluklar karakter cinsindendir: havuz tek seferde çözülüp dilimlenir
+        lengths = array('I', [len(value) for value in self.index])
+        blob = ''.join(self.index).encode('utf-8')
+        return _COUNT.pack(len(lengths)) + lengths.tobytes() + _COUNT.pack(len(blob)) + blob
+
+
+def _join(value):
+    """Metin listesini birleştir (geri ayrıldığında aynı liste çıkmıyorsa None)"""
+    if type(value) is not list:
+        return None
+    try:
+        joined = ','.join(value)
+    except TypeError:
+        return None
+    return joined if _split(joined) == value else None
+
+
+def _encode_column(kind, values, pool):
+    """Kolonu tipli diziye çevir (eksik veya kolona uymayan değerler: -1 / NaN)"""
+    if kind == FLOAT:
+        return array('d', [value if type(value) is float else math.nan for value in values])
+    if kind == LIST:
+        return pool.refs([_join(value) for value in values])
+    if kind == JSON:
+        return pool.refs([None if value is _MISSING else
+                          json.dumps(value, separators=(',', ':'), sort_keys=True)
+                          for value in values])
+    return pool.refs(values)
+
+
+def _encode_table(records, columns, pool):
+    names = [name for name, _ in columns]
+    name_set = set(names)
+    
+    # Kolonlarla birebir aynı anahtarlara sahip olmayan satırların ek alanları
+    rest = {}
+    for i, record in enumerate(records):
+        if record.keys() != name_set:
+            rest[i] = {key: value for key, value in record.items() if key not in name_set}
+    
+    data = []
+    for name, kind in columns:
+        values = [record.get(name, _MISSING) for record in records]
+        column = _encode_column(kind, values, pool)
+        data.append(column)
+        
+        # Kolona uymayan değerler (örn. None telefon) ek alanlarda saklanır.
+        # Önce dizinin tamamında C hızında aranır; çoğu kolonda hiç yoktur.
+        if kind == FLOAT:
+            if _NAN_BYTES not in column.tobytes():
+                continue
+            positions = [i for i, value in enumerate(column) if value != value]
+        else:
+            if -1 not in column:
+                continue
+            positions = [i for i, value in enumerate(column) if value == -1]
+        for i in positions:
+            fields = rest.setdefault(i, {})
+            if values[i] is not _MISSING:
+                fields[name] = values[i]
+    
+    flags = array('b', bytes(len(records)))
+    extra = array('i', [-1]) * len(records)
+    for i, fields in rest.items():
+        flags[i] = PARTIAL
+        if fields:
+            extra[i] = pool.refs([json.dumps(fields)])[0]
+    
+    parts = [_COUNT.pack(len(records)), flags.tobytes(), extra.tobytes()]
+    parts.extend(column.tobytes() for column in data)
+    return b''.join(parts)
+
+
+def write_snapshot(base_dir, showtimes, bookings):
+    """Anlık görüntüyü yaz (JSON dosyaları yazıldıktan sonra çağrılır)"""
+    pool = _Pool()
+    tables = [_encode_table(records, columns, pool)
+              for records, (_, columns) in zip((showtimes, bookings), TABLES)]
+    
+    sources = b''.join(_SOURCE.pack(size, mtime) for size, mtime in _source_stats(base_dir))
+    body = sources + pool.pack() + b''.join(tables)
+    header = _HEADER.pack(MAGIC, VERSION, _BYTEORDER, zlib.crc32(body), len(body))
+    
+    # Geçici dosyaya yazılıp yeniden adlandırılır: yarım görüntü okunmaz
+    path = snapshot_path(base_dir)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+    
+    def count(self):
+        (value,) = _COUNT.unpack_from(self.data, self.offset)
+        self.offset += _COUNT.size
+        return value
+    
+    def array(self, typecode, length, swap):
+        values = array(typecode)
+        end = self.offset + length * values.itemsize
+        values.frombytes(self.data[self.offset:end])
+        self.offset = end
+        if swap:
+            values.byteswap()
+        return values
+    
+    def bytes(self, length):
+        end = self.offset + length
+        value = self.data[self.offset:end].tobytes()
+        self.offset = end
+        return value
+
+
+def _decode_table(reader, columns, build, pool, swap):
+    rows = reader.count()
+    flags = reader.array('b', rows, swap)
+    extra = reader.array('i', rows, swap)
+    
+    values = []
+    for _, kind in columns:
+        if kind == FLOAT:
+            values.append(reader.array('d', rows, swap))   # NaN: eksik
+            continue
+        refs = reader.array('i', rows, swap)
+        if kind == STR:
+            values.append([pool[ref] for ref in refs])
+        elif kind == LIST:
+            values.append([_split(pool[ref]) for ref in refs])
+        else:
+            values.append([json.loads(pool[ref]) if ref >= 0 else _MISSING for ref in refs])
+    
+    records = build(values)
+    
+    # Eksik kolonlu veya ek alanlı satırlar düzeltilir
+    for i, flag in enumerate(flags):
+        if flag == COMPLETE:
+            continue
+        record = records[i]
+        for name, kind in columns:
+            value = record[name]
+            if value is _MISSING or (kind == FLOAT and math.isnan(value)):
+                del record[name]
+        if extra[i] >= 0:
+            record.update(json.loads(pool[extra[i]]))
+    return records
+
+
+def read_snapshot(base_dir):
+    """Geçerli anlık görüntüden (seanslar, rezervasyonlar) oku; geçersizse None"""
+    path = snapshot_path(base_dir)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, byteorder, checksum, length = _HEADER.unpack_from(data)
+    body = memoryview(data)[_HEADER.size:]
+    if magic != MAGIC or version != VERSION or len(body) != length:
+        return None
+    if zlib.crc32(body) != checksum:
+        return None
+    
+    # JSON dosyaları görüntüden sonra değiştiyse görüntü eskidir
+    sources = [_SOURCE.unpack_from(body, i * _SOURCE.size) for i in range(len(TABLES))]
+    if sources != _source_stats(base_dir):
+        return None
+    
+    reader = _Reader(body)
+    reader.offset = len(TABLES) * _SOURCE.size
+    
+    swap = byteorder != _BYTEORDER
+    lengths = reader.array('I', reader.count(), swap)
+    blob = reader.bytes(reader.count()).decode('utf-8')
+    ends = list(accumulate(lengths))
+    pool = [blob[start:end] for start, end in zip([0] + ends, ends)]
+    pool.append(_MISSING)   # ref -1: eksik kolon
+    
+    # Milyonlarca yeni nesne oluşurken çöp toplayıcı defalarca boşuna tarar
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        showtimes, bookings = [_decode_table(reader, columns, build, pool, swap)
+                               for (_, columns), build in zip(TABLES, _BUILDERS)]
+    finally:
+        if was_enabled:
+            gc.enable()
+    return showtimes, bookings
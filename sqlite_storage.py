@@ -0,0 +1,465 @@
+"""
+SQLite veri saklama modülü
+
+storage.py ile aynı load_state/save_state arayüzünü sunar; veriler
+data/cinema.db içinde movies, showtimes, seats ve bookings tablolarında
+tutulur. Rezervasyon ve iptaller tüm dosyayı yeniden yazmak yerine tek
+satırlık işlemlerle (transaction) kaydedilir.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import metrics
+from seating import decode_seat_map, mark_saved, export_layouts, import_layouts
+from storage import SeatMapCache, SEAT_MAP_CACHE_SIZE, record_file_size
+
+
+DB_FILE = 'cinema.db'
+
+LOAD_SECONDS = metrics.histogram('cinema_load_state_seconds', "Veri yükleme süresi (saniye)",
+                                 {'backend': 'sqlite'})
+SAVE_SECONDS = metrics.histogram('cinema_save_state_seconds',
+                                 "Kontrol noktası kaydetme süresi (saniye)", {'backend': 'sqlite'})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    movie_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    genre TEXT,
+    duration INTEGER,
+    rating TEXT,
+    description TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    extra TEXT
+);
+
+CREATE TABLE IF NOT EXISTS showtimes (
+    showtime_id TEXT PRIMARY KEY,
+    movie_id TEXT NOT NULL,
+    screen TEXT,
+    date TEXT,
+    time TEXT,
+    language TEXT,
+    pricing TEXT,
+    seat_config TEXT,
+    extra TEXT,
+    seat_version INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS seats (
+    showtime_id TEXT NOT NULL,
+    seat_code TEXT NOT NULL,
+    status TEXT NOT NULL,
+    zone TEXT,
+    row TEXT,
+    number INTEGER,
+    PRIMARY KEY (showtime_id, seat_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id TEXT PRIMARY KEY,
+    showtime_id TEXT NOT NULL,
+    seats TEXT NOT NULL,
+    customer_name TEXT,
+    customer_email TEXT,
+    customer_phone TEXT,
+    booking_date TEXT,
+    subtotal REAL,
+    discount REAL,
+    discount_type TEXT,
+    total REAL,
+    status TEXT NOT NULL,
+    cancelled_date TEXT,
+    extra TEXT
+);
+
+CREATE TABLE IF NOT EXISTS layouts (
+    layout_id TEXT PRIMARY KEY,
+    definition TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS screens (
+    screen TEXT PRIMARY KEY,
+    layout_id TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_bookings_showtime ON bookings (showtime_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_email ON bookings (customer_email);
+CREATE INDEX IF NOT EXISTS idx_bookings_date ON bookings (booking_date);
+CREATE INDEX IF NOT EXISTS idx_showtimes_movie ON showtimes (movie_id);
+"""
+
+MOVIE_COLUMNS = ['movie_id', 'title', 'genre', 'duration', 'rating', 'description', 'active']
+SHOWTIME_COLUMNS = ['showtime_id', 'movie_id', 'screen', 'date', 'time', 'language']
+BOOKING_COLUMNS = ['booking_id', 'showtime_id', 'customer_name', 'customer_email',
+                   'customer_phone', 'booking_date', 'subtotal', 'discount',
+                   'discount_type', 'total', 'status', 'cancelled_date']
+
+# Açık bağlantılar (veritabanı yolu -> bağlantı)
+_connections = {}
+
+# SQLite aynı anda tek yazıcıya izin verir; bağlantı iş parçacıkları
+# arasında paylaşıldığı için yazma işlemleri bu kilitle sıralanır
+_write_lock = threading.RLock()
+
+
+def db_path(base_dir):
+    """Veritabanı dosyasının yolunu al"""
+    return os.path.join(base_dir, DB_FILE)
+
+
+def connect(base_dir):
+    """Veritabanı bağlantısını aç (tablolar yoksa oluştur)"""
+    path = db_path(base_dir)
+    conn = _connections.get(path)
+    if conn is None:
+        os.makedirs(base_dir, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        # seat_version sonradan eklendi: eski veritabanlarında sütun oluşturulur
+        columns = [row['name'] for row in conn.execute('PRAGMA table_info(showtimes)')]
+        if 'seat_version' not in columns:
+            conn.execute('ALTER TABLE showtimes ADD COLUMN seat_version INTEGER')
+        _connections[path] = conn
+    return conn
+
+
+def close(base_dir):
+    """Veritabanı bağlantısını kapat"""
+    conn = _connections.pop(db_path(base_dir), None)
+    if conn is not None:
+        conn.close()
+
+
+def _extra(record, columns):
+    """Tablo kolonlarında olmayan alanları JSON olarak sakla"""
+    extra = {k: v for k, v in record.items() if k not in columns}
+    return json.dumps(extra) if extra else None
+
+
+def _with_extra(record, extra):
+    """Ek alanları kayda geri ekle"""
+    if extra:
+        record.update(json.loads(extra))
+    return record
+
+
+def load_movies(base_dir):
+    """Filmleri veritabanından yükle"""
+    conn = connect(base_dir)
+    movies = []
+    for row in conn.execute('SELECT * FROM movies ORDER BY rowid'):
+        movie = {column: row[column] for column in MOVIE_COLUMNS}
+        movie['active'] = bool(movie['active'])
+        movies.append(_with_extra(movie, row['extra']))
+    return movies
+
+
+def save_movies(base_dir, movies):
+    """Filmleri veritabanına kaydet"""
+    conn = connect(base_dir)
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO movies VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(m['movie_id'], m['title'], m.get('genre'), m.get('duration'),
+              m.get('rating'), m.get('description', ''), int(m.get('active', True)),
+              _extra(m, MOVIE_COLUMNS))
+             for m in movies]
+        )
+
+
+def load_state(base_dir, cache_size=SEAT_MAP_CACHE_SIZE):
+    """Tüm sistem verilerini yükle (koltuk haritaları ilk erişimde yüklenir)"""
+    start = time.perf_counter()
+    conn = connect(base_dir)
+    
+    import_layouts({
+        'layouts': [json.loads(row['definition'])
+                    for row in conn.execute('SELECT definition FROM layouts')],
+        'screens': {row['screen']: row['layout_id']
+                    for row in conn.execute('SELECT * FROM screens')}
+    })
+    
+    showtimes = []
+    for row in conn.execute('SELECT * FROM showtimes ORDER BY rowid'):
+        showtime = {column: row[column] for column in SHOWTIME_COLUMNS}
+        showtime['pricing'] = json.loads(row['pricing']) if row['pricing'] else {}
+        showtimes.append(_with_extra(showtime, row['extra']))
+    
+    # Koltuk haritaları ilk erişimde yüklenir
+    seat_maps = SeatMapCache(
+        [showtime['showtime_id'] for showtime in showtimes],
+        loader=lambda showtime_id: load_seat_map(conn, showtime_id),
+        writer=lambda showtime_id, seat_map: _write_seat_map(conn, showtime_id, seat_map),
+        capacity=cache_size,
+        source=db_path(base_dir)
+    )
+    
+    bookings = [_booking_from_row(row)
+                for row in conn.execute('SELECT * FROM bookings ORDER BY rowid')]
+    
+    LOAD_SECONDS.observe(time.perf_counter() - start)
+    return showtimes, seat_maps, bookings
+
+
+def load_seat_map(conn, showtime_id):
+    """Tek bir seansın koltuk haritasını yükle"""
+    row = conn.execute('SELECT seat_config, seat_version FROM showtimes WHERE showtime_id = ?',
+                       (showtime_id,)).fetchone()
+    if row is None or not row['seat_config']:
+        return None
+    
+    data = {'config': json.loads(row['seat_config'])}
+    if row['seat_version'] is not None:
+        data['version'] = row['seat_version']
+    data['seats'] = {seat['seat_code']: {'status': seat['status']}
+                     for seat in conn.execute('SELECT seat_code, status FROM seats '
+                                              'WHERE showtime_id = ?', (showtime_id,))}
+    seat_map = decode_seat_map(data)
+    seat_map.dirty = False
+    return seat_map
+
+
+def _write_seat_map(conn, showtime_id, seat_map):
+    """Tek bir seansın koltuk haritasını tek işlemde kaydet"""
+    snapshot = _seat_map_snapshot(showtime_id, seat_map)
+    with _write_lock, conn:
+        version = _save_seat_map_rows(conn, showtime_id, snapshot)
+    # Seans satırı henüz yoksa (kaydedilmemiş yeni seans) harita değişmiş
+    # kalır; önbellek onu bellekte tutar ve sonraki save_state'te yazılır
+    if version is not None:
+        mark_saved(seat_map, version)
+
+
+def _seat_map_snapshot(showtime_id, seat_map):
+    """Harita kilidi altında alınan görüntü: (sürüm, seat_config, koltuk satırları)
+    
+    Yazma kilidi (_write_lock) alınmadan önce çağrılır: rezervasyon motoru
+    seans kilidi tutarken günlüğe yazar, kilitler hep bu sırayla alınır.
+    """
+    with seat_map.lock:
+        return (seat_map.version, json.dumps(seat_map['config']),
+                _seat_rows(showtime_id, seat_map))
+
+
+def _save_seat_map_rows(conn, showtime_id, snapshot):
+    """Koltuk satırlarını yaz ve yazılan sürümü döndür (seans satırı yoksa None)"""
+    version, config, rows = snapshot
+    cursor = conn.execute(
+        'UPDATE showtimes SET seat_config = ?, seat_version = ? WHERE showtime_id = ?',
+        (config, version, showtime_id))
+    if not cursor.rowcount:
+        return None
+    conn.executemany('INSERT OR REPLACE INTO seats VALUES (?, ?, ?, ?, ?, ?)', rows)
+    return version
+
+
+def _booking_from_row(row):
+    """Veritabanı satırından rezervasyon sözlüğü oluştur"""
+    booking = {column: row[column] for column in BOOKING_COLUMNS}
+    booking['seats'] = json.loads(row['seats'])
+    if booking['cancelled_date'] is None:
+        del booking['cancelled_date']
+    return _with_extra(booking, row['extra'])
+
+
+def _showtime_row(showtime):
+    return (showtime['showtime_id'], showtime['movie_id'], showtime.get('screen'),
+            showtime.get('date'), showtime.get('time'), showtime.get('language'),
+            json.dumps(showtime.get('pricing', {})),
+            _extra(showtime, SHOWTIME_COLUMNS + ['pricing', 'seat_map']))
+
+
+def _seat_rows(showtime_id, seat_map):
+    # Tutmalar geçicidir: yeniden başlatmada koltuk müsait olarak yüklenir
+    return [(showtime_id, code, 'sold' if info['status'] == 'sold' else 'available',
+             info.get('zone'), info.get('row'), info.get('number'))
+            for code, info in seat_map['seats'].items()]
+
+
+def _booking_row(booking):
+    return (booking['booking_id'], booking['showtime_id'], json.dumps(booking['seats']),
+            booking.get('customer_name'), booking.get('customer_email'),
+            booking.get('customer_phone', ''), booking.get('booking_date'),
+            booking.get('subtotal'), booking.get('discount'), booking.get('discount_type'),
+            booking.get('total'), booking['status'], booking.get('cancelled_date'),
+            _extra(booking, BOOKING_COLUMNS + ['seats']))
+
+
+def save_state(base_dir, showtimes, seat_maps, bookings, changed=None, removed=()):
+    """Tüm sistem verilerini tek bir işlemde kaydet
+    
+    Bu veritabanından yüklenmiş önbellekte yalnızca değişen koltuk
+    haritaları yazılır. changed: değişen listeler ('showtimes', 'bookings');
+    None ise ikisi de yazılır (bkz. storage.save_state).
+    
+    bookings yazılacak rezervasyon satırlarıdır: main yalnızca son kontrol
+    noktasından beri değişenleri verir (SqliteJournal bunları zaten satır
+    satır yazmıştır); aktarımda tüm liste verilir. removed: silinecek
+    rezervasyon ID'leri.
+    """
+    start = time.perf_counter()
+    if changed is None:
+        changed = ('showtimes', 'bookings')
+    conn = connect(base_dir)
+    layouts = export_layouts()
+    own_cache = isinstance(seat_maps, SeatMapCache) and seat_maps.source == db_path(base_dir)
+    snapshots = [] if own_cache else [(showtime_id, _seat_map_snapshot(showtime_id, seat_map))
+                                      for showtime_id, seat_map in seat_maps.items()]
+    
+    with _write_lock, conn:
+        conn.executemany('INSERT OR REPLACE INTO layouts VALUES (?, ?)',
+                         [(d['layout_id'], json.dumps(d)) for d in layouts['layouts']])
+        conn.executemany('INSERT OR REPLACE INTO screens VALUES (?, ?)',
+                         list(layouts['screens'].items()))
+        
+        # seat_config yalnızca koltuk haritası yazılırken güncellenir
+        if 'showtimes' in changed:
+            conn.executemany(
+                """INSERT INTO showtimes (showtime_id, movie_id, screen, date, time, language,
+                                          pricing, extra)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (showtime_id) DO UPDATE SET
+                       movie_id = excluded.movie_id, screen = excluded.screen,
+                       date = excluded.date, time = excluded.time,
+                       language = excluded.language, pricing = excluded.pricing,
+                       extra = excluded.extra""",
+                [_showtime_row(showtime) for showtime in showtimes]
+            )
+        
+        for showtime_id, snapshot in snapshots:
+            _save_seat_map_rows(conn, showtime_id, snapshot)
+        
+        if 'bookings' in changed:
+            conn.executemany('DELETE FROM bookings WHERE booking_id = ?',
+                             [(booking_id,) for booking_id in removed])
+            conn.executemany(
+                'INSERT OR REPLACE INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [_booking_row(b) for b in bookings]
+            )
+    
+    if own_cache:
+        seat_maps.flush()
+    
+    SAVE_SECONDS.observe(time.perf_counter() - start)
+    record_file_size(db_path(base_dir))
+
+
+def backup_state(base_dir, backup_dir):
+    """Veritabanının tutarlı bir yedeğini al"""
+    os.makedirs(backup_dir, exist_ok=True)
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    destination = os.path.join(backup_dir, f"cinema_{timestamp}.db")
+    
+    target = sqlite3.connect(destination)
+    try:
+        connect(base_dir).backup(target)
+    finally:
+        target.close()
+    
+    return [destination]
+
+
+class SqliteJournal:
+    """Rezervasyon değişikliklerini tek satırlık işlemlerle yaz
+    
+    storage.BookingJournal ile aynı arayüze sahiptir; veritabanı zaten
+    kalıcı olduğundan kontrol noktası gerekmez (records hep 0 kalır).
+    """
+    
+    def __init__(self, base_dir):
+        self.conn = connect(base_dir)
+        self.records = 0
+    
+    def record_booking(self, booking):
+        """Rezervasyonu ve koltuklarını tek işlemde kaydet"""
+        with _write_lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                _booking_row(booking)
+            )
+            self.conn.executemany(
+                'UPDATE seats SET status = ? WHERE showtime_id = ? AND seat_code = ?',
+                [('sold', booking['showtime_id'], code) for code in booking['seats']]
+            )
+    
+    def record_bookings(self, bookings):
+        """Toplu rezervasyonları tek işlemde kaydet"""
+        with _write_lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [_booking_row(booking) for booking in bookings]
+            )
+            # Yazılmadan önce iptal edilmiş rezervasyonun koltukları bırakılmıştır
+            self.conn.executemany(
+                'UPDATE seats SET status = ? WHERE showtime_id = ? AND seat_code = ?',
+                [('sold', booking['showtime_id'], code)
+                 for booking in bookings if booking['status'] != 'cancelled'
+                 for code in booking['seats']]
+            )
+    
+    def record_cancellation(self, booking):
+        """İptali ve serbest kalan koltukları tek işlemde kaydet"""
+        with _write_lock, self.conn:
+            self.conn.execute(
+                'UPDATE bookings SET status = ?, cancelled_date = ? WHERE booking_id = ?',
+                (booking['status'], booking.get('cancelled_date'), booking['booking_id'])
+            )
+            self.conn.executemany(
+                'UPDATE seats SET status = ? WHERE showtime_id = ? AND seat_code = ?',
+                [('available', booking['showtime_id'], code) for code in booking['seats']]
+            )
+    
+    def sync(self):
+        """Her işlem zaten commit edildi"""
+    
+    def mark(self):
+        """Veritabanında günlük yok"""
+        return None
+    
+    def reset(self, mark=None):
+        """Veritabanında günlük yok"""
+    
+    def close(self):
+        """Bağlantı modül düzeyinde paylaşılır; close() ile kapatılır"""
+
+
+def migrate_from_json(base_dir, target_dir=None):
+    """data/*.json dosyalarını SQLite veritabanına aktar (tek seferlik)
+    
+    Kaynak klasör yalnızca okunur (bkz. storage.read_state).
+    """
+    from movies import load_movies as load_movies_json
+    from storage import read_state
+    
+    target_dir = target_dir or base_dir
+    
+    movies = load_movies_json(os.path.join(base_dir, 'movies.json'))
+    showtimes, seat_maps, bookings = read_state(base_dir)
+    
+    save_movies(target_dir, movies)
+    save_state(target_dir, showtimes, seat_maps, bookings)
+    
+    return {
+        'movies': len(movies),
+        'showtimes': len(showtimes),
+        'bookings': len(bookings),
+        'database': db_path(target_dir)
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    
+    source_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    result = migrate_from_json(source_dir)
+    print(f"{result['movies']} film, {result['showtimes']} seans, "
+          f"{result['bookings']} rezervasyon aktarıldı: {result['database']}")
@@ -4,8 +4,37 @@ Veri kaydetme ve yükleme modülü
 
 import json
 import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime
 import shutil
+from seating import (encode_seat_map, decode_seat_map, mark_saved, reserve_seat, release_seat,
+                     is_seat_available, export_layouts, import_layouts)
+from repository import update_record
+from snapshot import read_snapshot, write_snapshot
+import metrics
+
+
+JOURNAL_FILE = 'journal.jsonl'
+LAYOUTS_FILE = 'layouts.json'
+SEAT_MAPS_DIR = 'seat_maps'
+
+# Bellekte aynı anda tutulacak en fazla koltuk haritası
+SEAT_MAP_CACHE_SIZE = 128
+
+LOAD_SECONDS = metrics.histogram('cinema_load_state_seconds', "Veri yükleme süresi (saniye)",
+                                 {'backend': 'json'})
+SAVE_SECONDS = metrics.histogram('cinema_save_state_seconds',
+                                 "Kontrol noktası kaydetme süresi (saniye)", {'backend': 'json'})
+SEAT_MAPS_IN_MEMORY = metrics.gauge('cinema_seat_maps_in_memory',
+                                    "Önbellekte tutulan koltuk haritası sayısı")
+SEAT_MAP_LOADS = metrics.counter('cinema_seat_map_loads_total',
+                                 "Diskten yüklenen koltuk haritası sayısı")
+
+# Son yazılan/okunan salon düzenleri (dosya yolu -> içerik)
+_saved_layouts = {}
 
 
 def load_json(filepath):
@@ -17,42 +46,317 @@ def load_json(filepath):
         return json.load(f)
 
 
-def save_json(filepath, data):
-    """Veriyi JSON dosyasına kaydet"""
+def save_json(filepath, data, indent=2):
+    """Veriyi JSON dosyasına kaydet
+    
+    Geçici dosyaya yazılıp diske işlendikten (fsync) sonra asıl dosyanın
+    yerine konur: yarım kalan bir yazma mevcut dosyayı bozmaz.
+    indent=None ile kompakt yazılır.
+    """
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
 
 
-def load_state(base_dir):
-    """Tüm sistem verilerini yükle"""
+def load_state(base_dir, cache_size=SEAT_MAP_CACHE_SIZE):
+    """Tüm sistem verilerini yükle
+    
+    JSON dosyaları son kontrol noktasını (checkpoint) tutar; ardından
+    günlükteki (journal) rezervasyon ve iptal kayıtları yeniden oynatılır.
+    Koltuk haritaları ilk erişimde yüklenir (bkz. SeatMapCache).
+    
+    Seanslar ve rezervasyonlar geçerli bir ikili anlık görüntü varsa
+    oradan okunur (bkz. snapshot.py); yoksa JSON okunur ve görüntü
+    bir sonraki başlangıç için yazılır.
+    """
+    start = time.perf_counter()
     showtimes_path = os.path.join(base_dir, 'showtimes.json')
     bookings_path = os.path.join(base_dir, 'bookings.json')
     
-    showtimes = load_json(showtimes_path)
-    bookings = load_json(bookings_path)
+    # Salon düzenleri koltuk haritalarından önce yüklenmeli
+    load_layouts(base_dir)
     
-    # Koltuk haritalarını seanslardan çıkar
-    seat_maps = {}
+    snapshot = read_snapshot(base_dir)
+    if snapshot is not None:
+        showtimes, bookings = snapshot
+    else:
+        showtimes = load_json(showtimes_path)
+        bookings = load_json(bookings_path)
+        if showtimes or bookings:
+            try:
+                write_snapshot(base_dir, showtimes, bookings)
+            except OSError:
+                pass  # Salt okunur klasör: JSON ile devam edilir
+    
+    seat_maps = SeatMapCache(
+        [showtime['showtime_id'] for showtime in showtimes],
+        loader=lambda showtime_id: load_seat_map(base_dir, showtime_id),
+        writer=lambda showtime_id, seat_map: save_seat_map(base_dir, showtime_id, seat_map),
+        capacity=cache_size,
+        source=os.path.abspath(base_dir)
+    )
+    
+    # Eski biçim: koltuk haritası seans kaydının içinde. Yeni biçimde bir kez
+    # yazılır; sonraki kayıtlar yalnızca değişen dosyaları yazar.
+    legacy = False
     for showtime in showtimes:
-        if 'showtime_id' in showtime and 'seat_map' in showtime:
-            seat_maps[showtime['showtime_id']] = showtime['seat_map']
+        if 'seat_map' in showtime:
+            seat_map = decode_seat_map(showtime.pop('seat_map'))
+            seat_map.dirty = True
+            seat_maps[showtime['showtime_id']] = seat_map
+            legacy = True
+    if legacy:
+        save_state(base_dir, showtimes, seat_maps, bookings)
     
+    replay_journal(os.path.join(base_dir, JOURNAL_FILE), seat_maps, bookings)
+    
+    LOAD_SECONDS.observe(time.perf_counter() - start)
     return showtimes, seat_maps, bookings
 
 
-def save_state(base_dir, showtimes, seat_maps, bookings):
-    """Tüm sistem verilerini kaydet"""
-    # Koltuk haritalarını seanslara ekle
+def read_state(base_dir):
+    """Verileri klasöre hiç yazmadan oku (ör. başka saklama türüne aktarım)
+    
+    load_state'ten farkı: ikili anlık görüntü yazılmaz, eski biçimdeki seans
+    dosyası dönüştürülmez ve günlük yalnızca bellekte oynatılır. Koltuk
+    haritaları sözlük olarak hep birlikte yüklenir.
+    """
+    layouts_path = os.path.join(base_dir, LAYOUTS_FILE)
+    if os.path.exists(layouts_path):
+        import_layouts(load_json(layouts_path))
+    
+    showtimes = load_json(os.path.join(base_dir, 'showtimes.json'))
+    bookings = load_json(os.path.join(base_dir, 'bookings.json'))
+    
+    seat_maps = {}
     for showtime in showtimes:
-        if showtime['showtime_id'] in seat_maps:
-            showtime['seat_map'] = seat_maps[showtime['showtime_id']]
+        showtime_id = showtime['showtime_id']
+        if 'seat_map' in showtime:
+            seat_maps[showtime_id] = decode_seat_map(showtime.pop('seat_map'))
+        else:
+            seat_map = load_seat_map(base_dir, showtime_id)
+            if seat_map is not None:
+                seat_maps[showtime_id] = seat_map
+    
+    replay_journal(os.path.join(base_dir, JOURNAL_FILE), seat_maps, bookings)
+    return showtimes, seat_maps, bookings
+
+
+def save_state(base_dir, showtimes, seat_maps, bookings, changed=None):
+    """Tüm sistem verilerini kaydet
+    
+    Seans bilgileri showtimes.json'a, koltuk haritaları seans başına ayrı
+    dosyalara (seat_maps/<seans_id>.json) yazılır. Yalnızca değişen
+    (dirty) veya henüz yazılmamış koltuk haritaları yazılır.
+    
+    changed: değişen listeler ('showtimes', 'bookings'); None ise ikisi de
+    yazılır. Değişmeyen listenin dosyasına dokunulmaz.
+    """
+    start = time.perf_counter()
+    if changed is None:
+        changed = ('showtimes', 'bookings')
     
     showtimes_path = os.path.join(base_dir, 'showtimes.json')
     bookings_path = os.path.join(base_dir, 'bookings.json')
     
-    save_json(showtimes_path, showtimes)
-    save_json(bookings_path, bookings)
+    save_layouts(base_dir)
+    
+    if changed:
+        records = [{key: value for key, value in showtime.items() if key != 'seat_map'}
+                   for showtime in showtimes]
+        if 'showtimes' in changed:
+            save_json(showtimes_path, records)
+        if 'bookings' in changed:
+            save_json(bookings_path, bookings)
+        # JSON dosyalarından sonra yazılır: görüntü bu dosyaların boyut ve zamanını kaydeder
+        write_snapshot(base_dir, records, bookings)
+    
+    if isinstance(seat_maps, SeatMapCache) and seat_maps.source == os.path.abspath(base_dir):
+        seat_maps.flush()
+    else:
+        for showtime_id, seat_map in seat_maps.items():
+            if seat_map.dirty or not os.path.exists(seat_map_path(base_dir, showtime_id)):
+                save_seat_map(base_dir, showtime_id, seat_map)
+    
+    SAVE_SECONDS.observe(time.perf_counter() - start)
+    for path in (showtimes_path, bookings_path):
+        record_file_size(path)
+
+
+def load_layouts(base_dir):
+    """Kaydedilmiş salon düzenlerini yükle"""
+    layouts_path = os.path.join(base_dir, LAYOUTS_FILE)
+    if os.path.exists(layouts_path):
+        layouts = load_json(layouts_path)
+        import_layouts(layouts)
+        _saved_layouts[os.path.abspath(layouts_path)] = layouts
+
+
+def save_layouts(base_dir):
+    """Salon düzenlerini kaydet (son yazılanla aynıysa dosyaya dokunulmaz)"""
+    layouts_path = os.path.abspath(os.path.join(base_dir, LAYOUTS_FILE))
+    layouts = export_layouts()
+    if _saved_layouts.get(layouts_path) != layouts or not os.path.exists(layouts_path):
+        save_json(layouts_path, layouts)
+        _saved_layouts[layouts_path] = layouts
+
+
+def record_file_size(path):
+    """Veri dosyasının boyutunu ölçümlere yaz"""
+    if os.path.exists(path):
+        metrics.gauge('cinema_data_file_bytes', "Veri dosyası boyutu (bayt)",
+                      {'file': os.path.basename(path)}).set(os.path.getsize(path))
+
+
+def seat_map_path(base_dir, showtime_id):
+    """Seansın koltuk haritası dosyasının yolunu al"""
+    return os.path.join(base_dir, SEAT_MAPS_DIR, f"{showtime_id}.json")
+
+
+def load_seat_map(base_dir, showtime_id):
+    """Tek bir seansın koltuk haritasını yükle"""
+    path = seat_map_path(base_dir, showtime_id)
+    if not os.path.exists(path):
+        return None
+    return decode_seat_map(load_json(path))
+
+
+def save_seat_map(base_dir, showtime_id, seat_map):
+    """Tek bir seansın koltuk haritasını kaydet"""
+    data = encode_seat_map(seat_map)
+    save_json(seat_map_path(base_dir, showtime_id), data)
+    mark_saved(seat_map, data['version'])
+
+
+class SeatMapCache:
+    """Koltuk haritaları için LRU önbellek
+    
+    Seans ID'leri baştan bilinir ancak haritalar ilk erişimde yüklenir.
+    Önbellek doluysa en uzun süredir kullanılmayan harita çıkarılır;
+    değişmişse (dirty) çıkarılmadan önce diske yazılır. Sözlük gibi
+    kullanılır: seat_maps.get(seans_id), seat_maps[seans_id] = harita.
+    
+    source, haritaların yüklendiği yeri (klasör veya veritabanı) belirtir;
+    save_state yalnızca aynı yere kaydederken flush() ile yetinir.
+    """
+    
+    def __init__(self, showtime_ids, loader, writer, capacity=SEAT_MAP_CACHE_SIZE,
+                 source=None):
+        self.loader = loader
+        self.writer = writer
+        self.capacity = capacity
+        self.source = source
+        self._ids = dict.fromkeys(showtime_ids)
+        self._cache = OrderedDict()
+        # Önbellekten çıkmış ama hâlâ kullanılan haritalar (aynı seans için
+        # bellekte iki ayrı kopya oluşmaması için)
+        self._evicted = weakref.WeakValueDictionary()
+        # Çıkarılırken yazılamamış değişmiş haritalar (ör. henüz kaydedilmemiş
+        # yeni seans); flush() yazana kadar bellekte tutulur
+        self._unsaved = {}
+        self._lock = threading.RLock()
+    
+    def get(self, showtime_id, default=None):
+        with self._lock:
+            seat_map = self._cache.get(showtime_id)
+            if seat_map is not None:
+                self._cache.move_to_end(showtime_id)
+                return seat_map
+            
+            if showtime_id not in self._ids:
+                return default
+            
+            seat_map = self._unsaved.pop(showtime_id, None)
+            if seat_map is None:
+                seat_map = self._evicted.pop(showtime_id, None)
+            if seat_map is None:
+                seat_map = self.loader(showtime_id)
+                if seat_map is None:
+                    return default
+                SEAT_MAP_LOADS.inc()
+            
+            self._put(showtime_id, seat_map)
+            return seat_map
+    
+    def __getitem__(self, showtime_id):
+        seat_map = self.get(showtime_id)
+        if seat_map is None:
+            raise KeyError(showtime_id)
+        return seat_map
+    
+    def __setitem__(self, showtime_id, seat_map):
+        with self._lock:
+            self._ids[showtime_id] = None
+            self._evicted.pop(showtime_id, None)
+            self._unsaved.pop(showtime_id, None)
+            self._put(showtime_id, seat_map)
+    
+    def __delitem__(self, showtime_id):
+        with self._lock:
+            del self._ids[showtime_id]
+            self._cache.pop(showtime_id, None)
+            self._evicted.pop(showtime_id, None)
+            self._unsaved.pop(showtime_id, None)
+    
+    def __contains__(self, showtime_id):
+        return showtime_id in self._ids
+    
+    def __iter__(self):
+        return iter(list(self._ids))
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def keys(self):
+        return list(self._ids)
+    
+    def items(self):
+        """(seans ID, harita) çiftleri; haritalar sırayla yüklenir"""
+        for showtime_id in list(self._ids):
+            seat_map = self.get(showtime_id)
+            if seat_map is not None:
+                yield showtime_id, seat_map
+    
+    def values(self):
+        for _, seat_map in self.items():
+            yield seat_map
+    
+    @property
+    def resident(self):
+        """Bellekteki harita sayısı"""
+        return len(self._cache)
+    
+    def _put(self, showtime_id, seat_map):
+        self._cache[showtime_id] = seat_map
+        self._cache.move_to_end(showtime_id)
+        
+        while len(self._cache) > self.capacity:
+            old_id, old_map = self._cache.popitem(last=False)
+            if old_map.dirty:
+                self.writer(old_id, old_map)
+            if old_map.dirty:
+                self._unsaved[old_id] = old_map
+            else:
+                self._evicted[old_id] = old_map
+        
+        SEAT_MAPS_IN_MEMORY.set(len(self._cache))
+    
+    def flush(self):
+        """Değişmiş tüm haritaları diske yaz"""
+        with self._lock:
+            pending = (list(self._cache.items()) + list(self._evicted.items())
+                       + list(self._unsaved.items()))
+            for showtime_id, seat_map in pending:
+                if seat_map.dirty:
+                    self.writer(showtime_id, seat_map)
+            for showtime_id, seat_map in list(self._unsaved.items()):
+                if not seat_map.dirty:
+                    del self._unsaved[showtime_id]
+                    self._evicted[showtime_id] = seat_map
 
 
 def backup_state(base_dir, backup_dir):
@@ -62,14 +366,230 @@ def backup_state(base_dir, backup_dir):
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_files = []
     
-    files_to_backup = ['movies.json', 'showtimes.json', 'bookings.json']
+    files_to_backup = ['movies.json', 'showtimes.json', 'bookings.json', LAYOUTS_FILE,
+                       JOURNAL_FILE]
     
     for filename in files_to_backup:
         source = os.path.join(base_dir, filename)
         if os.path.exists(source):
-            backup_name = f"{filename.replace('.json', '')}_{timestamp}.json"
+            name, extension = os.path.splitext(filename)
+            backup_name = f"{name}_{timestamp}{extension}"
             destination = os.path.join(backup_dir, backup_name)
             shutil.copy2(source, destination)
             backup_files.append(destination)
     
+    seat_maps_dir = os.path.join(base_dir, SEAT_MAPS_DIR)
+    if os.path.isdir(seat_maps_dir):
+        destination = os.path.join(backup_dir, f"{SEAT_MAPS_DIR}_{timestamp}")
+        shutil.copytree(seat_maps_dir, destination)
+        backup_files.append(destination)
+    
     return backup_files
+
+
+class BookingJournal:
+    """Rezervasyon günlüğü (write-ahead journal)
+    
+    Her rezervasyon ve iptal, günlük dosyasına tek satırlık kompakt bir
+    JSON kaydı olarak eklenir. Kayıtlar her eklemede işletim sistemine
+    yazılır; fsync ise grup halinde (sync_every kayıtta veya sync_interval
+    saniyede bir) yapılır. Yeni kayıt gelmese de bekleyen kayıtlar bir
+    zamanlayıcıyla en geç sync_interval saniye sonra fsync edilir. Tam JSON
+    dosyaları periyodik kontrol noktasıdır.
+    
+    Birden fazla iş parçacığından (thread) güvenle çağrılabilir.
+    """
+    
+    def __init__(self, base_dir, sync_every=16, sync_interval=1.0):
+        self.path = os.path.join(base_dir, JOURNAL_FILE)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer = None
+        
+        os.makedirs(base_dir, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.records = count_journal_records(self.path)
+    
+    def append(self, record):
+        """Günlüğe bir kayıt ekle"""
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.records += 1
+            self.unsynced += 1
+            
+            # Grup commit: fsync'i birden fazla kayıt için bir kez yap
+            if (self.unsynced >= self.sync_every or
+                    time.monotonic() - self.last_sync >= self.sync_interval):
+                self._sync()
+            elif self._timer is None:
+                # Sonraki kayıt gelmezse bekleyenler zamanlayıcıyla yazılır
+                self._timer = threading.Timer(self.sync_interval, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def record_booking(self, booking):
+        """Yeni rezervasyonu günlüğe yaz"""
+        self.append({'op': 'book', 'booking': booking})
+    
+    def record_bookings(self, bookings):
+        """Toplu rezervasyonları tek yazma ve tek fsync ile günlüğe yaz"""
+        lines = ''.join(json.dumps({'op': 'book', 'booking': booking},
+                                   separators=(',', ':'), ensure_ascii=False) + '\n'
+                        for booking in bookings)
+        with self._lock:
+            self._file.write(lines)
+            self.records += len(bookings)
+            self.unsynced += len(bookings)
+            self._sync()
+    
+    def record_cancellation(self, booking):
+        """Rezervasyon iptalini günlüğe yaz"""
+        self.append({
+            'op': 'cancel',
+            'booking_id': booking['booking_id'],
+            'cancelled_date': booking.get('cancelled_date')
+        })
+    
+    def sync(self):
+        """Bekleyen kayıtları diske kalıcı olarak yaz (fsync)"""
+        with self._lock:
+            self._sync()
+    
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            if self.unsynced and not self._file.closed:
+                self._sync()
+    
+    def _sync(self):
+        if self.unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+    
+    def mark(self):
+        """Günlüğün şu anki sonu (kontrol noktası verisi kopyalanmadan önce alınır)"""
+        with self._lock:
+            self._file.flush()
+            return self._file.tell(), self.records
+    
+    def reset(self, mark=None):
+        """Kontrol noktasından sonra günlüğü boşalt
+        
+        mark verilirse (bkz. mark()) yalnızca o noktaya kadarki kayıtlar
+        silinir: kontrol noktası arka planda yazılırken eklenen kayıtlar
+        geçici dosya + yeniden adlandırma ile korunur.
+        """
+        with self._lock:
+            self._file.flush()
+            if mark is None or mark[0] >= self._file.tell():
+                self._file.truncate(0)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.records = 0
+            else:
+                offset, records = mark
+                with open(self.path, 'rb') as f:
+                    f.seek(offset)
+                    tail = f.read()
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._file.close()
+                os.replace(tmp_path, self.path)
+                self._file = open(self.path, 'a', encoding='utf-8')
+                self.records -= records
+            self.unsynced = 0
+            self.last_sync = time.monotonic()
+    
+    def close(self):
+        """Günlüğü kapat"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+def count_journal_records(path):
+    """Günlükteki kayıt sayısını al"""
+    if not os.path.exists(path):
+        return 0
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def read_journal(path):
+    """Günlük kayıtlarını sırayla oku
+    
+    Yarım yazılmış son satır (ör. çökme sırasında) yok sayılır.
+    """
+    if not os.path.exists(path):
+        return
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                break
+
+
+def replay_journal(path, seat_maps, bookings):
+    """Günlükteki kayıtları kontrol noktası verisine uygula
+    
+    Oynatma idempotenttir: kontrol noktasında zaten bulunan rezervasyonlar
+    ve iptaller tekrar uygulanmaz.
+    """
+    by_id = {b['booking_id']: b for b in bookings}
+    applied = 0
+    
+    for record in read_journal(path):
+        op = record.get('op')
+        
+        if op == 'book':
+            booking = record['booking']
+            if booking['booking_id'] in by_id:
+                continue
+            
+            seat_map = seat_maps.get(booking['showtime_id'])
+            if seat_map and booking['status'] != 'cancelled':
+                for seat_code in booking['seats']:
+                    if is_seat_available(seat_map, seat_code):
+                        reserve_seat(seat_map, seat_code)
+            
+            bookings.append(booking)
+            by_id[booking['booking_id']] = booking
+            applied += 1
+        
+        elif op == 'cancel':
+            booking = by_id.get(record['booking_id'])
+            if not booking or booking['status'] == 'cancelled':
+                continue
+            
+            seat_map = seat_maps.get(booking['showtime_id'])
+            if seat_map:
+                for seat_code in booking['seats']:
+                    release_seat(seat_map, seat_code)
+            
+            update_record(bookings, booking, {
+                'status': 'cancelled',
+                'cancelled_date': record.get('cancelled_date')
+            })
+            applied += 1
+    
+    return applied
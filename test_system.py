@@ -4,9 +4,45 @@ Sinema Bilet Sistemi Test Dosyası
 
 import unittest
 import os
+import tempfile
+import json
+import gzip
+import threading
+import asyncio
+import http.client
+import socket
+import time
+import pstats
+import subprocess
+import sys
 from movies import add_movie, schedule_showtime, list_showtimes
 from seating import initialize_seat_map, is_seat_available, reserve_seat, release_seat, get_seat_zone
+from seating import encode_seat_map, decode_seat_map, get_seat_count_by_status, get_zone_counts
+from seating import register_screen, render_seat_map, validate_seat_code, find_best_seats
+from seating import changes_since, CHANGE_LOG_SIZE
 from bookings import create_booking, cancel_booking, calculate_booking_total
+from bookings import get_booking, list_customer_bookings
+from movies import get_movie, get_showtime
+from repository import Repository, IndexedList
+from reports import revenue_summary
+import reports
+import bookings as bookings_module
+import analytics
+from analytics import booking_columns
+from booking_engine import BookingEngine
+from storage import load_state, save_state, load_json, BookingJournal, count_journal_records
+from storage import read_journal, replay_journal
+import sqlite_storage
+import sharded_storage
+import snapshot
+import replay
+import server
+import main
+import profiling
+import metrics
+import persistence
+from benchmarks import suite as bench_suite
+from benchmarks.datagen import generate_dataset
 from validation import validate_email, validate_phone, validate_date, validate_time, validate_name
 
 
@@ -74,6 +110,158 @@ class TestSeating(unittest.TestCase):
         # Diğer sıralar standart olmalı
         self.assertEqual(get_seat_zone(self.seat_map, 'C5'), 'standard')
         self.assertEqual(get_seat_zone(self.seat_map, 'H12'), 'standard')
+    
+    def test_changes_since(self):
+        """Sürümden sonraki fark kompakt döner; günlükten düşen sürüm tam görüntü alır"""
+        start = self.seat_map.version
+        reserve_seat(self.seat_map, 'A1')
+        reserve_seat(self.seat_map, 'A2')
+        release_seat(self.seat_map, 'A1')
+        
+        delta = changes_since(self.seat_map, start)
+        self.assertEqual(delta, {'version': start + 3,
+                                 'changes': {'A1': 'available', 'A2': 'sold'}})
+        self.assertEqual(changes_since(self.seat_map, start + 3)['changes'], {})
+        
+        for _ in range(CHANGE_LOG_SIZE // 2):
+            reserve_seat(self.seat_map, 'H12')
+            release_seat(self.seat_map, 'H12')
+        snapshot = changes_since(self.seat_map, start)
+        self.assertNotIn('changes', snapshot)
+        self.assertEqual(snapshot['snapshot'][:2], '01')
+        self.assertEqual(len(changes_since(self.seat_map, start + 3)['changes']), 1)
+        
+        # Diskten yüklenen harita eski sürümleri bilmez
+        saved = encode_seat_map(self.seat_map)
+        restored = decode_seat_map(saved)
+        self.assertGreater(restored.version, self.seat_map.version)
+        self.assertIn('snapshot', changes_since(restored, self.seat_map.version))
+        
+        # Kaydedildikten sonra verilen sürüm de yeniden yüklemede kullanılmaz (çökme)
+        reserve_seat(self.seat_map, 'H1')
+        self.assertGreater(decode_seat_map(saved).version, self.seat_map.version)
+    
+    def test_compact_encoding(self):
+        """Kompakt disk biçimi durumları korur"""
+        reserve_seat(self.seat_map, 'A1')
+        reserve_seat(self.seat_map, 'H12')
+        
+        encoded = encode_seat_map(self.seat_map)
+        self.assertEqual(len(encoded['status']), 96)
+        
+        decoded = decode_seat_map(encoded)
+        self.assertFalse(is_seat_available(decoded, 'A1'))
+        self.assertFalse(is_seat_available(decoded, 'H12'))
+        self.assertEqual(get_seat_count_by_status(decoded), {'available': 94, 'sold': 2, 'held': 0})
+    
+    def test_find_best_seats(self):
+        """En iyi blok ortalanır ve rezervasyonlar boş koltuk yapısını günceller"""
+        seat_map = initialize_seat_map()
+        
+        block = find_best_seats(seat_map, 4)
+        self.assertEqual(block, ['D5', 'D6', 'D7', 'D8'])
+        for seat in block:
+            reserve_seat(seat_map, seat)
+        self.assertNotEqual(find_best_seats(seat_map, 4), block)
+        
+        release_seat(seat_map, 'D6')
+        self.assertIn('D6', find_best_seats(seat_map, 1))
+        self.assertEqual(find_best_seats(seat_map, 97), [])
+    
+    def test_zone_counters(self):
+        """Bölge sayaçları durum değişiklikleriyle güncellenir ve kaydedilir"""
+        seat_map = initialize_seat_map()
+        reserve_seat(seat_map, 'A1')
+        reserve_seat(seat_map, 'C1')
+        reserve_seat(seat_map, 'C2')
+        release_seat(seat_map, 'C2')
+        seat_map['seats']['D4']['status'] = 'held'
+        
+        zones = get_zone_counts(seat_map)
+        self.assertEqual(zones['premium'], {'available': 23, 'sold': 1, 'held': 0})
+        self.assertEqual(zones['standard'], {'available': 70, 'sold': 1, 'held': 1})
+        
+        # Kaydedilen sayaçlar yüklemede koltuklar sayılmadan kullanılır
+        restored = decode_seat_map(encode_seat_map(seat_map))
+        self.assertEqual(get_seat_count_by_status(restored),
+                         {'available': 94, 'sold': 2, 'held': 0})
+        self.assertEqual(get_zone_counts(restored)['standard'],
+                         {'available': 71, 'sold': 1, 'held': 0})
+    
+    def test_legacy_dict_format(self):
+        """Eski sözlük biçimindeki koltuk haritası yüklenebilir"""
+        legacy = {
+            'config': dict(self.seat_map['config']),
+            'seats': {code: dict(info) for code, info in self.seat_map['seats'].items()}
+        }
+        legacy['seats']['B4']['status'] = 'sold'
+        
+        seat_map = decode_seat_map(legacy)
+        self.assertFalse(is_seat_available(seat_map, 'B4'))
+        self.assertEqual(seat_map['seats']['B4'], legacy['seats']['B4'])
+
+
+class TestLayouts(unittest.TestCase):
+    """Salon düzeni testleri"""
+    
+    def setUp(self):
+        """Koridorlu, boşluklu küçük bir salon tanımla"""
+        self.layout = register_screen('Test Salonu', {
+            'layout_id': 'test-5x10',
+            'rows': 5,
+            'seats_per_row': 10,
+            'premium_rows': ['E'],
+            'aisles': [5],
+            'gaps': ['A1', 'A10'],
+            'accessible': ['A2']
+        })
+    
+    def test_layout_shape(self):
+        """Boşluklar koltuk sayısından düşülür, koridor koordinatları kaydırır"""
+        self.assertEqual(self.layout.capacity, 48)
+        self.assertNotIn('A1', self.layout.index)
+        self.assertEqual(self.layout.coords[self.layout.index['B5']], (4, 1))
+        self.assertEqual(self.layout.coords[self.layout.index['B6']], (6, 1))
+        
+        with self.assertRaises(AttributeError):
+            self.layout.codes = ()
+    
+    def test_showtimes_share_layout(self):
+        """Aynı salondaki seanslar aynı düzen nesnesini kullanır"""
+        showtimes = []
+        for time in ('14:00', '18:00'):
+            schedule_showtime(showtimes, {
+                'movie_id': 'film-1',
+                'screen': 'Test Salonu',
+                'date': '2025-01-20',
+                'time': time
+            })
+        
+        first, second = showtimes[0]['seat_map'], showtimes[1]['seat_map']
+        self.assertIs(first.layout, second.layout)
+        self.assertFalse(validate_seat_code(first, 'A10'))
+        self.assertEqual(get_seat_zone(first, 'E3'), 'premium')
+        self.assertIn('[E]', render_seat_map(first))
+        
+        encoded = encode_seat_map(first)
+        self.assertEqual(encoded['layout'], 'test-5x10')
+        self.assertIs(decode_seat_map(encoded).layout, first.layout)
+    
+    def test_best_seats_respect_aisles(self):
+        """Otomatik seçim koridoru aşmaz, sığmayan grup komşu sıralara bölünür"""
+        seat_map = initialize_seat_map(self.layout)
+        
+        self.assertTrue(all(seat[0] == 'E' for seat in find_best_seats(seat_map, 2, zone='premium')))
+        block = find_best_seats(seat_map, 4)
+        self.assertEqual(len({seat[0] for seat in block}), 1)
+        numbers = sorted(int(seat[1:]) for seat in block)
+        self.assertTrue(numbers[-1] <= 5 or numbers[0] >= 6)
+        
+        # Koridorun iki yanında en fazla 5 koltuk var: 7 kişi iki sıraya bölünür
+        split = find_best_seats(seat_map, 7)
+        self.assertEqual(len(split), 7)
+        rows = sorted({ord(seat[0]) for seat in split})
+        self.assertEqual(rows, list(range(rows[0], rows[0] + 2)))
 
 
 class TestBookings(unittest.TestCase):
@@ -198,6 +386,216 @@ class TestBookings(unittest.TestCase):
         ))
 
 
+class TestBookingEngine(unittest.TestCase):
+    """Eşzamanlı rezervasyon testleri"""
+    
+    def setUp(self):
+        """İki seanslık depo ve motor oluştur"""
+        self.repo = Repository()
+        for time in ('14:00', '18:00'):
+            schedule_showtime(self.repo.showtimes, {
+                'movie_id': 'film-1',
+                'date': '2025-01-20',
+                'time': time
+            })
+        self.seat_maps = {st['showtime_id']: st['seat_map'] for st in self.repo.showtimes}
+        self.engine = BookingEngine(self.repo.showtimes, self.seat_maps, self.repo.bookings)
+    
+    def _request(self, showtime, seats):
+        return {
+            'showtime_id': showtime['showtime_id'],
+            'seats': seats,
+            'customer_name': 'Test',
+            'customer_email': 'test@test.com'
+        }
+    
+    def test_concurrent_sellers(self):
+        """Çakışan koltuklar için yalnızca bir satış başarılı olur"""
+        results = []
+        
+        def seller(showtime, seats):
+            try:
+                self.engine.book(self._request(showtime, seats))
+                results.append(True)
+            except ValueError:
+                results.append(False)
+        
+        threads = []
+        for showtime in self.repo.showtimes:
+            for seats in (['A1', 'A2'], ['A2', 'A3'], ['A3', 'A4'], ['B1']) * 5:
+                threads.append(threading.Thread(target=seller, args=(showtime, seats)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        for showtime in self.repo.showtimes:
+            seat_map = self.seat_maps[showtime['showtime_id']]
+            sold = [seat for b in self.repo.bookings
+                    if b['showtime_id'] == showtime['showtime_id'] for seat in b['seats']]
+            
+            # Hiçbir koltuk iki kez satılmaz ve yarım kalan rezervasyon olmaz
+            self.assertEqual(len(sold), len(set(sold)))
+            self.assertEqual(get_seat_count_by_status(seat_map)['sold'], len(sold))
+            self.assertIn('B1', sold)
+        
+        self.assertEqual(results.count(True), len(self.repo.bookings))
+    
+    def test_duplicate_seats_rejected(self):
+        """Aynı koltuk iki kez istenirse hiçbir koltuk ayrılmaz"""
+        showtime = self.repo.showtimes[0]
+        with self.assertRaises(ValueError):
+            self.engine.book(self._request(showtime, ['C1', 'C1']))
+        self.assertTrue(is_seat_available(self.seat_maps[showtime['showtime_id']], 'C1'))
+    
+    def test_cancel_once(self):
+        """Aynı rezervasyon yalnızca bir kez iptal edilir"""
+        showtime = self.repo.showtimes[0]
+        booking = self.engine.book(self._request(showtime, ['D1']))
+        
+        self.assertTrue(self.engine.cancel(booking['booking_id']))
+        self.assertFalse(self.engine.cancel(booking['booking_id']))
+        self.assertTrue(is_seat_available(self.seat_maps[showtime['showtime_id']], 'D1'))
+    
+    def test_book_many(self):
+        """Toplu rezervasyon istek başına sonuç verir ve günlüğe bir kez yazılır"""
+        first, second = self.repo.showtimes
+        requests = [
+            self._request(first, ['E1', 'E2']),
+            self._request(second, ['E1']),
+            self._request(first, ['E2', 'E3']),  # E2 aynı toplu işlemde satıldı
+            dict(self._request(first, ['E4']), showtime_id='yok'),
+            self._request(first, ['E5', 'E6', 'E7', 'E8'])
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.engine.journal = BookingJournal(tmp)
+            results = self.engine.book_many(requests)
+            self.engine.journal.close()
+            
+            self.assertEqual([r['ok'] for r in results], [True, True, False, False, True])
+            self.assertIn('E2', results[2]['error'])
+            self.assertEqual(results[4]['booking']['discount_type'], 'group')
+            self.assertEqual(len(self.repo.bookings), 3)
+            self.assertEqual(count_journal_records(os.path.join(tmp, 'journal.jsonl')), 3)
+        
+        self.assertTrue(is_seat_available(self.seat_maps[first['showtime_id']], 'E3'))
+    
+    def test_book_many_malformed_requests(self):
+        """Hatalı biçimli istek yalnızca kendi sonucunu başarısız yapar"""
+        first, second = self.repo.showtimes
+        requests = [
+            self._request(first, ['A1']),
+            self._request(second, [['B1']]),
+            'A2',
+            dict(self._request(first, ['A3']), showtime_id=['x'])
+        ]
+        results = self.engine.book_many(requests)
+        
+        self.assertEqual([r['ok'] for r in results], [True, False, False, False])
+        self.assertEqual([b['seats'] for b in self.repo.bookings], [['A1']])
+        self.assertTrue(is_seat_available(self.seat_maps[second['showtime_id']], 'B1'))
+        with self.assertRaises(ValueError):
+            self.engine.book(self._request(second, 'B1'))
+    
+    def test_cancel_and_rebook_journal_order(self):
+        """Koltuğun iptali, aynı koltuğun yeni satışından önce günlüğe yazılır"""
+        showtime = self.repo.showtimes[0]
+        first = self.engine.book(self._request(showtime, ['A1']))
+        checkpoint = [dict(first)]
+        writing = threading.Event()
+        
+        class SlowJournal(BookingJournal):
+            def record_cancellation(self, booking):
+                writing.set()
+                time.sleep(0.2)
+                super().record_cancellation(booking)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.engine.journal = SlowJournal(tmp)
+            cancel = threading.Thread(target=self.engine.cancel, args=(first['booking_id'],))
+            cancel.start()
+            writing.wait(5)
+            second = self.engine.book(self._request(showtime, ['A1']))
+            cancel.join()
+            self.engine.journal.close()
+            
+            # Kontrol noktasında A1 ilk rezervasyonundur; günlük oynatılınca ikincinin olur
+            seat_map = initialize_seat_map(self.seat_maps[showtime['showtime_id']].layout)
+            reserve_seat(seat_map, 'A1')
+            bookings = Repository(bookings=checkpoint).bookings
+            replay_journal(os.path.join(tmp, 'journal.jsonl'),
+                           {showtime['showtime_id']: seat_map}, bookings)
+        
+        self.assertEqual([b['booking_id'] for b in bookings if b['status'] == 'confirmed'],
+                         [second['booking_id']])
+        self.assertFalse(is_seat_available(seat_map, 'A1'))
+
+
+class TestHolds(unittest.TestCase):
+    """Geçici koltuk tutma testleri"""
+    
+    def setUp(self):
+        """Tek seanslık depo ve motor oluştur"""
+        self.repo = Repository()
+        self.showtime = schedule_showtime(self.repo.showtimes, {
+            'movie_id': 'film-1',
+            'date': '2025-01-20',
+            'time': '14:00'
+        })
+        self.seat_map = self.showtime['seat_map']
+        self.seat_maps = {self.showtime['showtime_id']: self.seat_map}
+        self.engine = BookingEngine(self.repo.showtimes, self.seat_maps, self.repo.bookings)
+    
+    def _request(self, seats, hold_id=None):
+        return {
+            'showtime_id': self.showtime['showtime_id'],
+            'seats': seats,
+            'customer_name': 'Test',
+            'customer_email': 'test@test.com',
+            'hold_id': hold_id
+        }
+    
+    def test_hold_blocks_booking(self):
+        """Tutulan koltuk başka rezervasyona verilmez ve görünür"""
+        self.engine.hold(self.showtime['showtime_id'], ['A1', 'A2'])
+        
+        with self.assertRaises(ValueError):
+            self.engine.book(self._request(['A2']))
+        self.assertEqual(get_seat_count_by_status(self.seat_map)['held'], 2)
+        self.assertIn('[T]', render_seat_map(self.seat_map))
+    
+    def test_hold_converts_to_sale(self):
+        """Tutma rezervasyona dönüşür, istenmeyen koltuklar serbest kalır"""
+        hold = self.engine.hold(self.showtime['showtime_id'], ['A1', 'A2'])
+        booking = self.engine.book(self._request(['A1'], hold['hold_id']))
+        
+        self.assertEqual(booking['seats'], ['A1'])
+        self.assertEqual(len(self.engine.holds), 0)
+        counts = get_seat_count_by_status(self.seat_map)
+        self.assertEqual((counts['sold'], counts['held']), (1, 0))
+        self.assertTrue(is_seat_available(self.seat_map, 'A2'))
+    
+    def test_expired_holds_released(self):
+        """Süresi dolan tutmalar toplu olarak bırakılır"""
+        first = self.engine.hold(self.showtime['showtime_id'], ['B1'], ttl=10)
+        self.engine.hold(self.showtime['showtime_id'], ['B2'], ttl=1000)
+        
+        self.assertEqual(self.engine.holds.release_expired(now=first['expires_at']), 1)
+        self.assertTrue(is_seat_available(self.seat_map, 'B1'))
+        self.assertFalse(is_seat_available(self.seat_map, 'B2'))
+        
+        # Süresi dolan tutma satışa çevrilemez
+        with self.assertRaises(ValueError):
+            self.engine.book(self._request(['B1'], first['hold_id']))
+    
+    def test_holds_not_persisted(self):
+        """Tutulan koltuklar diske müsait olarak yazılır"""
+        self.engine.hold(self.showtime['showtime_id'], ['C1'])
+        restored = decode_seat_map(encode_seat_map(self.seat_map))
+        self.assertTrue(is_seat_available(restored, 'C1'))
+
+
 class TestMovies(unittest.TestCase):
     """Film yönetimi testleri"""
     
@@ -290,6 +688,1054 @@ class TestMovies(unittest.TestCase):
         self.assertEqual(filtered[0]['movie_id'], movie1['movie_id'])
 
 
+class TestRepository(unittest.TestCase):
+    """İndeksli veri deposu testleri"""
+    
+    def setUp(self):
+        """Depoya film, seans ve rezervasyon ekle"""
+        self.repo = Repository()
+        self.movie = add_movie(self.repo.movies, {
+            'title': 'Test Film',
+            'genre': 'Aksiyon',
+            'duration': 120,
+            'rating': 'PG-13'
+        })
+        self.showtime = schedule_showtime(self.repo.showtimes, {
+            'movie_id': self.movie['movie_id'],
+            'date': '2025-01-20',
+            'time': '18:00'
+        })
+        self.seat_maps = {self.showtime['showtime_id']: self.showtime['seat_map']}
+        
+        for seats, email in ((['A1'], 'ali@test.com'), (['A2'], 'ayse@test.com'),
+                             (['A3'], 'ali@test.com')):
+            self.repo.bookings.append(create_booking(self.repo.showtimes, self.seat_maps, {
+                'showtime_id': self.showtime['showtime_id'],
+                'seats': seats,
+                'customer_name': 'Test',
+                'customer_email': email
+            }))
+    
+    def test_point_lookups(self):
+        """ID ile aramalar indeksten yapılır"""
+        self.assertIs(get_movie(self.repo.movies, self.movie['movie_id']), self.movie)
+        self.assertIs(get_showtime(self.repo.showtimes, self.showtime['showtime_id']),
+                      self.showtime)
+        
+        booking = self.repo.bookings[1]
+        self.assertIs(get_booking(self.repo.bookings, booking['booking_id']), booking)
+        self.assertIsNone(get_booking(self.repo.bookings, 'yok'))
+    
+    def test_secondary_indexes_follow_mutations(self):
+        """Ekleme ve silmeden sonra ikincil indeksler güncel kalır"""
+        ali = list_customer_bookings(self.repo.bookings, 'ali@test.com')
+        self.assertEqual([b['seats'] for b in ali], [['A1'], ['A3']])
+        
+        self.repo.bookings.remove(ali[0])
+        self.assertEqual(len(list_customer_bookings(self.repo.bookings, 'ali@test.com')), 1)
+        self.assertIsNone(get_booking(self.repo.bookings, ali[0]['booking_id']))
+        self.assertEqual(len(self.repo.bookings.group('showtime_id',
+                                                      self.showtime['showtime_id'])), 2)
+        
+        # IndexedList JSON'a normal liste olarak yazılır
+        self.assertIsInstance(self.repo.bookings, list)
+        self.assertIsInstance(self.repo.bookings, IndexedList)
+    
+    def test_version_changes_on_mutation(self):
+        """Ekleme, silme ve update_record değişiklik damgasını yeniler"""
+        bookings = self.repo.bookings
+        versions = [bookings.version]
+        movies_version = self.repo.movies.version
+        cancel_booking(bookings, bookings[0]['booking_id'], self.seat_maps)
+        versions.append(bookings.version)
+        bookings.pop()
+        versions.append(bookings.version)
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(self.repo.movies.version, movies_version)
+    
+    def test_revenue_index_follows_bookings(self):
+        """Gelir indeksi yeni rezervasyon, iptal ve tarih aralıklarını doğru yansıtır"""
+        bookings = self.repo.bookings
+        old = dict(bookings[0], booking_id='eski', booking_date='2024-03-05 10:00:00',
+                   seats=['B1', 'B2'], total=25.5)
+        bookings.append(old)
+        today = bookings[1]['booking_date'][:10]
+        
+        summary = revenue_summary(bookings, ('2024-01-01', today))
+        self.assertEqual((summary['total_bookings'], summary['total_tickets']), (4, 5))
+        self.assertEqual(summary['total_revenue'], round(25.5 + sum(b['total'] for b in bookings[:3]), 2))
+        self.assertEqual(revenue_summary(bookings, ('2024-3-5', '2024-03-05'))['total_revenue'], 25.5)
+        self.assertEqual(revenue_summary(bookings, ('2024-03-06', '2024-12-31'))['total_bookings'], 0)
+        
+        # İptal edilen rezervasyon indeksten düşülür; düz liste aynı sonucu verir
+        cancel_booking(bookings, old['booking_id'], self.seat_maps)
+        indexed = revenue_summary(bookings, ('2024-01-01', today))
+        self.assertEqual(indexed['total_bookings'], 3)
+        self.assertEqual(indexed, revenue_summary(list(bookings), ('2024-01-01', today)))
+    
+    def test_concurrent_appends_keep_revenue_index(self):
+        """Eşzamanlı eklemeler gelir indeksinde kaybolmaz"""
+        bookings = IndexedList(key='booking_id')
+        reports.revenue_index(bookings)
+        
+        def sell(worker):
+            for i in range(500):
+                bookings.append({'booking_id': f'{worker}-{i}', 'seats': ['A1', 'A2'],
+                                 'total': 1.25, 'booking_date': f'2025-01-{i % 28 + 1:02d}',
+                                 'status': 'confirmed'})
+                revenue_summary(bookings, ('2025-01-01', '2025-01-31'))
+        
+        threads = [threading.Thread(target=sell, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        summary = revenue_summary(bookings, ('2025-01-01', '2025-01-31'))
+        self.assertEqual((summary['total_bookings'], summary['total_tickets'],
+                          summary['total_revenue']), (2000, 4000, 2500.0))
+
+
+class TestAnalytics(unittest.TestCase):
+    """Sütunlu analiz ve rapor dışa aktarma testleri"""
+    
+    def setUp(self):
+        """İki filmlik seans listesi ve rezervasyonlar oluştur"""
+        self.showtimes = [{'showtime_id': f'seans-{i}', 'movie_id': f'film-{i % 2}'}
+                          for i in range(4)]
+        self.bookings = IndexedList(key='booking_id', groups=('customer_email', 'showtime_id'))
+        for i in range(12):
+            self.bookings.append({
+                'booking_id': str(i),
+                'showtime_id': f'seans-{i % 5}',
+                'customer_email': 'test@test.com',
+                'seats': ['A1'] * (i % 3 + 1),
+                'total': 10.1 * (i % 4 + 1),
+                'booking_date': f'2025-01-{i % 6 + 1:02d} 12:00:00',
+                'status': 'confirmed'
+            })
+        cancel_booking(self.bookings, '4', {})
+    
+    def test_columns_follow_updates(self):
+        """İptal edilen rezervasyon satırı yerinde güncellenir"""
+        columns = booking_columns(self.bookings)
+        self.assertIs(booking_columns(self.bookings), columns)
+        
+        cancel_booking(self.bookings, '7', {})
+        self.assertEqual(len(columns), 12)
+        self.assertEqual(columns.status[7], analytics.CANCELLED)
+        self.assertEqual(columns.day_labels[columns.day[7]], '2025-01-02')
+    
+    def test_columns_concurrent_appends(self):
+        """Eşzamanlı eklemeler ve iptaller sütunlarda kaybolmaz"""
+        columns = booking_columns(self.bookings)
+        
+        def sell(worker):
+            for i in range(300):
+                booking_id = f'{worker}-{i}'
+                self.bookings.append({'booking_id': booking_id, 'showtime_id': 'seans-1',
+                                      'customer_email': 'test@test.com', 'seats': ['A1'],
+                                      'total': 5.0, 'booking_date': '2025-02-01 10:00:00',
+                                      'status': 'confirmed'})
+                if i % 3 == 0:
+                    cancel_booking(self.bookings, booking_id, {})
+        
+        threads = [threading.Thread(target=sell, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(columns), 12 + 1200)
+        self.assertEqual(list(columns.status).count(analytics.CANCELLED), 1 + 400)
+        self.assertEqual(len(columns.total), len(columns.status))
+    
+    @unittest.skipUnless(analytics.HAS_NUMPY, "NumPy kurulu değil")
+    def test_matches_pure_python(self):
+        """NumPy sonuçları saf Python fonksiyonlarıyla aynıdır"""
+        results = []
+        for use_numpy in (True, False):
+            reports.USE_NUMPY = use_numpy
+            results.append((reports.top_movies(self.bookings, self.showtimes),
+                            reports.peak_days_analysis(self.bookings)))
+        reports.USE_NUMPY = analytics.HAS_NUMPY
+        self.assertEqual(results[0], results[1])
+    
+    
+    def test_streaming_export(self):
+        """Rapor satırları JSON Lines, CSV ve gzip olarak akışla yazılır"""
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = list(reports.iter_revenue_rows(self.bookings, ('2025-01-01', '2025-01-31')))
+            self.assertEqual([row['date'] for row in rows],
+                             [f'2025-01-{day:02d}' for day in range(1, 7)])
+            self.assertEqual(sum(row['bookings'] for row in rows), 11)
+            
+            path = os.path.join(tmp, 'gelir.jsonl')
+            self.assertEqual(reports.export_rows(iter(rows), path), 6)
+            with open(path) as f:
+                self.assertEqual([json.loads(line) for line in f], rows)
+            
+            path = os.path.join(tmp, 'gunler.csv.gz')
+            self.assertEqual(reports.export_rows(reports.iter_peak_day_rows(self.bookings), path), 6)
+            with gzip.open(path, 'rt') as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], 'date,bookings,tickets,revenue')
+            
+            with self.assertRaises(ValueError):
+                reports.export_rows(rows, os.path.join(tmp, 'rapor.xml'))
+
+
+class TestStorage(unittest.TestCase):
+    """Veri saklama testleri"""
+    
+    def setUp(self):
+        """Geçici veri klasörü ve örnek seans oluştur"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp.name
+        self.showtimes = []
+        self.showtime = schedule_showtime(self.showtimes, {
+            'movie_id': 'film-1',
+            'date': '2025-01-20',
+            'time': '18:00',
+            'pricing': {'standard': 10.0, 'premium': 15.0}
+        })
+        self.seat_maps = {self.showtime['showtime_id']: self.showtime['seat_map']}
+        self.bookings = []
+        save_state(self.base_dir, self.showtimes, self.seat_maps, self.bookings)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _book(self, seats):
+        booking = create_booking(self.showtimes, self.seat_maps, {
+            'showtime_id': self.showtime['showtime_id'],
+            'seats': seats,
+            'customer_name': 'Ali Yılmaz',
+            'customer_email': 'ali@test.com'
+        })
+        self.bookings.append(booking)
+        return booking
+    
+    def test_binary_snapshot(self):
+        """Kayıtta ikili görüntü yazılır; JSON değişirse veya bozuksa yok sayılır"""
+        booking = self._book(['A1', 'A2'])
+        booking['customer_phone'] = None        # Kolona uymayan değer
+        booking['cancelled_date'] = ''          # Kolonlarda olmayan alan
+        save_state(self.base_dir, self.showtimes, self.seat_maps, self.bookings)
+        
+        expected_showtimes = [{k: v for k, v in s.items() if k != 'seat_map'}
+                              for s in self.showtimes]
+        self.assertEqual(snapshot.read_snapshot(self.base_dir),
+                         (expected_showtimes, self.bookings))
+        showtimes, _, bookings = load_state(self.base_dir)
+        self.assertEqual((showtimes, bookings), (expected_showtimes, self.bookings))
+        
+        # JSON elle değiştirildi: görüntü eskidir, JSON okunur ve görüntü yenilenir
+        bookings_path = os.path.join(self.base_dir, 'bookings.json')
+        with open(bookings_path, 'w') as f:
+            json.dump([], f)
+        self.assertIsNone(snapshot.read_snapshot(self.base_dir))
+        self.assertEqual(load_state(self.base_dir)[2], [])
+        self.assertEqual(snapshot.read_snapshot(self.base_dir)[1], [])
+        
+        # Bozuk görüntü (sağlama toplamı tutmaz)
+        path = snapshot.snapshot_path(self.base_dir)
+        with open(path, 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+        self.assertIsNone(snapshot.read_snapshot(self.base_dir))
+    
+    def test_save_only_changed(self):
+        """Değişmeyen listenin dosyasına dokunulmaz; yazmalar geçici dosya üzerinden"""
+        paths = {name: os.path.join(self.base_dir, f'{name}.json')
+                 for name in ('showtimes', 'bookings')}
+        seat_map_file = os.path.join(self.base_dir, 'seat_maps',
+                                     f"{self.showtime['showtime_id']}.json")
+        for path in list(paths.values()) + [seat_map_file]:
+            os.utime(path, ns=(0, 0))
+        
+        self._book(['A1'])
+        save_state(self.base_dir, self.showtimes, self.seat_maps, self.bookings,
+                   changed={'bookings'})
+        self.assertEqual(os.stat(paths['showtimes']).st_mtime_ns, 0)
+        self.assertNotEqual(os.stat(paths['bookings']).st_mtime_ns, 0)
+        self.assertNotEqual(os.stat(seat_map_file).st_mtime_ns, 0)
+        self.assertEqual(len(load_json(paths['bookings'])), 1)
+        
+        # Değişmeyen koltuk haritası yeniden yazılmaz
+        os.utime(seat_map_file, ns=(0, 0))
+        save_state(self.base_dir, self.showtimes, self.seat_maps, self.bookings, changed=())
+        self.assertEqual(os.stat(seat_map_file).st_mtime_ns, 0)
+        self.assertFalse([name for name in os.listdir(self.base_dir) if name.endswith('.tmp')])
+    
+    def test_journal_replay(self):
+        """Günlük oynatma rezervasyon ve iptalleri geri yükler"""
+        journal = BookingJournal(self.base_dir, sync_every=2)
+        first = self._book(['A1', 'A2'])
+        journal.record_booking(first)
+        second = self._book(['C5'])
+        journal.record_booking(second)
+        cancel_booking(self.bookings, first['booking_id'], self.seat_maps)
+        journal.record_cancellation(first)
+        journal.close()
+        
+        showtimes, seat_maps, bookings = load_state(self.base_dir)
+        seat_map = seat_maps[self.showtime['showtime_id']]
+        
+        self.assertEqual(len(bookings), 2)
+        self.assertEqual(bookings[0]['status'], 'cancelled')
+        self.assertTrue(is_seat_available(seat_map, 'A1'))
+        self.assertFalse(is_seat_available(seat_map, 'C5'))
+    
+    def test_journal_interval_sync(self):
+        """Yeni kayıt gelmese de bekleyen kayıt sync_interval sonra fsync edilir"""
+        booking = self._book(['D4'])
+        journal = BookingJournal(self.base_dir, sync_every=100, sync_interval=0.05)
+        journal.record_booking(booking)
+        self.assertEqual(journal.unsynced, 1)
+        
+        deadline = time.monotonic() + 5
+        while journal.unsynced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(journal.unsynced, 0)
+        journal.close()
+    
+    def test_journal_replay_after_checkpoint(self):
+        """Kontrol noktasındaki kayıtlar iki kez uygulanmaz"""
+        journal = BookingJournal(self.base_dir)
+        booking = self._book(['B3'])
+        journal.record_booking(booking)
+        save_state(self.base_dir, self.showtimes, self.seat_maps, self.bookings)
+        journal.close()
+        
+        showtimes, seat_maps, bookings = load_state(self.base_dir)
+        
+        self.assertEqual(len(bookings), 1)
+        self.assertFalse(is_seat_available(seat_maps[self.showtime['showtime_id']], 'B3'))
+        
+        journal = BookingJournal(self.base_dir)
+        self.assertEqual(journal.records, 1)
+        journal.reset()
+        self.assertEqual(journal.records, 0)
+        journal.close()
+    
+    def test_journal_reset_keeps_later_records(self):
+        """Kontrol noktası yazılırken eklenen kayıtlar günlükte kalır"""
+        journal = BookingJournal(self.base_dir)
+        journal.record_booking(self._book(['A1']))
+        mark = journal.mark()
+        later = self._book(['A2'])
+        journal.record_booking(later)
+        journal.reset(mark)
+        journal.record_cancellation(later)
+        journal.close()
+        
+        records = list(read_journal(journal.path))
+        self.assertEqual([r['op'] for r in records], ['book', 'cancel'])
+        self.assertEqual(records[0]['booking']['booking_id'], later['booking_id'])
+        self.assertEqual(count_journal_records(journal.path), 2)
+
+
+class TestPersistence(unittest.TestCase):
+    """Arka plan kalıcılık (write-behind) testleri"""
+    
+    def test_requests_coalesce(self):
+        """Art arda gelen istekler tek kayıtta yazılır; flush kaydı bekler"""
+        saved = []
+        writer = persistence.WriteBehind(lambda: saved.append(1), flush_interval=10)
+        writer.start()
+        for _ in range(50):
+            writer.request()
+        self.assertEqual(saved, [])
+        
+        writer.flush()
+        self.assertEqual((len(saved), writer.pending), (1, False))
+        writer.stop()
+        self.assertEqual(len(saved), 1)
+    
+    def test_max_lag(self):
+        """Durulmayan istekler en geç max_lag sonra yazılır"""
+        writer = persistence.WriteBehind(lambda: None, flush_interval=10, max_lag=0.05)
+        writer.start()
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            writer.request()
+            time.sleep(0.01)
+        self.assertGreaterEqual(writer.saves, 2)
+        writer.stop()
+    
+    def test_stop_writes_pending(self):
+        """Durdurulurken bekleyen istekler yazılır"""
+        saved = []
+        writer = persistence.WriteBehind(lambda: saved.append(1), flush_interval=10)
+        writer.start()
+        writer.request()
+        writer.stop()
+        self.assertEqual(len(saved), 1)
+
+
+class TestSeatMapCache(unittest.TestCase):
+    """Koltuk haritası önbelleği testleri"""
+    
+    def setUp(self):
+        """Birkaç seanslık geçici veri oluştur"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp.name
+        showtimes = []
+        for hour in range(10, 15):
+            schedule_showtime(showtimes, {
+                'movie_id': 'film-1',
+                'date': '2025-01-20',
+                'time': f'{hour}:00'
+            })
+        self.ids = [st['showtime_id'] for st in showtimes]
+        seat_maps = {st['showtime_id']: st['seat_map'] for st in showtimes}
+        save_state(self.base_dir, showtimes, seat_maps, [])
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_lazy_loading(self):
+        """Seans listesi koltuk haritası yüklemeden okunur"""
+        showtimes_file = load_json(os.path.join(self.base_dir, 'showtimes.json'))
+        self.assertNotIn('seat_map', showtimes_file[0])
+        
+        showtimes, seat_maps, bookings = load_state(self.base_dir, cache_size=2)
+        self.assertEqual(len(seat_maps), 5)
+        self.assertEqual(seat_maps.resident, 0)
+        
+        seat_maps.get(self.ids[0])
+        self.assertEqual(seat_maps.resident, 1)
+    
+    def test_eviction_writes_back(self):
+        """Önbellekten çıkan değişmiş harita diske yazılır"""
+        showtimes, seat_maps, bookings = load_state(self.base_dir, cache_size=2)
+        reserve_seat(seat_maps[self.ids[0]], 'A1')
+        
+        for showtime_id in self.ids[1:]:
+            seat_maps.get(showtime_id)
+        self.assertEqual(seat_maps.resident, 2)
+        
+        showtimes, seat_maps, bookings = load_state(self.base_dir)
+        self.assertFalse(is_seat_available(seat_maps[self.ids[0]], 'A1'))
+    
+    def test_change_during_write_stays_dirty(self):
+        """Yazma sırasında satılan koltuk haritayı değişmiş bırakır ve sonra yazılır"""
+        import storage
+        showtimes, seat_maps, bookings = load_state(self.base_dir)
+        seat_map = seat_maps[self.ids[0]]
+        reserve_seat(seat_map, 'A1')
+        
+        save_json = storage.save_json
+        def racing_save(path, data, **kwargs):
+            save_json(path, data, **kwargs)
+            storage.save_json = save_json
+            reserve_seat(seat_map, 'C5')
+        storage.save_json = racing_save
+        try:
+            storage.save_seat_map(self.base_dir, self.ids[0], seat_map)
+        finally:
+            storage.save_json = save_json
+        self.assertTrue(seat_map.dirty)
+        
+        seat_maps.flush()
+        showtimes, seat_maps, bookings = load_state(self.base_dir)
+        self.assertFalse(is_seat_available(seat_maps[self.ids[0]], 'C5'))
+
+
+class TestSqliteStorage(unittest.TestCase):
+    """SQLite veri saklama testleri"""
+    
+    def setUp(self):
+        """JSON verisi içeren geçici klasör oluştur"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp.name
+        self.movies = []
+        self.showtimes = []
+        movie = add_movie(self.movies, {
+            'title': 'Test Film',
+            'genre': 'Aksiyon',
+            'duration': 120,
+            'rating': 'PG-13'
+        })
+        self.showtime = schedule_showtime(self.showtimes, {
+            'movie_id': movie['movie_id'],
+            'date': '2025-01-20',
+            'time': '18:00',
+            'pricing': {'standard': 10.0, 'premium': 15.0}
+        })
+        self.seat_maps = {self.showtime['showtime_id']: self.showtime['seat_map']}
+        self.booking = create_booking(self.showtimes, self.seat_maps, {
+            'showtime_id': self.showtime['showtime_id'],
+            'seats': ['A1', 'C5'],
+            'customer_name': 'Ali Yılmaz',
+            'customer_email': 'ali@test.com'
+        })
+        self.bookings = [self.booking]
+        
+        from movies import save_movies
+        save_movies(os.path.join(self.base_dir, 'movies.json'), self.movies)
+        save_state(self.base_dir, self.showtimes, self.seat_maps, self.bookings)
+    
+    def tearDown(self):
+        sqlite_storage.close(self.base_dir)
+        self.tmp.cleanup()
+    
+    def test_migrate_from_json(self):
+        """JSON verisi SQLite'a kayıpsız aktarılır"""
+        result = sqlite_storage.migrate_from_json(self.base_dir)
+        self.assertEqual(result['bookings'], 1)
+        
+        movies = sqlite_storage.load_movies(self.base_dir)
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(self.base_dir)
+        
+        self.assertEqual(movies, self.movies)
+        self.assertEqual(bookings, self.bookings)
+        self.assertEqual(showtimes[0]['pricing'], self.showtime['pricing'])
+        seat_map = seat_maps[self.showtime['showtime_id']]
+        self.assertEqual(len(seat_map['seats']), 96)
+        self.assertFalse(is_seat_available(seat_map, 'A1'))
+    
+    def test_single_row_cancellation(self):
+        """İptal tek işlemde koltukları serbest bırakır"""
+        sqlite_storage.migrate_from_json(self.base_dir)
+        journal = sqlite_storage.SqliteJournal(self.base_dir)
+        
+        cancel_booking(self.bookings, self.booking['booking_id'], self.seat_maps)
+        journal.record_cancellation(self.booking)
+        
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(self.base_dir)
+        self.assertEqual(bookings[0]['status'], 'cancelled')
+        self.assertTrue(is_seat_available(seat_maps[self.showtime['showtime_id']], 'A1'))
+    
+    def test_seat_map_version_persists(self):
+        """Yeniden yüklenen harita istemcinin bildiği sürümleri tekrar vermez"""
+        sqlite_storage.migrate_from_json(self.base_dir)
+        showtime_id = self.showtime['showtime_id']
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(self.base_dir)
+        seat_map = seat_maps[showtime_id]
+        reserve_seat(seat_map, 'B1')
+        release_seat(seat_map, 'B1')
+        known = seat_map.version
+        reserve_seat(seat_map, 'B1')
+        reserve_seat(seat_map, 'B2')
+        seat_maps.flush()
+        
+        sqlite_storage.close(self.base_dir)
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(self.base_dir)
+        restored = seat_maps[showtime_id]
+        self.assertGreater(restored.version, seat_map.version)
+        self.assertEqual(changes_since(restored, known)['snapshot'][12:14], '11')
+    
+    def test_new_showtime_survives_eviction(self):
+        """Veritabanında satırı olmayan yeni seansın haritası önbellekten çıkınca kaybolmaz"""
+        sqlite_storage.migrate_from_json(self.base_dir)
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(self.base_dir, cache_size=1)
+        showtime = schedule_showtime(showtimes, {'movie_id': self.showtime['movie_id'],
+                                                 'date': '2025-03-01', 'time': '18:00'})
+        seat_maps[showtime['showtime_id']] = showtime.pop('seat_map')
+        reserve_seat(seat_maps[showtime['showtime_id']], 'A1')
+        
+        seat_maps.get(self.showtime['showtime_id'])
+        self.assertEqual(seat_maps.resident, 1)
+        
+        sqlite_storage.save_state(self.base_dir, showtimes, seat_maps, [], changed={'showtimes'})
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(self.base_dir)
+        self.assertFalse(is_seat_available(seat_maps[showtime['showtime_id']], 'A1'))
+    
+    def test_migration_leaves_source_untouched(self):
+        """Eski biçimdeki JSON klasörü aktarımda değiştirilmez"""
+        source = os.path.join(self.base_dir, 'eski')
+        os.makedirs(source)
+        showtime = dict(self.showtime, seat_map=encode_seat_map(self.showtime['seat_map']))
+        for name, data in (('movies.json', self.movies), ('showtimes.json', [showtime]),
+                           ('bookings.json', self.bookings)):
+            with open(os.path.join(source, name), 'w') as f:
+                json.dump(data, f)
+        
+        def contents():
+            files = {}
+            for name in sorted(os.listdir(source)):
+                with open(os.path.join(source, name), 'rb') as f:
+                    files[name] = f.read()
+            return files
+        
+        before = contents()
+        target = os.path.join(self.base_dir, 'yeni')
+        self.addCleanup(sqlite_storage.close, target)
+        self.assertEqual(sqlite_storage.migrate_from_json(source, target)['bookings'], 1)
+        self.assertEqual(contents(), before)
+        
+        showtimes, seat_maps, bookings = sqlite_storage.load_state(target)
+        self.assertEqual(bookings, self.bookings)
+        self.assertFalse(is_seat_available(seat_maps[self.showtime['showtime_id']], 'C5'))
+    
+    def test_checkpoint_writes_changed_rows(self):
+        """Kontrol noktası tüm tabloyu değil yalnızca değişen rezervasyon satırlarını yazar"""
+        sqlite_storage.migrate_from_json(self.base_dir)
+        for name in ('DATA_DIR', 'STORAGE_BACKEND'):
+            self.addCleanup(setattr, main, name, getattr(main, name))
+        main.DATA_DIR = self.base_dir
+        main.STORAGE_BACKEND = 'sqlite'
+        main.load_data()
+        self.addCleanup(main.close_data, False)
+        
+        booking = main.engine.book({'showtime_id': self.showtime['showtime_id'], 'seats': ['B2'],
+                                    'customer_name': 'Ayşe', 'customer_email': 'ayse@test.com'})
+        statements = []
+        conn = sqlite_storage.connect(self.base_dir)
+        conn.set_trace_callback(statements.append)
+        try:
+            main.save_data()
+        finally:
+            conn.set_trace_callback(None)
+        
+        written = [s for s in statements if 'INTO bookings' in s]
+        self.assertEqual(len(written), 1)
+        self.assertIn(booking['booking_id'], written[0])
+        self.assertEqual(len(sqlite_storage.load_state(self.base_dir)[2]), 2)
+
+
+class TestShardedStorage(unittest.TestCase):
+    """Seans başına parçalı veri saklama testleri"""
+    
+    def setUp(self):
+        """İki tarihte seansı olan JSON verisi oluştur"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp.name
+        self.showtimes = []
+        for date in ('2025-01-20', '2025-01-21', '2025-02-01'):
+            schedule_showtime(self.showtimes, {'movie_id': 'film-1', 'date': date, 'time': '18:00'})
+        self.seat_maps = {s['showtime_id']: s['seat_map'] for s in self.showtimes}
+        save_state(self.base_dir, self.showtimes, self.seat_maps, [])
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_migrate_and_rewrite_one_shard(self):
+        """JSON verisi seans dosyalarına aktarılır; koltuk değişikliği tek dosyayı yazar"""
+        showtimes, seat_maps, bookings = sharded_storage.load_state(self.base_dir)
+        self.assertEqual([s['showtime_id'] for s in showtimes],
+                         [s['showtime_id'] for s in self.showtimes])
+        
+        shards = {s['showtime_id']: os.path.join(self.base_dir, 'showtimes', s['date'],
+                                                 f"{s['showtime_id']}.json")
+                  for s in showtimes}
+        paths = list(shards.values()) + [sharded_storage.index_path(self.base_dir)]
+        for path in paths:
+            os.utime(path, ns=(0, 0))
+        
+        first = showtimes[0]['showtime_id']
+        booking = create_booking(showtimes, seat_maps, {
+            'showtime_id': first,
+            'seats': ['A1'],
+            'customer_name': 'Ali Yılmaz',
+            'customer_email': 'ali@test.com'
+        })
+        bookings.append(booking)
+        sharded_storage.save_state(self.base_dir, showtimes, seat_maps, bookings,
+                                   changed={'bookings'})
+        self.assertEqual([path for path in paths if os.stat(path).st_mtime_ns],
+                         [shards[first]])
+        
+        showtimes, seat_maps, bookings = sharded_storage.load_state(self.base_dir)
+        self.assertFalse(is_seat_available(seat_maps[first], 'A1'))
+        self.assertEqual(len(bookings), 1)
+    
+    def test_list_showtimes_between(self):
+        """Tarih aralığı yalnızca eşleşen klasörlerden okunur"""
+        showtimes, seat_maps, _ = sharded_storage.load_state(self.base_dir)
+        found = sharded_storage.list_showtimes_between(self.base_dir, '2025-01-21', '2025-01-31')
+        self.assertEqual([s['showtime_id'] for s in found], [showtimes[1]['showtime_id']])
+        
+        # Silinen seansın dosyası ve boşalan tarih klasörü kaldırılır
+        del showtimes[2]
+        sharded_storage.save_state(self.base_dir, showtimes, seat_maps, [])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.base_dir, 'showtimes'))),
+                         ['2025-01-20', '2025-01-21', 'index.json'])
+        self.assertEqual(len(sharded_storage.list_showtimes_between(
+            self.base_dir, '2025-01-01', '2025-12-31')), 2)
+    
+    def test_new_showtime_survives_eviction(self):
+        """Henüz kaydedilmemiş yeni seansın haritası önbellekten çıkınca kaybolmaz"""
+        showtimes, seat_maps, bookings = sharded_storage.load_state(self.base_dir, cache_size=1)
+        showtime = schedule_showtime(showtimes, {'movie_id': 'film-1', 'date': '2025-03-01',
+                                                 'time': '18:00'})
+        seat_maps[showtime['showtime_id']] = showtime.pop('seat_map')
+        reserve_seat(seat_maps[showtime['showtime_id']], 'A1')
+        
+        for other in showtimes[:-1]:
+            seat_maps.get(other['showtime_id'])
+        self.assertEqual(seat_maps.resident, 1)
+        
+        sharded_storage.save_state(self.base_dir, showtimes, seat_maps, bookings)
+        showtimes, seat_maps, bookings = sharded_storage.load_state(self.base_dir)
+        self.assertFalse(is_seat_available(seat_maps[showtime['showtime_id']], 'A1'))
+    
+    def test_rejects_unsafe_dates(self):
+        """Klasör adı olarak güvenli olmayan tarihler reddedilir"""
+        for date in ('../x', '2025/01/20', ''):
+            with self.assertRaises(ValueError):
+                schedule_showtime([], {'movie_id': 'film-1', 'date': date, 'time': '18:00'})
+        
+        showtimes, seat_maps, bookings = sharded_storage.load_state(self.base_dir)
+        showtimes[0]['date'] = '../x'
+        with self.assertRaises(ValueError):
+            sharded_storage.save_state(self.base_dir, showtimes, seat_maps, bookings)
+        self.assertFalse(os.path.exists(os.path.join(self.base_dir, 'x')))
+
+
+class TestReplay(unittest.TestCase):
+    """JSONL işlem oynatıcı testleri"""
+    
+    def test_replay_file(self):
+        """İşlemler takma adlarla oynatılır ve sonunda kalıcı yazılır"""
+        ops = [
+            {'op': 'movie', 'ref': 'm1', 'title': 'Film', 'genre': 'Dram', 'duration': 90,
+             'rating': 'G'},
+            {'op': 'schedule', 'ref': 's1', 'movie_ref': 'm1', 'date': '2025-02-01',
+             'time': '20:00'},
+            {'op': 'book', 'ref': 'b1', 'showtime_ref': 's1', 'seats': ['A1', 'A2'],
+             'customer_name': 'Test', 'customer_email': 'test@test.com'},
+            {'op': 'book', 'showtime_ref': 's1', 'seats': ['A2'],
+             'customer_name': 'Test', 'customer_email': 'test@test.com'},
+            {'op': 'cancel', 'booking_ref': 'b1'},
+            {'op': 'bilinmeyen'}
+        ]
+        
+        # Oynatıcı main modülünün veri ayarlarını değiştirir
+        for name in ('DATA_DIR', 'STORAGE_BACKEND'):
+            self.addCleanup(setattr, replay.main, name, getattr(replay.main, name))
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'islemler.jsonl')
+            with open(path, 'w') as f:
+                f.write('\n'.join(json.dumps(op) for op in ops) + '\n')
+            
+            data_dir = os.path.join(tmp, 'data')
+            summary = replay.main_replay([path, '--data-dir', data_dir, '--storage', 'json',
+                                          '--commit-every', '2', '--quiet'])
+            self.assertEqual((summary['succeeded'], summary['failed']), (4, 2))
+            self.assertGreater(summary['ops_per_second'], 0)
+            
+            bookings = load_json(os.path.join(data_dir, 'bookings.json'))
+            self.assertEqual([b['status'] for b in bookings], ['cancelled'])
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Performans ölçüm paketi testleri"""
+    
+    def test_suite_covers_reports(self):
+        """reports modülündeki her fonksiyonun bir senaryosu var"""
+        functions = [name for name, value in vars(reports).items()
+                     if callable(value) and not name.startswith('_')
+                     and getattr(value, '__module__', None) == 'reports'
+                     and not isinstance(value, type)]
+        for name in functions:
+            self.assertIn(f'reports.{name}', bench_suite.BENCHMARKS)
+    
+    def test_run_and_compare(self):
+        """Küçük veriyle tüm senaryolar çalışır; yavaşlayanlar gerileme sayılır"""
+        data = generate_dataset(showtimes=5, bookings=300, customers=20, movies=3)
+        self.assertEqual(len(data['bookings']), 300)
+        
+        # Onaylı rezervasyonların koltukları dolu olmalı
+        sold = sum(len(b['seats']) for b in data['bookings'] if b['status'] != 'cancelled')
+        self.assertEqual(sold, sum(get_seat_count_by_status(m)['sold']
+                                   for m in data['seat_maps'].values()))
+        
+        ws = bench_suite.Workspace(data)
+        try:
+            results = bench_suite.run_suite(ws, repeat=1)
+        finally:
+            ws.close()
+        self.assertEqual(set(results), set(bench_suite.BENCHMARKS))
+        
+        baseline = {name: dict(result, best=result['best'] / 2) for name, result in results.items()}
+        self.assertEqual(bench_suite.compare(results, results), [])
+        self.assertEqual(len(bench_suite.compare(results, baseline)), len(results))
+
+
+class TestProfiling(unittest.TestCase):
+    """Profil çıkarma testleri"""
+    
+    def test_enable_and_disable(self):
+        """Açıkken işlem başına profil yazılır; kapatınca asıl fonksiyonlar döner"""
+        original = reports.top_movies
+        showtimes = []
+        showtime = schedule_showtime(showtimes, {'movie_id': 'm', 'date': '2025-01-20',
+                                                 'time': '18:00'})
+        seat_maps = {showtime['showtime_id']: showtime['seat_map']}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(setattr, profiling, 'PROFILE_DIR', profiling.PROFILE_DIR)
+            profiling.enable(tmp)
+            try:
+                self.assertIsNot(reports.top_movies, original)
+                self.assertIsNot(main.top_movies, original)
+                
+                # create_booking içindeki calculate_booking_total ayrı dosya üretmez
+                bookings_module.create_booking(showtimes, seat_maps, {
+                    'showtime_id': showtime['showtime_id'], 'seats': ['A1'],
+                    'customer_name': 'Test', 'customer_email': 'test@test.com'})
+            finally:
+                profiling.disable()
+            
+            self.assertIs(reports.top_movies, original)
+            self.assertIs(main.top_movies, original)
+            self.assertFalse(profiling.ENABLED)
+            
+            files = sorted(os.listdir(tmp))
+            self.assertEqual(len(files), 2)
+            self.assertTrue(files[0].endswith('bookings.create_booking.prof'))
+            stats = pstats.Stats(os.path.join(tmp, files[0]))
+            self.assertGreater(stats.total_calls, 0)
+            with open(os.path.join(tmp, files[1]), encoding='utf-8') as f:
+                self.assertIn('calculate_booking_total', f.read())
+    
+    def test_script_entry_point(self):
+        """'python main.py --profile' ile menü işlemlerinin profili çıkarılır"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+        # Raporlar -> Gelir Özeti -> dönem -> dökümsüz -> Enter -> Ana Menü -> Çıkış
+        answers = ['3', '2', '2025-01-01', '2025-12-31', 'hayır', '', '6', '5']
+        with tempfile.TemporaryDirectory() as tmp:
+            profile_dir = os.path.join(tmp, 'profiles')
+            env = dict(os.environ, CINEMA_PROFILE_DIR=profile_dir, CINEMA_STORAGE='json')
+            env.pop('CINEMA_PROFILE', None)
+            subprocess.run([sys.executable, script, '--profile'], cwd=tmp, env=env,
+                           input='\n'.join(answers) + '\n', capture_output=True, text=True,
+                           timeout=60, check=True)
+            
+            files = os.listdir(profile_dir)
+            summary = [name for name in files if name.endswith('main.show_revenue_summary.txt')]
+            self.assertEqual(len(summary), 1)
+            self.assertTrue(any(name.endswith('main.load_data.prof') for name in files))
+            with open(os.path.join(profile_dir, summary[0]), encoding='utf-8') as f:
+                self.assertIn('revenue_summary', f.read())
+
+
+class TestMetrics(unittest.TestCase):
+    """Ölçüm modülü testleri"""
+    
+    def test_render(self):
+        """Sayaç ve histogram iş parçacıklarından toplanıp metin olarak yazılır"""
+        registry = metrics.Registry()
+        requests = registry.register(metrics.Counter, 'test_requests_total', "İstekler",
+                                     {'result': 'ok'})
+        latency = registry.register(metrics.Histogram, 'test_seconds', "Süre",
+                                    buckets=(0.1, 1.0))
+        self.assertIs(registry.register(metrics.Counter, 'test_requests_total', "İstekler",
+                                        {'result': 'ok'}), requests)
+        
+        def work():
+            for _ in range(1000):
+                requests.inc()
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+        
+        text = registry.render()
+        self.assertIn('# TYPE test_requests_total counter', text)
+        self.assertIn('test_requests_total{result="ok"} 4000', text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('test_seconds_count 3', text)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.prom')
+            metrics.write_textfile(path, registry)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), text)
+    
+    def test_instrumentation(self):
+        """Rezervasyon, iptal ve raporlar ölçümlere yansır"""
+        created = bookings_module.BOOKINGS_CREATED.value
+        failed = bookings_module.BOOKINGS_FAILED.value
+        observed = bookings_module.BOOKING_SECONDS.count
+        cancelled = bookings_module.CANCELLATIONS.value
+        
+        showtimes = []
+        showtime = schedule_showtime(showtimes, {'movie_id': 'm', 'date': '2025-01-20',
+                                                 'time': '18:00'})
+        seat_maps = {showtime['showtime_id']: showtime['seat_map']}
+        booking_data = {'showtime_id': showtime['showtime_id'], 'seats': ['A1'],
+                        'customer_name': 'Test', 'customer_email': 'test@test.com'}
+        booking = create_booking(showtimes, seat_maps, booking_data)
+        with self.assertRaises(ValueError):
+            create_booking(showtimes, seat_maps, booking_data)
+        cancel_booking([booking], booking['booking_id'], seat_maps)
+        
+        self.assertEqual(bookings_module.BOOKINGS_CREATED.value, created + 1)
+        self.assertEqual(bookings_module.BOOKINGS_FAILED.value, failed + 1)
+        self.assertEqual(bookings_module.BOOKING_SECONDS.count, observed + 1)
+        self.assertEqual(bookings_module.CANCELLATIONS.value, cancelled + 1)
+        
+        reports.top_movies([booking], showtimes)
+        self.assertIn('cinema_report_seconds_count{report="top_movies"}', metrics.render())
+
+
+class TestServer(unittest.TestCase):
+    """HTTP sunucusu testleri"""
+    
+    def setUp(self):
+        """Geçici veriyle sunucuyu arka planda başlat"""
+        for name in ('DATA_DIR', 'STORAGE_BACKEND'):
+            self.addCleanup(setattr, main, name, getattr(main, name))
+        self.tmp = tempfile.TemporaryDirectory()
+        main.DATA_DIR = self.tmp.name
+        main.STORAGE_BACKEND = 'json'
+        main.load_data()
+        
+        self.showtime = schedule_showtime(main.showtimes, {
+            'movie_id': 'film-1',
+            'date': '2025-01-20',
+            'time': '18:00'
+        })
+        main.seat_maps[self.showtime['showtime_id']] = self.showtime['seat_map']
+        
+        self.server = server.CinemaServer()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start('127.0.0.1', 0), self.loop).result()
+        self.port = self.server.server.sockets[0].getsockname()[1]
+    
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.server.close()
+        self.loop.close()
+        main.close_data(checkpoint=False)
+        self.tmp.cleanup()
+    
+    def _request(self, conn, method, path, body=None):
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    
+    def test_booking_flow_keep_alive(self):
+        """Tutma, rezervasyon, iptal ve rapor aynı bağlantı üzerinden yapılır"""
+        conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        showtime_id = self.showtime['showtime_id']
+        
+        status, showtimes = self._request(conn, 'GET', '/showtimes')
+        self.assertEqual((status, showtimes[0]['showtime_id']), (200, showtime_id))
+        sock = conn.sock
+        
+        status, hold = self._request(conn, 'POST', '/holds',
+                                     {'showtime_id': showtime_id, 'seats': ['A1', 'A2']})
+        self.assertEqual(status, 200)
+        status, booking = self._request(conn, 'POST', '/bookings', {
+            'showtime_id': showtime_id, 'seats': ['A1', 'A2'], 'hold_id': hold['hold_id'],
+            'customer_name': 'Test', 'customer_email': 'test@test.com'
+        })
+        self.assertEqual((status, booking['seats']), (201, ['A1', 'A2']))
+        
+        status, error = self._request(conn, 'POST', '/bookings', {
+            'showtime_id': showtime_id, 'seats': ['A2'],
+            'customer_name': 'Test', 'customer_email': 'test@test.com'
+        })
+        self.assertEqual(status, 400)
+        self.assertIn('A2', error['error'])
+        
+        status, seats = self._request(conn, 'GET', f'/showtimes/{showtime_id}/seats')
+        self.assertEqual(seats['counts']['sold'], 2)
+        
+        status, cancelled = self._request(conn, 'DELETE', f"/bookings/{booking['booking_id']}")
+        self.assertEqual((status, cancelled['status']), (200, 'cancelled'))
+        status, delta = self._request(
+            conn, 'GET', f"/showtimes/{showtime_id}/seats?since={seats['version']}")
+        self.assertEqual(delta['changes'], {'A1': 'available', 'A2': 'available'})
+        status, report = self._request(conn, 'GET', '/reports/occupancy')
+        self.assertEqual(report['overall']['sold_seats'], 0)
+        
+        conn.request('GET', '/metrics')
+        response = conn.getresponse()
+        self.assertEqual(response.getheader('Content-Type'), 'text/plain; charset=utf-8')
+        self.assertIn('cinema_bookings_total{result="ok"}', response.read().decode())
+        
+        self.assertEqual(self._request(conn, 'GET', '/yok')[0], 404)
+        for ttl in ('60', -5, 0, True):
+            status, error = self._request(conn, 'POST', '/holds',
+                                          {'showtime_id': showtime_id, 'seats': ['C1'], 'ttl': ttl})
+            self.assertEqual((status, error['error']), (400, "Geçersiz tutma süresi: ttl"))
+        self.assertTrue(is_seat_available(main.seat_maps[showtime_id], 'C1'))
+        self.assertIs(conn.sock, sock)  # Bağlantı hep açık kaldı
+        conn.close()
+    
+    def test_pipelining(self):
+        """Tek seferde gönderilen istekler sırayla yanıtlanır"""
+        showtime_id = self.showtime['showtime_id']
+        requests = (f"GET /showtimes/{showtime_id}/seats HTTP/1.1\r\nHost: x\r\n\r\n"
+                    "GET /reports/peak-days HTTP/1.1\r\nHost: x\r\n\r\n"
+                    "GET /movies HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+        
+        with socket.create_connection(('127.0.0.1', self.port)) as sock:
+            sock.sendall(requests.encode())
+            data = b''
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        
+        self.assertEqual(data.count(b'HTTP/1.1 200 OK'), 3)
+        self.assertLess(data.index(b'"showtime_id"'), data.index(b'"total_days"'))
+        self.assertTrue(data.endswith(b'[]'))
+    
+    def test_seat_stream(self):
+        """Koltuk yayını tutma ve süresi dolan tutmayı iletir, geride kalana tam görüntü gider"""
+        showtime_id = self.showtime['showtime_id']
+        stream = http.client.HTTPConnection('127.0.0.1', self.port, timeout=5)
+        stream.request('GET', f"/showtimes/{showtime_id}/stream?format=ndjson")
+        response = stream.getresponse()
+        self.assertEqual(response.getheader('Content-Type'), 'application/x-ndjson; charset=utf-8')
+        
+        def read_seats(count):
+            seats = {}
+            while len(seats) < count:
+                event = json.loads(response.readline())
+                self.assertEqual(event['event'], 'changes')
+                seats.update(event['changes'])
+            return seats, event['version']
+        
+        snapshot = json.loads(response.readline())
+        self.assertEqual((snapshot['event'], snapshot['snapshot']), ('snapshot', '0' * 96))
+        
+        conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        self._request(conn, 'POST', '/holds', {'showtime_id': showtime_id, 'seats': ['A1', 'A2']})
+        self.assertEqual(read_seats(2)[0], {'A1': 'held', 'A2': 'held'})
+        
+        # Süresi dolan tutma da aynı yoldan yayınlanır
+        main.engine.holds.release_expired(now=time.time() + 3600)
+        seats, version = read_seats(2)
+        self.assertEqual(seats, {'A1': 'available', 'A2': 'available'})
+        stream.close()
+        
+        # Sürümü halkadan düşmüş istemci tam görüntüyle yeniden eşitlenir
+        for _ in range(CHANGE_LOG_SIZE // 2 + 1):
+            self._request(conn, 'POST', '/holds', {'showtime_id': showtime_id, 'seats': ['B1']})
+            main.engine.holds.release_expired(now=time.time() + 3600)
+        stream.request('GET', f"/showtimes/{showtime_id}/stream?since={version}")
+        response = stream.getresponse()
+        self.assertEqual(response.readline(), f"id: {version + CHANGE_LOG_SIZE + 2}\n".encode())
+        self.assertEqual(response.readline(), b"event: snapshot\n")
+        stream.close()
+        
+        self.assertEqual(self._request(conn, 'GET', f"/showtimes/{showtime_id}/stream?format=xml")[0],
+                         400)
+        conn.close()
+
+
 class TestValidation(unittest.TestCase):
     """Veri doğrulama testleri"""
     
@@ -328,6 +1774,19 @@ class TestValidation(unittest.TestCase):
         self.assertFalse(validate_date('20-01-2025'))
         self.assertFalse(validate_date('invalid'))
     
+    def test_revenue_menu_rejects_bad_date(self):
+        """Gelir özeti menüsünde hatalı tarih program sonlanmadan bildirilir"""
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+        # Raporlar -> Gelir Özeti -> hatalı dönem -> Enter -> Ana Menü -> Çıkış
+        answers = ['3', '2', '2025-13-01', '2025-12-31', '', '6', '5']
+        with tempfile.TemporaryDirectory() as tmp:
+            result = subprocess.run([sys.executable, script], cwd=tmp,
+                                    env=dict(os.environ, CINEMA_STORAGE='json'),
+                                    input='\n'.join(answers) + '\n', capture_output=True,
+                                    text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("Geçersiz tarih formatı!", result.stdout)
+    
     def test_valid_time(self):
         """Geçerli saat formatları"""
         self.assertTrue(validate_time('14:30'))
@@ -359,8 +1818,23 @@ def run_tests():
     
     # Test sınıflarını ekle
     suite.addTests(loader.loadTestsFromTestCase(TestSeating))
+    suite.addTests(loader.loadTestsFromTestCase(TestLayouts))
     suite.addTests(loader.loadTestsFromTestCase(TestBookings))
+    suite.addTests(loader.loadTestsFromTestCase(TestBookingEngine))
+    suite.addTests(loader.loadTestsFromTestCase(TestHolds))
     suite.addTests(loader.loadTestsFromTestCase(TestMovies))
+    suite.addTests(loader.loadTestsFromTestCase(TestRepository))
+    suite.addTests(loader.loadTestsFromTestCase(TestAnalytics))
+    suite.addTests(loader.loadTestsFromTestCase(TestStorage))
+    suite.addTests(loader.loadTestsFromTestCase(TestPersistence))
+    suite.addTests(loader.loadTestsFromTestCase(TestSeatMapCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestSqliteStorage))
+    suite.addTests(loader.loadTestsFromTestCase(TestShardedStorage))
+    suite.addTests(loader.loadTestsFromTestCase(TestReplay))
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmarks))
+    suite.addTests(loader.loadTestsFromTestCase(TestProfiling))
+    suite.addTests(loader.loadTestsFromTestCase(TestMetrics))
+    suite.addTests(loader.loadTestsFromTestCase(TestServer))
     suite.addTests(loader.loadTestsFromTestCase(TestValidation))
     
     # Testleri çalıştır